@@ -0,0 +1,162 @@
+'''
+check_ctg_checkpoint.py
+
+python check_ctg_checkpoint.py [-h, --help]
+* display help
+
+python check_ctg_checkpoint.py
+python check_ctg_checkpoint.py [-p, --problem] <problem_file_name> ...
+* check that a post-contingency evaluation resumed from a checkpoint, see ctg_checkpoint_dir,
+  gives the same results as an evaluation without a checkpoint
+* by default on the problems in test_data, with solutions constructed as in check_ctg_screening.py
+* for each solution, an evaluation with a checkpoint is interrupted after some t,
+  and then resumed with the same options, and with other options, e.g. ctg_top_k, that change the per-t results,
+  and resumed after the last record in the checkpoint is made unreadable in several ways
+* compares t_k_z, the worst post-contingency violations viol_*_t_s_max_ctg, and the top violations for equality,
+  and checks that the checkpoint file is removed when the resumed evaluation finishes
+* exits with status 1 if any of these differ, if a checkpoint file is left, or if no solutions were checked
+'''
+
+import argparse, contextlib, copy, io, json, os, pathlib, pickle, sys, tempfile
+import numpy
+from datamodel.output.data import OutputDataFile
+from datautilities import arraydata, evaluation, ctgmodel, utils
+from check_ctg_screening import get_test_data_problem_files, load_problem, make_solution, viol_keys
+
+default_config_file = 'config.json'
+
+# ways to make the last record of a checkpoint file unreadable, as bytes appended to the file,
+# or None to cut off the last few bytes
+corrupt_records = {
+    'none': b'',
+    'truncated': None,
+    'import': b'cno_such_module\nno_such_name\n.', # unpickling raises ModuleNotFoundError
+    'attribute': b'cdatautilities.ctgmodel\nno_such_name\n.', # unpickling raises AttributeError
+    'not_a_result': pickle.dumps(1), # r['t'] raises TypeError
+    }
+
+class Interrupted(Exception):
+    pass
+
+@contextlib.contextmanager
+def interrupt_after(num_t):
+    '''
+    within the context, an evaluation with a checkpoint is interrupted after saving num_t per-t results
+    '''
+
+    put = ctgmodel.Checkpoint.put
+    def interrupted_put(checkpoint, r):
+        if len(checkpoint.results) >= num_t:
+            raise Interrupted()
+        put(checkpoint, r)
+    ctgmodel.Checkpoint.put = interrupted_put
+    try:
+        yield
+    finally:
+        ctgmodel.Checkpoint.put = put
+
+def eval_ctg(problem, solution, config):
+    '''
+    evaluate the solution, returning t_k_z, the worst post-contingency violations, and the top violations.
+    the output of the evaluation is not printed
+    '''
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution_array = arraydata.OutputData()
+        solution_array.set_from_data_model(problem, solution)
+        solution_evaluator = evaluation.SolutionEvaluator(problem, solution_array, config=config)
+        solution_evaluator.run()
+    result = {i: copy.deepcopy(getattr(solution_evaluator, i)) for i in ['t_k_z'] + viol_keys}
+    result['ctg_top_viol'] = (
+        None if solution_evaluator.ctg_top_viol_idx is None
+        else solution_evaluator.ctg_evaluator.get_top_viol(solution_evaluator.ctg_top_viol_idx))
+    return result
+
+def compare(expected, result):
+    '''
+    the keys where result differs from expected
+    '''
+
+    return [
+        i for i in ['t_k_z'] + viol_keys + ['ctg_top_viol']
+        if not (numpy.array_equal(expected[i], result[i]) if i == 't_k_z' else expected[i] == result[i])]
+
+def check_problem(problem_file, config, num_solutions, top_k):
+    '''
+    returns the number of solutions checked and the list of differences found
+    '''
+
+    try:
+        data = load_problem(problem_file)
+    except Exception as e:
+        print('skip problem: {}, cannot load with the installed data model: {}'.format(problem_file, type(e).__name__))
+        return 0, []
+    problem = arraydata.InputData()
+    problem.set_from_data_model(data, config)
+    num_t = problem.num_t
+    num_checked = 0
+    diffs = []
+    for seed in range(num_solutions):
+        solution = OutputDataFile(**make_solution(data, seed))
+        # (options of the interrupted evaluation, options of the resumed evaluation)
+        cases = [
+            ({'ctg_top_k': 0}, {'ctg_top_k': 0}),
+            ({'ctg_top_k': top_k}, {'ctg_top_k': top_k}),
+            ({'ctg_top_k': 0}, {'ctg_top_k': top_k}),
+            ({'ctg_top_k': top_k}, {'ctg_top_k': 0}),
+            ({'ctg_top_k': top_k, 'ctg_screening': False}, {'ctg_top_k': top_k, 'ctg_screening': True})]
+        cases = [(i, j, 'none') for i, j in cases] + [({'ctg_top_k': top_k}, {'ctg_top_k': top_k}, i) for i in corrupt_records if i != 'none']
+        for interrupted_options, resumed_options, corrupt in cases:
+            expected = eval_ctg(problem, solution, dict(config, **resumed_options))
+            with tempfile.TemporaryDirectory() as checkpoint_dir:
+                try:
+                    with interrupt_after(max(1, num_t // 2)):
+                        eval_ctg(problem, solution, dict(config, ctg_checkpoint_dir=checkpoint_dir, **interrupted_options))
+                except Interrupted:
+                    pass
+                for name in os.listdir(checkpoint_dir):
+                    path = os.path.join(checkpoint_dir, name)
+                    if corrupt_records[corrupt] is None:
+                        os.truncate(path, os.path.getsize(path) - 8)
+                    else:
+                        with open(path, 'ab') as f:
+                            f.write(corrupt_records[corrupt])
+                result = eval_ctg(problem, solution, dict(config, ctg_checkpoint_dir=checkpoint_dir, **resumed_options))
+                left = os.listdir(checkpoint_dir)
+            for i in compare(expected, result) + (['checkpoint file left: {}'.format(left)] if len(left) > 0 else []):
+                diffs.append((problem_file, seed, interrupted_options, resumed_options, corrupt, i))
+                print('differs. problem: {}, seed: {}, interrupted: {}, resumed: {}, corrupt: {}, key: {}, expected: {}, resumed: {}'.format(
+                    problem_file, seed, interrupted_options, resumed_options, corrupt, i, expected.get(i), result.get(i)))
+            print('checked. problem: {}, seed: {}, interrupted: {}, resumed: {}, corrupt: {}'.format(
+                problem_file, seed, interrupted_options, resumed_options, corrupt))
+        num_checked += 1
+    return num_checked, diffs
+
+if __name__ == '__main__':
+
+    msg = '\n'.join([
+            'check that a contingency evaluation resumed from a checkpoint gives the same results as without one.',
+            'by default, on the problems in test_data, with solutions constructed here.',
+            ])
+    parser = argparse.ArgumentParser(description=msg, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-p", "--problem", nargs='*', help="The problem files to check, default the problems in test_data", default=None)
+    parser.add_argument("-c", "--config", help="The config file with default parameter values", default=str(pathlib.Path(utils.get_C3DataUtilities_dir(), default_config_file)))
+    parser.add_argument("-n", "--num_solutions", type=int, help="The number of solutions to construct for each problem", default=2)
+    parser.add_argument("--top_k", type=int, help="The value of ctg_top_k to resume with, other than 0", default=3)
+
+    args = parser.parse_args()
+
+    print('args:')
+    print(args)
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    problem_files = (get_test_data_problem_files() if args.problem is None else args.problem)
+    num_checked = 0
+    diffs = []
+    for problem_file in problem_files:
+        n, d = check_problem(problem_file, config, args.num_solutions, args.top_k)
+        num_checked += n
+        diffs += d
+    print('solutions checked: {}, differences: {}'.format(num_checked, len(diffs)))
+    sys.exit(1 if (len(diffs) > 0 or num_checked == 0) else 0)
@@ -0,0 +1,147 @@
+'''
+check_ctg_multi.py
+
+python check_ctg_multi.py [-h, --help]
+* display help
+
+python check_ctg_multi.py
+python check_ctg_multi.py [-p, --problem] <problem_file_name> ...
+* check the post-contingency evaluation of multi-element contingencies
+* by default on the problems in test_data that have multi-element contingencies,
+  with solutions constructed as in check_ctg_screening.py
+* the installed data model requires one component in each contingency,
+  so the problems are loaded with check_ctg_screening.load_problem()
+* a multi-element contingency k outaging the devices a_1, ..., a_m and b in a solution
+  has the same post-contingency flows as the single element contingency outaging b
+  in the solution with a_1, ..., a_m out of service in every t,
+  so the penalties t_k_z of the two are compared, for each option set in option_sets.
+  the latter is evaluated on the problem with only the contingency outaging b,
+  as taking a_1, ..., a_m out of service can make other contingencies disconnect the network
+* exits with status 1 if any of these differ by more than --tol relative to the penalty, or if no contingencies were checked
+'''
+
+import argparse, contextlib, io, json, pathlib, sys
+import numpy
+from datamodel.output.data import OutputDataFile
+from datautilities import arraydata, evaluation, utils
+from check_ctg_screening import get_test_data_problem_files, load_problem, make_solution
+
+default_config_file = 'config.json'
+
+# options of the post-contingency evaluation to check the multi-element contingencies under
+option_sets = [
+    {},
+    {'ctg_screening': True},
+    {'ctg_prune': True},
+    {'ctg_t_update': 'smw'},
+    {'ctg_time_batch': True},
+    {'ctg_w_endpoint_rows': True, 'ctg_lodf_drop_tol': 1e-3},
+    {'ctg_memory_budget_mb': 0.01},
+    {'ctg_num_workers': 2, 'ctg_worker_type': 'thread'},
+    ]
+
+def eval_t_k_z(problem, solution, config):
+    '''
+    evaluate the solution, returning t_k_z.
+    the output of the evaluation is not printed
+    '''
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution_array = arraydata.OutputData()
+        solution_array.set_from_data_model(problem, solution)
+        solution_evaluator = evaluation.SolutionEvaluator(problem, solution_array, config=config)
+        solution_evaluator.run()
+    return numpy.array(solution_evaluator.t_k_z)
+
+def set_out_of_service(solution, uids):
+    '''
+    a copy of a solution dict with the AC branches and DC lines in uids out of service in every t
+    '''
+
+    solution = json.loads(json.dumps(solution))
+    ts = solution['time_series_output']
+    for i in ts['ac_line'] + ts['two_winding_transformer']:
+        if i['uid'] in uids:
+            i['on_status'] = [0 for t in i['on_status']]
+    for i in ts['dc_line']:
+        if i['uid'] in uids:
+            for j in ['pdc_fr', 'qdc_fr', 'qdc_to']:
+                i[j] = [0.0 for t in i[j]]
+    return solution
+
+def check_problem(problem_file, config, num_solutions, tol):
+    '''
+    returns the number of multi-element contingencies checked and the list of differences found
+    '''
+
+    try:
+        data = load_problem(problem_file)
+    except Exception as e:
+        print('skip problem: {}, cannot load with the installed data model: {}'.format(problem_file, type(e).__name__))
+        return 0, []
+    k_uid = [i.uid for i in data.reliability.contingency]
+    k_components = [i.components for i in data.reliability.contingency]
+    k_single = {c[0]: k for k, c in enumerate(k_components) if len(c) == 1}
+    # (multi-element contingency, single element contingency of its last component, its other components)
+    k_multi = [
+        (k, k_single[c[-1]], set(c[:-1])) for k, c in enumerate(k_components) if len(c) > 1 and c[-1] in k_single]
+    if len(k_multi) == 0:
+        print('skip problem: {}, no multi-element contingencies with a single element contingency of their last component'.format(
+            problem_file))
+        return 0, []
+    problem = arraydata.InputData()
+    problem.set_from_data_model(data, config)
+    # the problem with only the single element contingency k1, for each k1
+    k1_problem = {}
+    for k, k1, out in k_multi:
+        k1_data = data.copy(deep=True)
+        k1_data.reliability.contingency = [k1_data.reliability.contingency[k1]]
+        k1_problem[k1] = arraydata.InputData()
+        k1_problem[k1].set_from_data_model(k1_data, config)
+    num_checked = 0
+    diffs = []
+    for seed in range(num_solutions):
+        solution = make_solution(data, seed)
+        for options in option_sets:
+            t_k_z = eval_t_k_z(problem, OutputDataFile(**solution), dict(config, **options))
+            for k, k1, out in k_multi:
+                t_k1_z = eval_t_k_z(
+                    k1_problem[k1], OutputDataFile(**set_out_of_service(solution, out)), dict(config, **options))[:, 0]
+                err = numpy.amax(numpy.abs(t_k_z[:, k] - t_k1_z) / numpy.maximum(1.0, numpy.abs(t_k1_z)))
+                if not err <= tol:
+                    diffs.append((problem_file, seed, options, k_uid[k]))
+                    print('differs. problem: {}, seed: {}, options: {}, contingency: {}, relative error: {}, t_k_z: {}, expected: {}'.format(
+                        problem_file, seed, options, k_uid[k], err, t_k_z[:, k], t_k1_z))
+                num_checked += 1
+            print('checked. problem: {}, seed: {}, options: {}, multi-element contingencies: {}, sum t_k_z: {}'.format(
+                problem_file, seed, options, len(k_multi), numpy.sum(t_k_z[:, [k for k, k1, out in k_multi]])))
+    return num_checked, diffs
+
+if __name__ == '__main__':
+
+    msg = '\n'.join([
+            'check the contingency evaluation of multi-element contingencies against equivalent single element contingencies.',
+            'by default, on the problems in test_data, with solutions constructed here.',
+            ])
+    parser = argparse.ArgumentParser(description=msg, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-p", "--problem", nargs='*', help="The problem files to check, default the problems in test_data", default=None)
+    parser.add_argument("-c", "--config", help="The config file with default parameter values", default=str(pathlib.Path(utils.get_C3DataUtilities_dir(), default_config_file)))
+    parser.add_argument("-n", "--num_solutions", type=int, help="The number of solutions to construct for each problem", default=2)
+    parser.add_argument("--tol", type=float, help="The tolerance on the difference in penalties, relative to the penalty", default=1e-8)
+
+    args = parser.parse_args()
+
+    print('args:')
+    print(args)
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    problem_files = (get_test_data_problem_files() if args.problem is None else args.problem)
+    num_checked = 0
+    diffs = []
+    for problem_file in problem_files:
+        n, d = check_problem(problem_file, config, args.num_solutions, args.tol)
+        num_checked += n
+        diffs += d
+    print('contingencies checked: {}, differences: {}'.format(num_checked, len(diffs)))
+    sys.exit(1 if (len(diffs) > 0 or num_checked == 0) else 0)
@@ -0,0 +1,176 @@
+'''
+check_ctg_screening.py
+
+python check_ctg_screening.py [-h, --help]
+* display help
+
+python check_ctg_screening.py
+python check_ctg_screening.py [-p, --problem] <problem_file_name> ...
+* check that the post-contingency evaluation gives the same results with and without ctg_screening
+* by default on the problems in test_data
+* for each problem, solutions are constructed from a random number generator with a fixed seed,
+  since test_data has no solutions
+* the post-contingency limits can be scaled down so that some contingency violations occur
+* compares t_k_z and the worst post-contingency violations viol_*_t_s_max_ctg for equality
+* exits with status 1 if any of these differ, or if no solutions were checked, and 0 otherwise,
+  so it can be run as a check in CI from any directory
+'''
+
+import argparse, contextlib, copy, io, json, pathlib, sys
+import numpy
+from datamodel.input.data import InputDataFile
+from datamodel.output.data import OutputDataFile
+from datautilities import arraydata, evaluation, utils
+
+default_config_file = 'config.json'
+
+viol_keys = [
+    'viol_acl_acl_t_s_max_ctg', 'viol_xfr_acl_t_s_max_ctg',
+    'viol_acl_dcl_t_s_max_ctg', 'viol_xfr_dcl_t_s_max_ctg',
+    'viol_acl_xfr_t_s_max_ctg', 'viol_xfr_xfr_t_s_max_ctg',
+    'viol_acl_multi_t_s_max_ctg', 'viol_xfr_multi_t_s_max_ctg']
+
+def get_test_data_problem_files():
+
+    return sorted(str(i) for i in pathlib.Path(utils.get_data_utils_dir()).parent.joinpath('test_data').glob('*.json'))
+
+def load_problem(problem_file):
+    '''
+    the data model of a problem file, allowing multi-element contingencies.
+    the installed data model requires one component in each contingency,
+    so each contingency is validated with its first component, and then given all of its components
+    '''
+
+    with open(problem_file, 'r') as f:
+        d = json.load(f)
+    components = [i['components'] for i in d['reliability']['contingency']]
+    for i, c in zip(d['reliability']['contingency'], components):
+        i['components'] = c[0:1]
+    data = InputDataFile(**d)
+    data.reliability.contingency = [
+        i.copy(update={'components': c}) for i, c in zip(data.reliability.contingency, components)]
+    return data
+
+def make_solution(data, seed):
+    '''
+    a solution to the problem data, with every branch, shunt, and transformer setting at its initial status
+    and random device dispatch, DC line flows, and bus voltages within their bounds.
+    it is not meant to be feasible, only to exercise the post-contingency evaluation
+    '''
+
+    rng = numpy.random.default_rng(seed)
+    num_t = len(data.time_series_input.general.interval_duration)
+    sd_ts = {i.uid: i for i in data.time_series_input.simple_dispatchable_device}
+    zero = [0.0 for t in range(num_t)]
+    return {'time_series_output': {
+        'bus': [
+            {'uid': i.uid,
+             'vm': rng.uniform(i.vm_lb, i.vm_ub, size=num_t).tolist(),
+             'va': rng.uniform(-0.3, 0.3, size=num_t).tolist()}
+            for i in data.network.bus],
+        'shunt': [
+            {'uid': i.uid, 'step': [i.initial_status.step for t in range(num_t)]}
+            for i in data.network.shunt],
+        'simple_dispatchable_device': [
+            {'uid': i.uid,
+             'on_status': rng.integers(0, 2, size=num_t).tolist(),
+             'p_on': rng.uniform(sd_ts[i.uid].p_lb, sd_ts[i.uid].p_ub).tolist(),
+             'q': rng.uniform(sd_ts[i.uid].q_lb, sd_ts[i.uid].q_ub).tolist(),
+             'p_reg_res_up': zero, 'p_reg_res_down': zero, 'p_syn_res': zero, 'p_nsyn_res': zero,
+             'p_ramp_res_up_online': zero, 'p_ramp_res_down_online': zero,
+             'p_ramp_res_up_offline': zero, 'p_ramp_res_down_offline': zero,
+             'q_res_up': zero, 'q_res_down': zero}
+            for i in data.network.simple_dispatchable_device],
+        'ac_line': [
+            {'uid': i.uid, 'on_status': [i.initial_status.on_status for t in range(num_t)]}
+            for i in data.network.ac_line],
+        'two_winding_transformer': [
+            {'uid': i.uid,
+             'on_status': [i.initial_status.on_status for t in range(num_t)],
+             'tm': [i.initial_status.tm for t in range(num_t)],
+             'ta': [i.initial_status.ta for t in range(num_t)]}
+            for i in data.network.two_winding_transformer],
+        'dc_line': [
+            {'uid': i.uid,
+             'pdc_fr': rng.uniform(-i.pdc_ub, i.pdc_ub, size=num_t).tolist(),
+             'qdc_fr': zero, 'qdc_to': zero}
+            for i in data.network.dc_line]}}
+
+def eval_ctg(problem, solution, config):
+    '''
+    evaluate the solution, returning t_k_z and the worst post-contingency violations.
+    the output of the evaluation is not printed
+    '''
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution_array = arraydata.OutputData()
+        solution_array.set_from_data_model(problem, solution)
+        solution_evaluator = evaluation.SolutionEvaluator(problem, solution_array, config=config)
+        solution_evaluator.run()
+    return {i: copy.deepcopy(getattr(solution_evaluator, i)) for i in ['t_k_z'] + viol_keys}
+
+def check_problem(problem_file, config, num_solutions, s_max_ctg_scales):
+    '''
+    returns the number of solutions checked and the list of differences found
+    '''
+
+    try:
+        data = load_problem(problem_file)
+    except Exception as e:
+        print('skip problem: {}, cannot load with the installed data model: {}'.format(problem_file, type(e).__name__))
+        return 0, []
+    problem = arraydata.InputData()
+    problem.set_from_data_model(data, config)
+    acl_s_max_ctg = problem.acl_s_max_ctg
+    xfr_s_max_ctg = problem.xfr_s_max_ctg
+    num_checked = 0
+    diffs = []
+    for scale in s_max_ctg_scales:
+        problem.acl_s_max_ctg = scale * acl_s_max_ctg
+        problem.xfr_s_max_ctg = scale * xfr_s_max_ctg
+        for seed in range(num_solutions):
+            solution = OutputDataFile(**make_solution(data, seed))
+            exhaustive = eval_ctg(problem, solution, dict(config, ctg_screening=False))
+            screened = eval_ctg(problem, solution, dict(config, ctg_screening=True))
+            for i in ['t_k_z'] + viol_keys:
+                same = (
+                    numpy.array_equal(exhaustive[i], screened[i]) if i == 't_k_z'
+                    else exhaustive[i] == screened[i])
+                if not same:
+                    diffs.append((problem_file, scale, seed, i))
+                    print('differs. problem: {}, s_max_ctg scale: {}, seed: {}, key: {}, exhaustive: {}, screened: {}'.format(
+                        problem_file, scale, seed, i, exhaustive[i], screened[i]))
+            print('checked. problem: {}, s_max_ctg scale: {}, seed: {}, sum t_k_z: {}'.format(
+                problem_file, scale, seed, numpy.sum(exhaustive['t_k_z'])))
+            num_checked += 1
+    return num_checked, diffs
+
+if __name__ == '__main__':
+
+    msg = '\n'.join([
+            'check that contingency screening gives the same results as the exhaustive computation.',
+            'by default, on the problems in test_data, with solutions constructed here.',
+            ])
+    parser = argparse.ArgumentParser(description=msg, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-p", "--problem", nargs='*', help="The problem files to check, default the problems in test_data", default=None)
+    parser.add_argument("-c", "--config", help="The config file with default parameter values", default=str(pathlib.Path(utils.get_C3DataUtilities_dir(), default_config_file)))
+    parser.add_argument("-n", "--num_solutions", type=int, help="The number of solutions to construct for each problem", default=4)
+    parser.add_argument("--s_max_ctg_scales", help="Comma separated factors on the post-contingency branch limits", default='1.0,0.3')
+
+    args = parser.parse_args()
+
+    print('args:')
+    print(args)
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    problem_files = (get_test_data_problem_files() if args.problem is None else args.problem)
+    s_max_ctg_scales = [float(i) for i in args.s_max_ctg_scales.split(',')]
+    num_checked = 0
+    diffs = []
+    for problem_file in problem_files:
+        n, d = check_problem(problem_file, config, args.num_solutions, s_max_ctg_scales)
+        num_checked += n
+        diffs += d
+    print('solutions checked: {}, differences: {}'.format(num_checked, len(diffs)))
+    sys.exit(1 if (len(diffs) > 0 or num_checked == 0) else 0)
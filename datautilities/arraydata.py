@@ -1,12 +1,55 @@
-import numpy
+import numpy, scipy.sparse
+
+from datautilities import utils
+
+def get_sd_t_cost_blocks(data, sd_uid, sd_is_cs):
+    '''
+    cost blocks of the simple dispatchable devices in order of sd_uid, in a flat ragged form,
+    like the rows of a CSR matrix, with no Python object per device, interval, or block:
+    * sd_t_block_ptr - the blocks of device i in interval t are sd_t_block_ptr[i * num_t + t]
+      to sd_t_block_ptr[i * num_t + t + 1] - 1
+    * block_c - marginal cost of each block, negated for consumers, i.e. positive benefit is transformed into negative cost
+    * block_p_max - size of each block
+    the blocks of each device and interval are sorted in order of increasing (negated) marginal cost,
+    i.e. decreasing margin, with ties in the order of the data, as by sorted()
+    '''
+
+    data_map = {x.uid:x for x in data.time_series_input.simple_dispatchable_device}
+    cost = [data_map[i].cost for i in sd_uid]
+    num_t = len(data.time_series_input.general.interval_duration)
+    num_block = numpy.array([len(t_c) for c in cost for t_c in c], dtype=int)
+    sd_t_block_ptr = numpy.zeros(shape=(num_block.size + 1, ), dtype=int)
+    numpy.cumsum(num_block, out=sd_t_block_ptr[1:])
+    blocks = numpy.reshape(numpy.array([b for c in cost for t_c in c for b in t_c], dtype=float), newshape=(-1, 2))
+    block_sd_t = numpy.repeat(numpy.arange(num_block.size), num_block)
+    block_c = blocks[:, 0] * numpy.where(numpy.repeat(numpy.asarray(sd_is_cs, dtype=bool), num_t), -1.0, 1.0)[block_sd_t]
+    order = numpy.lexsort((block_c, block_sd_t)) # stable, so ties keep the order of the data
+    return sd_t_block_ptr, block_c[order], blocks[order, 1]
+
+def get_sd_window_mat(window_sd, window_t, t_val, num_sd, num_t):
+    '''
+    sparse window x (sd, t) incidence matrix, with (sd, t) in row major order, i.e. column sd * num_t + t.
+    window_sd - device of each window
+    window_t - window x t mask of the intervals in each window
+    t_val - value of the entries in each interval
+    '''
+
+    window, t = numpy.nonzero(window_t)
+    return scipy.sparse.csr_matrix(
+        (t_val[t], (window, window_sd[window] * num_t + t)),
+        (window_sd.size, num_sd * num_t))
 
 class InputData(object):
 
     def __init__(self):
         
-        pass
+        self.sd_window_time_eq_tol = None
     
-    def set_from_data_model(self, data):
+    def set_from_data_model(self, data, config={}):
+        '''
+        config - the evaluation config. with time_eq_tol there, the sd window matrices are built here,
+        see set_sd_window_mats(), otherwise by the SolutionEvaluator
+        '''
 
         self.set_structure(data)
         self.set_scalars(data)
@@ -22,8 +65,11 @@ class InputData(object):
         self.set_k(data)
         self.set_sd_t(data)
         self.set_sd_t_cost(data)
+        self.set_sd_t_su_sd_trajectories()
         self.set_prz_t(data)
         self.set_qrz_t(data)
+        if 'time_eq_tol' in config:
+            self.set_sd_window_mats(config['time_eq_tol'])
 
     def set_structure(self, data):
 
@@ -196,8 +242,18 @@ class InputData(object):
         self.sd_num_startup_state = numpy.array([len(startup_states[i]) for i in self.sd_uid], dtype=int)
         self.sd_startup_state_d_max_list = [numpy.array([s[1] for s in startup_states[i]], dtype=float) for i in self.sd_uid]
         self.sd_startup_state_c_list = [numpy.array([s[0] for s in startup_states[i]], dtype=float) for i in self.sd_uid]
-        #self.sd_startup_state_d_max = numpy.array([s[1] for i in self.sd_uid for s in startup_states[i]])
-        #self.sd_startup_state_c = numpy.array([s[0] for i in self.sd_uid for s in startup_states[i]])
+        # the same, as sd,state arrays padded past sd_num_startup_state with d_max = -inf, which no downtime qualifies for,
+        # and c = 0, see evaluation.SolutionEvaluator.eval_sd_t_z_sus
+        self.sd_max_num_startup_state = (int(numpy.amax(self.sd_num_startup_state)) if self.num_sd > 0 else 0)
+        self.sd_startup_state_d_max = numpy.full(
+            shape=(self.num_sd, self.sd_max_num_startup_state), fill_value=-numpy.inf, dtype=float)
+        self.sd_startup_state_c = numpy.zeros(shape=(self.num_sd, self.sd_max_num_startup_state), dtype=float)
+        sd_state_is_real = numpy.less(
+            numpy.arange(self.sd_max_num_startup_state), numpy.reshape(self.sd_num_startup_state, newshape=(-1, 1)))
+        self.sd_startup_state_d_max[sd_state_is_real] = numpy.concatenate(
+            [numpy.zeros(shape=(0, ), dtype=float)] + self.sd_startup_state_d_max_list)
+        self.sd_startup_state_c[sd_state_is_real] = numpy.concatenate(
+            [numpy.zeros(shape=(0, ), dtype=float)] + self.sd_startup_state_c_list)
 
         # max startups constraint data
         self.sd_num_max_startup_constr = numpy.array([len(data_map[i].startups_ub) for i in self.sd_uid], dtype=int)
@@ -404,6 +460,21 @@ class InputData(object):
 
     def set_k(self, data):
 
+        # all devices outaged by each contingency.
+        # a contingency outaging more than one device is a multi-element contingency
+        k_out_device_uids = [list(k.components) for k in data.reliability.contingency]
+        self.k_num_out = numpy.array([len(k_out_device_uids[i]) for i in range(self.num_k)], dtype=int)
+        self.k_out_acl_list = [
+            numpy.array([self.acl_map[j] for j in k_out_device_uids[i] if j in self.acl_map], dtype=int)
+            for i in range(self.num_k)]
+        self.k_out_dcl_list = [
+            numpy.array([self.dcl_map[j] for j in k_out_device_uids[i] if j in self.dcl_map], dtype=int)
+            for i in range(self.num_k)]
+        self.k_out_xfr_list = [
+            numpy.array([self.xfr_map[j] for j in k_out_device_uids[i] if j in self.xfr_map], dtype=int)
+            for i in range(self.num_k)]
+
+        # first device outaged by each contingency - the only one, unless it is a multi-element contingency
         k_out_device_uid = numpy.array([k.components[0] for k in data.reliability.contingency])
         self.k_out_device = numpy.array([self.all_map[k_out_device_uid[i]] for i in range(self.num_k)], dtype=int)
         self.k_out_is_acl = numpy.array([self.all_is_acl[self.k_out_device[i]] for i in range(self.num_k)], dtype=int)
@@ -488,22 +559,149 @@ class InputData(object):
         1. marginal cost value is negated for consumer devices, i.e. positive benefit is transformed into negative cost
         2. for each device and each time interval, the cost blocks are sorted in order of increasing marginal cost
         then to evaluate the cost of a given p value, one loops over the cost blocks in order,
-        applying the cost to the remaining dispatched energy, subtracting pmax from the dispatched energy
+        applying the cost to the remaining dispatched energy, subtracting pmax from the dispatched energy.
+        the blocks are stored in a flat ragged form, see get_sd_t_cost_blocks(),
+        in sd_t_block_ptr, sd_block_c, and sd_block_p_max, and evaluated by utils.eval_convex_cost_function_arrays()
         '''
 
-        data_map = {x.uid:x for x in data.time_series_input.simple_dispatchable_device}
-        cost_blocks = [data_map[i].cost for i in self.sd_uid]
-        for i in range(self.num_sd): # negate the cost value for consumer blocks. keep producer blocks as is
-            if self.sd_is_cs[i]:
-                cost_blocks[i] = [[((-1.0) * t_b_c[0], t_b_c[1]) for t_b_c in t_c] for t_c in cost_blocks[i]]
-        for i in range(self.num_sd): # sort blocks in order of increasing cost
-            cost_blocks[i] = [sorted(t_c, key=(lambda x: x[0])) for t_c in cost_blocks[i]]
-        self.sd_t_num_block = numpy.reshape(
-            numpy.array([[len(t_c) for t_c in c] for c in cost_blocks], dtype=int),
-            newshape=(self.num_sd, self.num_t))
-        self.sd_t_block_c_list = [[numpy.array([t_b_c[0] for t_b_c in t_c], dtype=float) for t_c in c] for c in cost_blocks]
-        self.sd_t_block_p_max_list = [
-            [numpy.array([t_b_c[1] for t_b_c in t_c], dtype=float) for t_c in c] for c in cost_blocks]
+        self.sd_t_block_ptr, self.sd_block_c, self.sd_block_p_max = get_sd_t_cost_blocks(data, self.sd_uid, self.sd_is_cs)
+        self.sd_t_num_block = numpy.reshape(numpy.diff(self.sd_t_block_ptr), newshape=(self.num_sd, self.num_t))
+
+    def set_sd_t_su_sd_trajectories(self):
+        '''
+        startup and shutdown trajectories depend only on the problem data,
+        so the trajectory for a startup or shutdown of each device in each interval is computed here once,
+        in a flat ragged form, see utils.make_ragged(), with rows indexed by sd * num_t + t.
+
+        startup in t_1 > 0:
+        p = sd_t_p_min[sd, t_1] - sd_p_startup_ramp_up_max[sd] * (t_a_end[t_1] - t_a_end[t])
+        for t = t_1 - 1, t_1 - 2, ..., while p > 0
+        -> sd_t_su_traj_ptr, sd_su_traj_t, sd_su_traj_p
+
+        shutdown in t_1:
+        p = p_1 - sd_p_shutdown_ramp_dn_max[sd] * (t_a_end[t] - t_a_start[t_1])
+        for t = t_1, t_1 + 1, ..., while p > 0,
+        with p_1 = sd_p_0[sd] if t_1 == 0 else sd_t_p_min[sd, t_1 - 1]
+        -> sd_t_sd_traj_ptr, sd_sd_traj_t, sd_sd_traj_p
+        '''
+
+        sd_t_sd = numpy.repeat(numpy.arange(self.num_sd), self.num_t)
+        sd_t_t = numpy.tile(numpy.arange(self.num_t), self.num_sd)
+
+        # su - pass k covers t = t_1 - k for the trajectories still going
+        row_list = []
+        t_list = []
+        p_list = []
+        rows = numpy.flatnonzero(sd_t_t > 0)
+        k = 1
+        while rows.size > 0:
+            sd = sd_t_sd[rows]
+            t_1 = sd_t_t[rows]
+            t = t_1 - k
+            p = self.sd_t_p_min[sd, t_1] - self.sd_p_startup_ramp_up_max[sd] * (self.t_a_end[t_1] - self.t_a_end[t])
+            keep = numpy.greater(p, 0.0)
+            row_list.append(rows[keep])
+            t_list.append(t[keep])
+            p_list.append(p[keep])
+            rows = rows[numpy.logical_and(keep, t > 0)]
+            k += 1
+        self.sd_t_su_traj_ptr, self.sd_su_traj_t, self.sd_su_traj_p = utils.make_ragged(
+            self.num_sd * self.num_t,
+            numpy.concatenate([numpy.zeros(shape=(0, ), dtype=int)] + row_list),
+            numpy.concatenate([numpy.zeros(shape=(0, ), dtype=int)] + t_list),
+            numpy.concatenate([numpy.zeros(shape=(0, ), dtype=float)] + p_list))
+
+        # sd - pass k covers t = t_1 + k for the trajectories still going
+        sd_t_p_1 = numpy.zeros(shape=(self.num_sd, self.num_t), dtype=float)
+        if self.num_t > 0:
+            sd_t_p_1[:, 0] = self.sd_p_0
+            sd_t_p_1[:, 1:self.num_t] = self.sd_t_p_min[:, 0:(self.num_t - 1)]
+        row_list = []
+        t_list = []
+        p_list = []
+        rows = numpy.arange(self.num_sd * self.num_t)
+        k = 0
+        while rows.size > 0:
+            sd = sd_t_sd[rows]
+            t_1 = sd_t_t[rows]
+            t = t_1 + k
+            p = sd_t_p_1[sd, t_1] - self.sd_p_shutdown_ramp_dn_max[sd] * (self.t_a_end[t] - self.t_a_start[t_1])
+            keep = numpy.greater(p, 0.0)
+            row_list.append(rows[keep])
+            t_list.append(t[keep])
+            p_list.append(p[keep])
+            rows = rows[numpy.logical_and(keep, t < self.num_t - 1)]
+            k += 1
+        self.sd_t_sd_traj_ptr, self.sd_sd_traj_t, self.sd_sd_traj_p = utils.make_ragged(
+            self.num_sd * self.num_t,
+            numpy.concatenate([numpy.zeros(shape=(0, ), dtype=int)] + row_list),
+            numpy.concatenate([numpy.zeros(shape=(0, ), dtype=int)] + t_list),
+            numpy.concatenate([numpy.zeros(shape=(0, ), dtype=float)] + p_list))
+
+    def set_sd_window_mats(self, time_eq_tol):
+        '''
+        sparse window x (sd, t) incidence matrices for the max energy, min energy, and max startup constraints,
+        so that each constraint family is evaluated by one mat-vec over all devices and windows.
+        the intervals in a window are determined with the tolerance time_eq_tol from the evaluation config,
+        so this is called once per problem by set_from_data_model() if given the config,
+        and by the SolutionEvaluator on the problem it evaluates, where it is only redone if time_eq_tol differs.
+
+        energy constraint windows contain the intervals t with a_start + time_eq_tol < t_a_mid[t] <= a_end + time_eq_tol,
+        with entries t_d[t], so that the product with sd_t_p is the energy.
+        startup constraint windows contain the intervals t with a_start - time_eq_tol <= t_a_start[t] < a_end - time_eq_tol,
+        with entries 1, so that the product with sd_t_u_su is the number of startups.
+        for each window, *_constr_sd is the device and *_constr_idx is the index among the windows of the device
+        '''
+
+        if self.sd_window_time_eq_tol == time_eq_tol:
+            return
+        empty_float = numpy.zeros(shape=(0, ), dtype=float)
+        empty_int = numpy.zeros(shape=(0, ), dtype=int)
+
+        # max energy
+        self.sd_max_energy_constr_sd = numpy.repeat(numpy.arange(self.num_sd), self.sd_num_max_energy_constr)
+        self.sd_max_energy_constr_idx = numpy.concatenate(
+            [empty_int] + [numpy.arange(n) for n in self.sd_num_max_energy_constr])
+        self.sd_max_energy_constr_max_energy = numpy.concatenate([empty_float] + self.sd_max_energy_constr_max_energy_list)
+        a_start = numpy.concatenate([empty_float] + self.sd_max_energy_constr_a_start_list)
+        a_end = numpy.concatenate([empty_float] + self.sd_max_energy_constr_a_end_list)
+        self.sd_max_energy_constr_mat = get_sd_window_mat(
+            self.sd_max_energy_constr_sd,
+            numpy.logical_and(
+                numpy.less(numpy.reshape(a_start + time_eq_tol, newshape=(-1, 1)), self.t_a_mid),
+                numpy.less_equal(self.t_a_mid, numpy.reshape(a_end + time_eq_tol, newshape=(-1, 1)))),
+            self.t_d, self.num_sd, self.num_t)
+
+        # min energy
+        self.sd_min_energy_constr_sd = numpy.repeat(numpy.arange(self.num_sd), self.sd_num_min_energy_constr)
+        self.sd_min_energy_constr_idx = numpy.concatenate(
+            [empty_int] + [numpy.arange(n) for n in self.sd_num_min_energy_constr])
+        self.sd_min_energy_constr_min_energy = numpy.concatenate([empty_float] + self.sd_min_energy_constr_min_energy_list)
+        a_start = numpy.concatenate([empty_float] + self.sd_min_energy_constr_a_start_list)
+        a_end = numpy.concatenate([empty_float] + self.sd_min_energy_constr_a_end_list)
+        self.sd_min_energy_constr_mat = get_sd_window_mat(
+            self.sd_min_energy_constr_sd,
+            numpy.logical_and(
+                numpy.less(numpy.reshape(a_start + time_eq_tol, newshape=(-1, 1)), self.t_a_mid),
+                numpy.less_equal(self.t_a_mid, numpy.reshape(a_end + time_eq_tol, newshape=(-1, 1)))),
+            self.t_d, self.num_sd, self.num_t)
+
+        # max startup
+        self.sd_max_startup_constr_sd = numpy.repeat(numpy.arange(self.num_sd), self.sd_num_max_startup_constr)
+        self.sd_max_startup_constr_idx = numpy.concatenate(
+            [empty_int] + [numpy.arange(n) for n in self.sd_num_max_startup_constr])
+        self.sd_max_startup_constr_max_startup = numpy.concatenate(
+            [empty_int] + self.sd_max_startup_constr_max_startup_list)
+        a_start = numpy.concatenate([empty_float] + self.sd_max_startup_constr_a_start_list)
+        a_end = numpy.concatenate([empty_float] + self.sd_max_startup_constr_a_end_list)
+        self.sd_max_startup_constr_mat = get_sd_window_mat(
+            self.sd_max_startup_constr_sd,
+            numpy.logical_and(
+                numpy.less_equal(numpy.reshape(a_start - time_eq_tol, newshape=(-1, 1)), self.t_a_start),
+                numpy.less(self.t_a_start, numpy.reshape(a_end - time_eq_tol, newshape=(-1, 1)))),
+            numpy.ones(shape=(self.num_t, ), dtype=int), self.num_sd, self.num_t)
+
+        self.sd_window_time_eq_tol = time_eq_tol
 
     def set_prz_t(self, data):
 
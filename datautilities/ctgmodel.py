@@ -53,293 +53,2050 @@ Y. Chen, F. Pan, J. Holzer, E. Rothberg, Y. Ma, and A. Veeramany, "A High Perfor
 Y. Chen, F. Pan, J. Holzer, A. Veeramany, and Z. Wu, "On Improving Efficiency of Electricity Market Clearing Software with A Concurrent High Performance Computer Based Security Constrained Unit Commitment Solver", in IEEE PES General Meeting, 2021.
 '''
 
-import time, numpy, scipy, scipy.sparse, scipy.sparse.linalg
+import time, numpy, scipy, scipy.sparse, scipy.sparse.linalg, concurrent.futures, threading, collections
+import os, shutil, hashlib, uuid, pickle
+from multiprocessing import shared_memory
 from datautilities import utils
 
-# todo - refactor, with a class
-# obviously this huge block of code should be refactored
+# optional - Cholesky factorization with CHOLMOD
+try:
+    import sksparse.cholmod
+except ImportError:
+    sksparse = None
 
-@utils.timeit
-def eval_post_contingency_model(sol_eval):
+def get_nonref_bus_br_inc(num_bus, br_fbus, br_tbus, nonref_bus):
+    '''
+    branch incidence matrix on the non-reference buses, num_bus - 1 by num_br,
+    with +1 at the from bus and -1 at the to bus of each branch.
+    this is the same as (to_inj_mat - fr_inj_mat) restricted to nonref_bus,
+    as the evaluation module forms it from the injection matrices (which have -1.0)
     '''
-    loop over t
-    * create and factor negative admittance matrix A_t[t]
-    * evaluate base case flows p_t[t]
-    * compute rank-1 adjustments w_tk[t,k], v_tk[t,k], for contingencies k
-    * 
-    '''
-
-    # algorithm control parameters
-    br_filter_by_worst_ctg = False
-    t_use_smw = False
-    t_skip_update_if_no_br_change = False # not implemented yet - probably not much value, at least in the test cases we have so far
-    check_power_balance = True # not implemented yet # note this has to be skipped if br_filter_by_worst_ctg is True
-
-    # problem dimensions
-    num_bus = sol_eval.problem.num_bus
-    num_acl = sol_eval.problem.num_acl
-    num_xfr = sol_eval.problem.num_xfr
-    num_dcl = sol_eval.problem.num_dcl
-    num_br = num_acl + num_xfr
-    num_k = sol_eval.problem.num_k
-    num_t = sol_eval.problem.num_t
-    print('problem dimensions. bus: {}, acl: {}, xfr: {}, dcl: {}, k: {}, t: {}'.format(
-        num_bus, num_acl, num_xfr, num_dcl, num_k, num_t))
-
-    # choose a reference bus
-    ref_bus = 0
-    nonref_bus = numpy.array(list(range(ref_bus)) + list(range(ref_bus + 1, sol_eval.problem.num_bus)), dtype=int)
-
-    # branch matrices
-    nonref_bus_acl_inc = sol_eval.bus_acl_to_inj_mat - sol_eval.bus_acl_fr_inj_mat # inj_mat has -1.0, so (to - fr)
-    nonref_bus_acl_inc = nonref_bus_acl_inc[nonref_bus, :]
-    nonref_bus_dcl_inc = sol_eval.bus_dcl_to_inj_mat - sol_eval.bus_dcl_fr_inj_mat
-    nonref_bus_dcl_inc = nonref_bus_dcl_inc[nonref_bus, :]
-    nonref_bus_xfr_inc = sol_eval.bus_xfr_to_inj_mat - sol_eval.bus_xfr_fr_inj_mat
-    nonref_bus_xfr_inc = nonref_bus_xfr_inc[nonref_bus, :]
-    nonref_bus_br_inc = scipy.sparse.hstack((nonref_bus_acl_inc, nonref_bus_xfr_inc))
-    acl_b = numpy.array(sol_eval.problem.acl_b_sr, dtype=float)
-    xfr_b = numpy.array(sol_eval.problem.xfr_b_sr, dtype=float)
-    br_b = numpy.concatenate((acl_b, xfr_b))
-    acl_s_max = numpy.array(sol_eval.problem.acl_s_max_ctg, dtype=float)
-    xfr_s_max = numpy.array(sol_eval.problem.xfr_s_max_ctg, dtype=float)
-    br_s_max = numpy.concatenate((acl_s_max, xfr_s_max))
-    acl_u_max_over_t = numpy.amax(sol_eval.acl_t_u_on, axis=1)
-    xfr_u_max_over_t = numpy.amax(sol_eval.xfr_t_u_on, axis=1)
-    br_u_max_over_t = numpy.concatenate((acl_u_max_over_t, xfr_u_max_over_t))
-    br_b_u_max_over_t = numpy.multiply(br_u_max_over_t, br_b)
-
-    # static matrix A = -B = - M*Bsr*Mt on non-reference buses, generally symmetric nonsingular
-    # usually positive definite but may be indefinite if some branches have X_sr < 0
-    # if positive definite, using a Cholesky factorization instead of LU can improve run time
-    # note we exclude branches that are out of service for all t
-    # t delta will be on those that are out of service for a given t but in service for at least some t
-    start_time = time.time()
-    a_mat = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_u_max_over_t, newshape=(num_br, 1)))
-    a_mat = nonref_bus_br_inc.dot(a_mat)
-    a_mat = a_mat.multiply(-1.0)
-    end_time = time.time()
-    print('construct static bus admittance matrix. time: {}'.format(end_time - start_time))
-
-    # factor
-    start_time = time.time()
-    a_factors = scipy.sparse.linalg.splu(a_mat)
-    end_time = time.time()
-    print('factor static bus admittance matrix. time: {}'.format(end_time - start_time))
-
-    # get AC branches that are in service in at least one t but out of service in a given t
-    acl_in_some_t = numpy.nonzero(acl_u_max_over_t)[0]
-    xfr_in_some_t = numpy.nonzero(xfr_u_max_over_t)[0]
-    br_in_some_t = numpy.concatenate((acl_in_some_t, num_acl + xfr_in_some_t))
-    numpy.subtract(1, sol_eval.acl_t_u_on, out=sol_eval.acl_t_int)
-    numpy.subtract(1, sol_eval.xfr_t_u_on, out=sol_eval.xfr_t_int)
-    acl_out_nonzeros = numpy.nonzero(sol_eval.acl_t_int)
-    xfr_out_nonzeros = numpy.nonzero(sol_eval.xfr_t_int)
-    t_acl_delta_t = [numpy.nonzero(sol_eval.acl_t_int[:, t])[0] for t in range(num_t)]
-    t_xfr_delta_t = [numpy.nonzero(sol_eval.xfr_t_int[:, t])[0] for t in range(num_t)]
-    t_acl_delta_t = [numpy.intersect1d(acl_in_some_t, t_acl_delta_t[t], assume_unique=True) for t in range(num_t)]
-    t_xfr_delta_t = [numpy.intersect1d(xfr_in_some_t, t_xfr_delta_t[t], assume_unique=True) for t in range(num_t)]
-    t_br_delta_t = [numpy.concatenate((t_acl_delta_t[t], num_acl + t_xfr_delta_t[t])) for t in range(num_t)]
-    acl_delta_t = numpy.unique(numpy.nonzero(sol_eval.acl_t_int)[0])
-    xfr_delta_t = numpy.unique(numpy.nonzero(sol_eval.xfr_t_int)[0])
-    acl_delta_t = numpy.intersect1d(acl_in_some_t, acl_delta_t, assume_unique=True)
-    xfr_delta_t = numpy.intersect1d(xfr_in_some_t, xfr_delta_t, assume_unique=True)
-    br_delta_t = numpy.concatenate((acl_delta_t, num_acl + xfr_delta_t))
-    # get index of t_*_out (acl, xfr, br) in *_delta_t
-    acl_delta_t_map = {acl_delta_t[i]:i for i in range(acl_delta_t.size)}
-    xfr_delta_t_map = {xfr_delta_t[i]:i for i in range(xfr_delta_t.size)}
-    br_delta_t_map = {br_delta_t[i]:i for i in range(br_delta_t.size)}
-    num_acl_delta_t = acl_delta_t.size
-    num_xfr_delta_t = xfr_delta_t.size
-    num_br_delta_t = br_delta_t.size
-    t_num_acl_delta_t = [t_acl_delta_t[t].size for t in range(num_t)]
-    t_num_xfr_delta_t = [t_xfr_delta_t[t].size for t in range(num_t)]
-    t_num_br_delta_t = [t_br_delta_t[t].size for t in range(num_t)]
-    print('t_acl_delta_t: {}, t_xfr_delta_t: {}, t_br_delta_t: {}, acl_delta_t: {}, xfr_delta_t: {}, br_delta_t: {}'.format(t_acl_delta_t, t_xfr_delta_t, t_br_delta_t, acl_delta_t, xfr_delta_t, br_delta_t))
-
-    # get AC branches going out of service in at least one contingency
-    #acl_delta_k = numpy.array([
-    acl_delta_k = numpy.array(sorted(list(set([
-        sol_eval.problem.k_out_acl[k] for k in range(num_k) if sol_eval.problem.k_out_is_acl[k]]))), dtype=int)
-    xfr_delta_k = numpy.array(sorted(list(set([
-        sol_eval.problem.k_out_xfr[k] for k in range(num_k) if sol_eval.problem.k_out_is_xfr[k]]))), dtype=int)
-    dcl_delta_k = numpy.array(sorted(list(set([
-        sol_eval.problem.k_out_dcl[k] for k in range(num_k) if sol_eval.problem.k_out_is_dcl[k]]))), dtype=int)
-    br_delta_k = numpy.concatenate((acl_delta_k, num_acl + xfr_delta_k))
-    num_br_delta_k = br_delta_k.size
-    num_acl_delta_k = acl_delta_k.size
-    num_xfr_delta_k = xfr_delta_k.size
-    num_dcl_delta_k = dcl_delta_k.size
-    acl_delta_k_map = {acl_delta_k[i]:i for i in range(num_acl_delta_k)}
-    dcl_delta_k_map = {dcl_delta_k[i]:i for i in range(num_dcl_delta_k)}
-    xfr_delta_k_map = {xfr_delta_k[i]:i for i in range(num_xfr_delta_k)}
-    k_out_is_acl_list = numpy.nonzero(sol_eval.problem.k_out_is_acl)[0]
-    k_out_is_acl_acl_list = sol_eval.problem.k_out_acl[k_out_is_acl_list]
-    k_out_is_acl_acl_delta_k_list = numpy.array([acl_delta_k_map[i] for i in k_out_is_acl_acl_list], dtype=int)
-    k_out_is_dcl_list = numpy.nonzero(sol_eval.problem.k_out_is_dcl)[0]
-    k_out_is_dcl_dcl_list = sol_eval.problem.k_out_dcl[k_out_is_dcl_list]
-    k_out_is_dcl_dcl_delta_k_list = numpy.array([dcl_delta_k_map[i] for i in k_out_is_dcl_dcl_list], dtype=int)
-    k_out_is_xfr_list = numpy.nonzero(sol_eval.problem.k_out_is_xfr)[0]
-    k_out_is_xfr_xfr_list = sol_eval.problem.k_out_xfr[k_out_is_xfr_list]
-    k_out_is_xfr_xfr_delta_k_list = numpy.array([xfr_delta_k_map[i] for i in k_out_is_xfr_xfr_list], dtype=int)
-    br_acl_delta_k_out_idx_lists = (acl_delta_k, numpy.arange(num_acl_delta_k, dtype=int))
-    br_xfr_delta_k_out_idx_lists = (num_acl + xfr_delta_k, numpy.arange(num_xfr_delta_k, dtype=int))
-    print('contingency delta branches. acl: {}, xfr: {}, dcl: {}'.format(
-        num_acl_delta_k, num_xfr_delta_k, num_dcl_delta_k))
-
-    # collect bus-t injections from producers, consumers, and shunts:
-    # p_inj = p_pr - p_cs - p_sh
-    start_time = time.time()
-    sol_eval.bus_t_float[:] = 0.0
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_sd_inj_mat, sol_eval.sd_t_p, out=sol_eval.bus_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_sh_inj_mat, sol_eval.sh_t_p, out=sol_eval.bus_t_float)
-    # subtract the distributed slack
-    t_p_sl = numpy.sum(sol_eval.bus_t_float, axis=0)
-    numpy.subtract(
-        sol_eval.bus_t_float, (1.0 / num_bus) * numpy.reshape(t_p_sl, newshape=(1, num_t)), out=sol_eval.bus_t_float)
-    # subtract pre-contingency power absorption due to DC line flow
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_fr_inj_mat, sol_eval.dcl_t_p, out=sol_eval.bus_t_float)
-    numpy.negative(sol_eval.dcl_t_p, out=sol_eval.dcl_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_to_inj_mat, sol_eval.dcl_t_float, out=sol_eval.bus_t_float)
-    # subtract pre-contingency power absorption due to transformer phase difference
-    numpy.multiply(numpy.reshape(xfr_b, newshape=(num_xfr, 1)), sol_eval.xfr_t_phi, out=sol_eval.xfr_t_float)
-    numpy.multiply(sol_eval.xfr_t_u_on, sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_fr_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
-    numpy.negative(sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
-    utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_to_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
-    # todo - check sign on terms, especially transformer
-    end_time = time.time()
-    print('construct bus,t-indexed right hand side. time: {}'.format(end_time - start_time))
-
-    # solve for bus-t theta in the base case
-    start_time = time.time()
-    sol_eval.bus_t_float_1[:] = 0.0
-    sol_eval.bus_t_float_1[nonref_bus, :] = a_factors.solve(sol_eval.bus_t_float[nonref_bus, :])
-    end_time = time.time()
-    print('solve for base case bus,t-indexed theta. time: {}'.format(end_time - start_time))
-
-    # initialize some storage for m and w columns of SMW approach
-    start_time = time.time()
-    #br_t_u = numpy.concatenate((sol_eval.acl_t_u_on, sol_eval.xfr_t_u_on), axis=0)
-    #br_t_phi
-    acl_phi = numpy.zeros(shape=(num_acl, ), dtype=float)
-    m_acl_k = nonref_bus_acl_inc[:, acl_delta_k].toarray()
-    m_xfr_k = nonref_bus_xfr_inc[:, xfr_delta_k].toarray()
-    m_br_t = nonref_bus_br_inc[:, br_delta_t].toarray()
-    # m_acl_t = nonref_bus_acl_inc[:, acl_delta_t].toarray()
-    # m_xfr_t = nonref_bus_xfr_inc[:, xfr_delta_t].toarray()
-    #mw_k = numpy.zeros(shape=(num_bus - 1, num_br_delta_k), dtype=float)
-    w_acl_k = numpy.zeros(shape=(num_bus - 1, num_acl_delta_k), dtype=float) # t->k
-    w_xfr_k = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float) # t->k
-    w0_acl_k = numpy.zeros(shape=(num_bus - 1, num_acl_delta_k), dtype=float) # 0->k
-    w0_xfr_k = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float) # 0->k
-    w_br_t = numpy.zeros(shape=(num_bus - 1, num_br_delta_t), dtype=float) # 0->t
-    # w_acl_t = numpy.zeros(shape=(num_bus - 1, num_acl_delta_t), dtype=float) # 0->t
-    # w_xfr_t = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_t), dtype=float) # 0->t
-    end_time = time.time()
-    initialize_m_w_time = end_time - start_time
-
-    # compute static w columns,
-    # i.e. Wk and W_t for the SMW approach with respect to
-    # k on A0 and t on A0
-    # this is expensive but it is a one time cost, not recurring for each t
-    # Wt can just be all of the columns we need over any t
-    # compute Vt in the loop
-    start_time = time.time()
-    w0_acl_k[:] = a_factors.solve(m_acl_k)
-    w0_xfr_k[:] = a_factors.solve(m_xfr_k)
-    w_br_t[:] = a_factors.solve(m_br_t)
-    # w_acl_t[:] = a_factors.solve(m_acl_t)
-    # w_xfr_t[:] = a_factors.solve(m_xfr_t)
-    #w_k = a_factors_t.solve(m_k) # no in-place, creating w_k for each t (instead of w[:] = ..) is better
-    #for k in range(sol_eval.problem.num_k):
-    #    w[:, k] = bus_b_mat_factors.solve(m[:, k])
-    end_time = time.time()
-    compute_static_w_time = end_time - start_time
-
-    bus_rhs = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term of RHS
-    bus_theta = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term
-    bus_float = numpy.zeros(shape=(num_bus - 1, ), dtype=float)
-    bus_acl_delta_k_float = numpy.zeros(shape=(num_bus - 1, num_acl_delta_k), dtype=float)
-    bus_dcl_delta_k_float = numpy.zeros(shape=(num_bus - 1, num_dcl_delta_k), dtype=float)
-    bus_dcl_delta_k_float_1 = numpy.zeros(shape=(num_bus - 1, num_dcl_delta_k), dtype=float)
-    bus_xfr_delta_k_float = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float)
-    bus_xfr_delta_k_float_1 = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float)
-    bus_xfr_delta_k_float_2 = numpy.zeros(shape=(num_bus - 1, num_xfr_delta_k), dtype=float)
-
-    br_p = numpy.zeros(shape=(num_br, ), dtype=float) # main term
-    br_bool_1 = numpy.zeros(shape=(num_br, ), dtype=bool)
-    br_bool_2 = numpy.zeros(shape=(num_br, ), dtype=bool)
-    br_bool_3 = numpy.zeros(shape=(num_br, ), dtype=bool)
-    br_float = numpy.zeros(shape=(num_br, ), dtype=float)
-    br_float_1 = numpy.zeros(shape=(num_br, ), dtype=float)
-    br_acl_delta_k_float = numpy.zeros(shape=(num_br, num_acl_delta_k), dtype=float)
-    br_dcl_delta_k_float = numpy.zeros(shape=(num_br, num_dcl_delta_k), dtype=float)
-    br_xfr_delta_k_float = numpy.zeros(shape=(num_br, num_xfr_delta_k), dtype=float)
-
-    acl_delta_k_float = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
-    dcl_delta_k_float = numpy.zeros(shape=(num_dcl_delta_k, ), dtype=float)
-    xfr_delta_k_float = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
-
-    # keep track of run time of certain phases of the loop over t
-    get_time_varying_branch_characteristics_time = 0.0
-    construct_a_t_time = 0.0
-    factor_a_t_time = 0.0
-    compute_w_with_t_a_solve_time = 0.0
-    compute_v_t_time = 0.0
-    compute_w_with_t_smw_time = 0.0
-    compute_v_time = 0.0 # includes v_inv
-    compute_bus_theta_with_t_a_solve_time = 0.0
-    compute_bus_theta_with_t_smw_time = 0.0
-    compute_br_p_time = 0.0
-    apply_w_v_wt_time = 0.0
-    compute_bus_dtheta_rhs_dcl_k_time = 0.0
-    compute_w_v_wt_xfr_k_time = 0.0
-    compute_bus_dtheta_rhs_xfr_k_time = 0.0
-    compute_br_acl_delta_k_p_delta_time = 0.0
-    compute_br_dcl_delta_k_p_delta_time = 0.0
-    compute_br_xfr_delta_k_p_delta_time = 0.0
-    filter_branches_acl_k_time = 0.0
-    filter_branches_dcl_k_time = 0.0
-    filter_branches_xfr_k_time = 0.0
-    compute_br_acl_delta_k_p_time = 0.0
-    compute_br_dcl_delta_k_p_time = 0.0
-    compute_br_xfr_delta_k_p_time = 0.0
-    compute_br_acl_delta_k_s_over_time = 0.0
-    compute_br_dcl_delta_k_s_over_time = 0.0
-    compute_br_xfr_delta_k_s_over_time = 0.0
-    zero_out_time = 0.0
-    get_max_br_acl_delta_k_s_over_time = 0.0
-    get_max_br_dcl_delta_k_s_over_time = 0.0
-    get_max_br_xfr_delta_k_s_over_time = 0.0
-    compute_br_k_z_time = 0.0
-    collect_penalties_into_obj_array_time = 0.0
-
-    # largest violations
-    viol = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_acl_acl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_xfr_acl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_acl_dcl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_xfr_dcl_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_acl_xfr_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-    max_viol_xfr_xfr_delta_k = utils.make_empty_viol(val=0.0, num_indices=3)
-
-    t_computation_time = {}
-
-    for t in range(num_t):
 
-        t_start_time = time.time()
+    num_br = br_fbus.size
+    inc = scipy.sparse.csr_matrix(
+        (numpy.concatenate((numpy.ones(shape=(num_br, )), -1.0 * numpy.ones(shape=(num_br, )))),
+         (numpy.concatenate((br_fbus, br_tbus)),
+          numpy.concatenate((numpy.arange(num_br, dtype=int), numpy.arange(num_br, dtype=int))))),
+        (num_bus, num_br))
+    return inc[nonref_bus, :]
 
-        br_acl_delta_k_float[:] = 0.0
-        acl_delta_k_float[:] = 0.0
-        br_dcl_delta_k_float[:] = 0.0
-        dcl_delta_k_float[:] = 0.0
-        br_xfr_delta_k_float[:] = 0.0
-        xfr_delta_k_float[:] = 0.0
+class AdmittanceFactors(object):
+    '''
+    factors of a negative admittance matrix A on the non-reference buses,
+    with the backend used to compute them and the number of nonzeros in the factors.
+
+    backends:
+    * cholmod - Cholesky factorization A = L L^T with an AMD fill-reducing ordering, from scikit-sparse if installed
+    * superlu_sym - SuperLU in symmetric mode, i.e. diagonal pivots with a minimum degree ordering on A^T + A,
+      which on a symmetric positive definite A is an LDL^T factorization stored as LU
+    * superlu - SuperLU with partial pivoting, for any nonsingular A
+
+    with backend 'auto', a symmetric factorization is tried first if A is known to be positive definite,
+    i.e. if every in service branch has X_sr >= 0, so b_sr <= 0,
+    and LU is used otherwise.
+    if a symmetric factorization fails, e.g. A turns out not to be positive definite, LU is used instead.
+
+    fill-reducing orderings:
+    * auto - the default of the backend, i.e. AMD for cholmod, minimum degree on A^T + A for superlu_sym,
+      and COLAMD for superlu
+    * amd - AMD for cholmod, and minimum degree on A^T + A for superlu_sym and superlu, as SuperLU has no AMD
+    * colamd - COLAMD
+    * natural - no reordering
+
+    self.perm is the ordering as a symmetric permutation of the rows and columns of A.
+    given perm, e.g. the perm of the factors of the static A, the factors of A[perm, perm] are computed
+    with no reordering instead, so that only the numeric factorization is done,
+    and solve() permutes the right hand side and the solution.
+    since A_t has the sparsity pattern of the static A or a subset of it, the static ordering is a good one for A_t
+    '''
+
+    backends = ['cholmod', 'superlu_sym', 'superlu']
+    orderings = ['auto', 'amd', 'colamd', 'natural']
+
+    def __init__(self, a_mat, definite, backend='auto', ordering='auto', perm=None):
+
+        if backend == 'auto':
+            backends = ['cholmod', 'superlu_sym', 'superlu'] if definite else ['superlu']
+        elif backend in self.backends:
+            backends = self.backends[self.backends.index(backend):]
+        else:
+            raise ValueError('ctg_factor_backend must be one of {}, got: {}'.format(['auto'] + self.backends, backend))
+        if sksparse is None and 'cholmod' in backends:
+            backends.remove('cholmod')
+        if ordering not in self.orderings:
+            raise ValueError('ctg_factor_ordering must be one of {}, got: {}'.format(self.orderings, ordering))
+
+        a_mat = scipy.sparse.csc_matrix(a_mat)
+        self.permuted = (perm is not None)
+        if self.permuted:
+            a_mat = a_mat[perm, :][:, perm].tocsc()
+            ordering = 'natural'
+        self.ordering = ordering
+        self.perm = perm
+        self.backend = None
+        self.factors = None
+        self.nnz = 0
+        for b in backends:
+            try:
+                self.factor(a_mat, b)
+                break
+            except Exception as e:
+                if b == backends[-1]:
+                    raise
+                print('factorization backend {} failed, falling back. error: {}'.format(b, e))
+
+    def factor(self, a_mat, backend):
+
+        ordering = self.ordering
+        if backend == 'cholmod':
+            self.factors = sksparse.cholmod.cholesky(
+                a_mat, ordering_method=('amd' if ordering == 'auto' else ordering))
+            self.nnz = self.factors.L().nnz
+            order = self.factors.P()
+        elif backend == 'superlu_sym':
+            self.factors = scipy.sparse.linalg.splu(
+                a_mat, permc_spec={'auto': 'MMD_AT_PLUS_A', 'amd': 'MMD_AT_PLUS_A', 'colamd': 'COLAMD', 'natural': 'NATURAL'}[ordering],
+                diag_pivot_thresh=0.0, options={'SymmetricMode': True})
+            self.nnz = self.factors.L.nnz + self.factors.U.nnz
+            order = numpy.argsort(self.factors.perm_c)
+        else:
+            self.factors = scipy.sparse.linalg.splu(
+                a_mat, permc_spec={'auto': 'COLAMD', 'amd': 'MMD_AT_PLUS_A', 'colamd': 'COLAMD', 'natural': 'NATURAL'}[ordering])
+            self.nnz = self.factors.L.nnz + self.factors.U.nnz
+            order = numpy.argsort(self.factors.perm_c)
+        if not self.permuted:
+            self.perm = order
+        self.backend = backend
+
+    def solve(self, rhs):
+
+        if self.permuted:
+            rhs = rhs[self.perm]
+        if self.backend == 'cholmod':
+            x = self.factors(rhs)
+        else:
+            x = self.factors.solve(rhs)
+        if self.permuted:
+            x_perm = x
+            x = numpy.empty_like(x_perm)
+            x[self.perm] = x_perm
+        return x
+
+def get_array_hash(*arrays):
+    '''
+    hex sha256 hash of the type, shape, and contents of a sequence of arrays, e.g. for keys of the DiskCache
+    '''
+
+    h = hashlib.sha256()
+    for a in arrays:
+        a = numpy.ascontiguousarray(a)
+        h.update('{}{}'.format(a.dtype.str, a.shape).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+class SharedArrays(object):
+    '''
+    numpy arrays and scipy sparse matrices in multiprocessing.shared_memory blocks,
+    so that worker processes attach to them instead of receiving pickled copies.
+
+    the process that creates the blocks with put() owns them and calls close(unlink=True) when the workers are done.
+    desc is picklable, and SharedArrays.attach(desc) in a worker gives a SharedArrays with the same values
+    as views of the blocks, which stay open as long as it is referenced. the values are read only by convention
+    '''
+
+    def __init__(self):
+
+        self.blocks = []
+        self.desc = {}
+        self.values = {}
+
+    def put(self, name, value):
+
+        if scipy.sparse.issparse(value):
+            parts = ['data', 'row', 'col'] if value.format == 'coo' else ['data', 'indices', 'indptr']
+            self.desc[name] = ('sparse', value.format, value.shape, {i: self.put_array(getattr(value, i)) for i in parts})
+        else:
+            self.desc[name] = ('array', self.put_array(value))
+        self.values[name] = value
+
+    def put_array(self, a):
+
+        a = numpy.ascontiguousarray(a)
+        block = shared_memory.SharedMemory(create=True, size=max(1, a.nbytes))
+        numpy.ndarray(a.shape, dtype=a.dtype, buffer=block.buf)[...] = a
+        self.blocks.append(block)
+        return (block.name, a.shape, a.dtype.str)
+
+    @staticmethod
+    def attach(desc):
+
+        shared = SharedArrays()
+        shared.desc = desc
+        for name, d in desc.items():
+            if d[0] == 'sparse':
+                parts = {i: shared.attach_array(v) for i, v in d[3].items()}
+                if d[1] == 'coo':
+                    value = scipy.sparse.coo_matrix((parts['data'], (parts['row'], parts['col'])), shape=d[2])
+                else:
+                    value = getattr(scipy.sparse, d[1] + '_matrix')(
+                        (parts['data'], parts['indices'], parts['indptr']), shape=d[2])
+            else:
+                value = shared.attach_array(d[1])
+            shared.values[name] = value
+        return shared
+
+    def attach_array(self, d):
+
+        block = shared_memory.SharedMemory(name=d[0])
+        self.blocks.append(block)
+        return numpy.ndarray(d[1], dtype=numpy.dtype(d[2]), buffer=block.buf)
+
+    def close(self, unlink=False):
+
+        self.values = {}
+        for block in self.blocks:
+            block.close()
+            if unlink:
+                block.unlink()
+        self.blocks = []
+
+def get_shared_state(obj):
+    '''
+    for pickling obj, with its attributes that are in obj.shared_arrays left out, see SharedArrays
+    '''
+
+    state = obj.__dict__.copy()
+    if obj.shared_arrays is not None:
+        for i in obj.shared_arrays.desc.keys():
+            state[i] = None
+        state['shared_arrays'] = obj.shared_arrays.desc
+    return state
+
+def set_shared_state(obj, state):
+    '''
+    unpickle obj from get_shared_state(), attaching to its attributes in shared memory
+    '''
+
+    obj.__dict__.update(state)
+    if obj.shared_arrays is not None:
+        obj.shared_arrays = SharedArrays.attach(obj.shared_arrays)
+        for i, v in obj.shared_arrays.values.items():
+            setattr(obj, i, v)
+
+class Checkpoint(object):
+    '''
+    per-t results of eval_t() saved to a file as each t is evaluated,
+    so that an evaluation that is interrupted can be resumed from the t that are missing.
+
+    the file holds a pickled header with the key and the options that shape the results,
+    then one pickled result per t, appended and synced to disk one by one.
+    if the file has a different header, e.g. from another solution or other options, it is started over.
+    a record cut off by an interruption, or otherwise unreadable, is dropped when the file is read,
+    together with the records after it, and their t evaluated again.
+    the file is removed by remove() once the evaluation has all t, so only interrupted evaluations leave one
+    '''
+
+    def __init__(self, path, key, options):
+
+        self.path = path
+        self.header = {'key': key, 'options': options}
+        self.results = {} # t -> result
+        end = 0
+        try:
+            with open(path, 'rb') as f:
+                if pickle.load(f) == self.header:
+                    end = f.tell()
+                    while True:
+                        r = pickle.load(f)
+                        self.results[r['t']] = r
+                        end = f.tell()
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError, KeyError, TypeError):
+            pass
+        if end == 0:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'wb') as f:
+                pickle.dump(self.header, f)
+        else:
+            os.truncate(path, end)
+        self.file = open(path, 'ab')
+
+    def put(self, r):
+        '''
+        save the result of one t
+        '''
+
+        self.results[r['t']] = r
+        pickle.dump(r, self.file)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+
+        self.file.close()
+
+    def remove(self):
+        '''
+        remove the file, once the results of all t have been read from it
+        '''
+
+        try:
+            os.remove(self.path)
+        except OSError: # removed by another process evaluating the same solution
+            pass
+
+class DiskCache(object):
+    '''
+    persistent cache of named arrays on disk, shared by the processes using the same directory,
+    e.g. over repeated evaluation of the same problem.
+
+    each entry is a directory named by its key holding one .npy file per array,
+    and is read back memory-mapped, read only.
+    an entry is written to a temporary directory and then renamed,
+    so a reader never sees a partial entry, and concurrent writers of the same entry do not conflict.
+    entries not used in max_age_days are evicted,
+    and then the least recently used entries until the total size is at most max_mb.
+    '''
+
+    def __init__(self, cache_dir, max_mb, max_age_days):
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age_seconds = max_age_days * 24 * 3600
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()
+
+    def get(self, key):
+        '''
+        return a dict of the arrays in the entry for key, or None if there is none
+        '''
+
+        path = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(path):
+            return None
+        arrays = {}
+        try:
+            for name in os.listdir(path):
+                if name.endswith('.npy'):
+                    try:
+                        arrays[name[:-4]] = numpy.load(os.path.join(path, name), mmap_mode='r')
+                    except ValueError: # an empty array cannot be memory-mapped
+                        arrays[name[:-4]] = numpy.load(os.path.join(path, name))
+            os.utime(path) # most recently used
+        except OSError: # evicted by another process
+            return None
+        return arrays
+
+    def put(self, key, arrays):
+        '''
+        write a dict of arrays as the entry for key, if there is none
+        '''
+
+        path = os.path.join(self.cache_dir, key)
+        if os.path.isdir(path):
+            return
+        tmp_path = os.path.join(self.cache_dir, '.tmp-{}-{}'.format(key, uuid.uuid4().hex))
+        try:
+            os.makedirs(tmp_path)
+            for name, arr in arrays.items():
+                numpy.save(os.path.join(tmp_path, name + '.npy'), numpy.ascontiguousarray(arr))
+            os.rename(tmp_path, path)
+        except OSError as e: # written by another process in the meantime, or the disk is full
+            print('disk cache entry not written. key: {}, error: {}'.format(key, e))
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        '''
+        remove the entries not used in max_age_days, then the least recently used ones over max_mb
+        '''
+
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if name.startswith('.tmp-'):
+                    # left by a process that did not finish writing
+                    if now - mtime > self.max_age_seconds:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                size = sum(os.path.getsize(os.path.join(path, i)) for i in os.listdir(path))
+            except OSError: # removed by another process
+                continue
+            entries.append((mtime, size, path))
+        entries.sort()
+        total_size = sum(i[1] for i in entries)
+        for mtime, size, path in entries:
+            if now - mtime > self.max_age_seconds or total_size > self.max_bytes:
+                shutil.rmtree(path, ignore_errors=True)
+                total_size -= size
+
+def get_topology_key(t_use_smw, br_u):
+    '''
+    key of the topology cache for a given t,
+    i.e. the set of branches out of service in t.
+    the cache dict hashes the key and compares it in full on lookup,
+    so a hash collision cannot return the factors of a different topology
+    '''
+
+    return (t_use_smw, numpy.flatnonzero(br_u == 0).tobytes())
+
+def get_k_sel(num_rows, k_rows):
+    '''
+    num_rows by len(k_rows) sparse 0-1 matrix, with column j having ones in rows k_rows[j],
+    e.g. the branches outaged by each contingency
+    '''
+
+    rows = numpy.array([i for r in k_rows for i in r], dtype=int)
+    cols = numpy.array([j for j in range(len(k_rows)) for i in k_rows[j]], dtype=int)
+    return scipy.sparse.csr_matrix(
+        (numpy.ones(shape=(rows.size, ), dtype=float), (rows, cols)), shape=(num_rows, len(k_rows)))
+
+class TopViolations(object):
+    '''
+    the num largest violations in each category of worst violations, see ContingencyEvaluator.viol_keys,
+    for diagnostics beyond the single worst violation.
+
+    self.viol[key] = (val, row, col, t) holds them as arrays of values and row, column, and t indices,
+    as in the worst violations, in decreasing order of value, ties broken by lowest t, row, then column.
+    violations are added from each chunk and t as they are evaluated, with the candidates in each
+    reduced to the num largest by numpy.argpartition, and merged over t and shards by update(),
+    so the result does not depend on the order of merging.
+    only positive violations are kept, and uids are looked up only when reported, see ContingencyEvaluator.get_top_viol()
+    '''
+
+    def __init__(self, num, t=None):
+
+        self.num = num
+        self.t = t # t of the violations added by add_arr()
+        self.viol = {}
+
+    def add_arr(self, key, arr, rows, cols):
+        '''
+        add the positive entries of arr, with row indices rows and column indices cols, in self.t
+        '''
+
+        row, col = numpy.nonzero(arr > 0.0)
+        self.add(key, arr[row, col], rows[row], cols[col], numpy.full(row.size, self.t, dtype=int))
+
+    def add(self, key, val, row, col, t):
+
+        if val.size == 0:
+            return
+        old = self.viol.get(key)
+        if old is not None:
+            val, row, col, t = [numpy.concatenate((old[i], j)) for i, j in enumerate([val, row, col, t])]
+        if val.size > self.num:
+            # every entry tied with the num-th largest is a candidate, so ties are broken the same in any order
+            min_val = numpy.amin(val[numpy.argpartition(val, val.size - self.num)[(val.size - self.num):]])
+            keep = numpy.flatnonzero(val >= min_val)
+            val, row, col, t = val[keep], row[keep], col[keep], t[keep]
+        keep = numpy.lexsort((col, row, t, -val))[0:self.num]
+        self.viol[key] = (val[keep], row[keep], col[keep], t[keep])
+
+    def update(self, other):
+
+        for key, v in other.viol.items():
+            self.add(key, *v)
+
+def get_block(buf, num_rows, num_cols):
+    '''
+    view of the first num_rows * num_cols entries of a flat working array as a num_rows by num_cols array
+    '''
+
+    return numpy.reshape(buf[0:(num_rows * num_cols)], newshape=(num_rows, num_cols))
+
+def merge_viol(viol_idx, key, val, row, col):
+    '''
+    merge a violation val at (row, col) into viol_idx[key] = (val, row, col).
+    ties are broken by lowest row, then lowest column, as numpy.argmax does on the whole array,
+    so the result does not depend on the order of merging
+    '''
 
-        # not needed
-        # skip certain computations if there was no change from the previous t, i.e. ac br u_su/sd == 0
-        # probably not much value in this though
+    old = viol_idx.get(key)
+    if old is None or val > old[0] or (val == old[0] and (row, col) < (old[1], old[2])):
+        viol_idx[key] = (val, row, col)
+
+def merge_viol_idx(viol_idx, key, arr, cols, top=None):
+    '''
+    merge the worst violation in arr, a chunk of columns with (sorted) column indices cols,
+    into viol_idx[key] = (val, row, col),
+    and the violations in arr into top, if not None, see TopViolations
+    '''
+
+    if arr.size == 0:
+        return
+    row, col = numpy.unravel_index(numpy.argmax(arr), arr.shape)
+    merge_viol(viol_idx, key, arr[row, col], row, cols[col])
+    if top is not None:
+        top.add_arr(key, arr, numpy.arange(arr.shape[0]), cols)
+
+def merge_viol_idx_rows(viol_idx, key, arr_rows, rows, num_rows, cols, top=None):
+    '''
+    merge the worst violation in a chunk of columns with (sorted) column indices cols and its first num_rows rows,
+    given only on the (sorted) rows of arr_rows, with 0 on every other row,
+    into viol_idx[key] = (val, row, col), with the same result as merge_viol_idx on the full array,
+    and likewise the violations into top, if not None
+    '''
+
+    num_cols = arr_rows.shape[1]
+    if num_rows == 0 or num_cols == 0:
+        return
+    num_rows_in = numpy.searchsorted(rows, num_rows)
+    if top is not None:
+        top.add_arr(key, arr_rows[0:num_rows_in, :], rows, cols)
+    if num_rows_in > 0:
+        row, col = numpy.unravel_index(numpy.argmax(arr_rows[0:num_rows_in, :]), (num_rows_in, num_cols))
+        val = arr_rows[row, col]
+        if val > 0.0:
+            merge_viol(viol_idx, key, val, rows[row], cols[col])
+            return
+    # no violation - the full array is 0, with the first max at (0, 0)
+    merge_viol(viol_idx, key, numpy.float64(0.0), 0, cols[0])
+
+def dot_out(a, b, out):
+    '''
+    numpy.dot(a, b, out=out), with a and b cast to the type of out if needed,
+    e.g. to compute a float64 product in float32
+    '''
+
+    if a.dtype != out.dtype:
+        a = a.astype(out.dtype)
+    if b.dtype != out.dtype:
+        b = b.astype(out.dtype)
+    numpy.dot(a, b, out=out)
+
+def sum_rows(arr, out):
+    '''
+    column sums of a 2-d array, adding the rows in order.
+    numpy.sum does this if there is more than one column,
+    but with a single column it uses pairwise summation,
+    and then the result would depend on the rows of zeros,
+    e.g. it would differ between the exhaustive and screened computations.
+    the same holds for an array that is not C-contiguous, so it is copied first
+    '''
+
+    if not arr.flags['C_CONTIGUOUS']:
+        arr = numpy.ascontiguousarray(arr)
+    if arr.shape[1] == 1 and arr.shape[0] > 0:
+        out[0] = numpy.cumsum(arr[:, 0])[-1]
+    else:
+        numpy.sum(arr, axis=0, out=out)
+
+def get_recheck_cols(br_k_p_delta, br_p, br_q, br_s_max, br_k_out_idx_lists, tol):
+    '''
+    columns of br_k_p_delta, computed in reduced precision, i.e. contingencies,
+    where some branch has s * (1 + tol) + tol * |p| >= s_max, with s the post-contingency apparent power flow.
+    the computation is in place, in the type of br_k_p_delta.
+
+    br_k_p_delta - post-contingency change in branch real power flow, branch by contingency
+    br_k_out_idx_lists - (branch, contingency) indices of the branch outaged by each contingency, or None
+    '''
+
+    num_br, num_cols = br_k_p_delta.shape
+    if num_cols == 0:
+        return numpy.zeros(shape=(0, ), dtype=int)
+    k_dtype = br_k_p_delta.dtype
+    numpy.add(numpy.reshape(br_p.astype(k_dtype), newshape=(num_br, 1)), br_k_p_delta, out=br_k_p_delta)
+    numpy.power(br_k_p_delta, 2, out=br_k_p_delta)
+    numpy.add(
+        br_k_p_delta, numpy.reshape(numpy.power(br_q, 2).astype(k_dtype), newshape=(num_br, 1)), out=br_k_p_delta)
+    numpy.power(br_k_p_delta, 0.5, out=br_k_p_delta)
+    numpy.multiply(1.0 + tol, br_k_p_delta, out=br_k_p_delta)
+    numpy.add(
+        br_k_p_delta, numpy.reshape((tol * numpy.absolute(br_p) - br_s_max).astype(k_dtype), newshape=(num_br, 1)),
+        out=br_k_p_delta)
+    if br_k_out_idx_lists is not None:
+        br_k_p_delta[br_k_out_idx_lists] = -1.0
+    return numpy.flatnonzero(numpy.amax(br_k_p_delta, axis=0) >= 0.0)
+
+def get_br_k_s_over_rows(br_k_p_delta, rows, br_p, br_q, br_s_max, br_k_out_idx_lists, buf=None, rows_buf=None):
+    '''
+    post-contingency AC branch apparent power flow limit violations on a subset of branches.
+
+    br_k_p_delta - post-contingency change in branch real power flow, branch by contingency
+    rows - sorted branch indices
+    br_k_out_idx_lists - (branch, contingency) indices of the branch outaged by each contingency, or None
+    buf - flat working array for the result, with at least rows.size * number of contingencies entries, or None
+    rows_buf - flat float working array with at least rows.size entries, or None
+
+    the rows are gathered into the compact result array and the computation is done there in place,
+    so with the working arrays nothing of the size of br_k_p_delta is allocated or traversed.
+    the rows are valid indices, so the gathers use mode='clip', which writes to the output directly
+
+    returns max(0, sqrt((p + p_delta)^2 + q^2) - s_max) on rows, rows.size by number of contingencies,
+    with 0 where the branch is outaged by the contingency
+    '''
+
+    num_rows = rows.size
+    num_cols = br_k_p_delta.shape[1]
+    if buf is None:
+        s_over = numpy.empty(shape=(num_rows, num_cols), dtype=br_k_p_delta.dtype)
+    else:
+        s_over = get_block(buf, num_rows, num_cols)
+    if rows_buf is None:
+        rows_float = numpy.empty(shape=(num_rows, ), dtype=float)
+    else:
+        rows_float = rows_buf[0:num_rows]
+    rows_col = numpy.reshape(rows_float, newshape=(num_rows, 1))
+    numpy.take(br_k_p_delta, rows, axis=0, out=s_over, mode='clip')
+    numpy.take(br_p, rows, out=rows_float, mode='clip')
+    numpy.add(rows_col, s_over, out=s_over)
+    numpy.power(s_over, 2, out=s_over)
+    numpy.take(br_q, rows, out=rows_float, mode='clip')
+    numpy.power(rows_float, 2, out=rows_float)
+    numpy.add(s_over, rows_col, out=s_over)
+    numpy.power(s_over, 0.5, out=s_over)
+    numpy.take(br_s_max, rows, out=rows_float, mode='clip')
+    numpy.subtract(s_over, rows_col, out=s_over)
+    numpy.maximum(0.0, s_over, out=s_over)
+    if br_k_out_idx_lists is not None and num_rows > 0:
+        br_out, k_out = br_k_out_idx_lists
+        row_out = numpy.minimum(numpy.searchsorted(rows, br_out), num_rows - 1)
+        is_row = (rows[row_out] == br_out)
+        s_over[row_out[is_row], k_out[is_row]] = 0.0
+    return s_over
+
+def get_work_buf(work, key, size):
+    '''
+    flat working array work[key] with at least size entries.
+    it is replaced by a larger one of the same type when needed, at least doubling,
+    so it grows to the largest size needed so far and is reallocated only a few times
+    '''
+
+    buf = work[key]
+    if buf.size < size:
+        buf = numpy.zeros(shape=(max(size, 2 * buf.size), ), dtype=buf.dtype)
+        work[key] = buf
+    return buf
+
+class ContingencyProfile(object):
+    '''
+    performance profile of the post-contingency evaluation of one solution, see ContingencyEvaluator.eval().
+    to_dict() gives it as a json serializable dict, for the solution evaluation summary:
+    * phase_time - run time of each phase of the loop over t, see ContingencyEvaluator.make_phase_time(), total over t
+    * t - per-t breakdown, in order of t, see ContingencyEvaluator.eval_t()
+    * filter - for each outaged branch type, the number of (AC branch, t, chunk) with a possible violation
+      under some contingency, of the number checked, and the ratio, i.e. the hit rate of the branch filter
+    * memory_rss_peak_bytes - peak of utils.get_memory_info() rss, sampled before and after the loop over t and after each t.
+      with process workers the samples after each t are from the worker processes
+    * other counts and run times
+    '''
+
+    def __init__(self, ctg_evaluator):
+
+        self.phase_time = ctg_evaluator.make_phase_time()
+        self.t = []
+        self.filter = {i: {'num_possible_viol': 0, 'num_checked': 0} for i in ['acl', 'dcl', 'xfr']}
+        self.memory_rss_peak_bytes = 0
+        self.info = {
+            'precision': ctg_evaluator.precision,
+            'num_workers': ctg_evaluator.num_workers,
+            'worker_type': ctg_evaluator.worker_type,
+            'num_chunks': len(ctg_evaluator.chunks),
+            'screening': ctg_evaluator.br_filter_by_worst_ctg,
+            'time_batch': ctg_evaluator.time_batch,
+            'num_runs': None,
+            't_update': ctg_evaluator.t_update,
+            'num_t_smw': 0,
+            'prune': ctg_evaluator.prune,
+            'num_pruned_k': 0,
+            'num_pruned_t': 0,
+            'static_factor_backend': None,
+            'static_factor_nnz': None,
+            'static_reused': None,
+            'compute_static_w_time': None,
+            'initialize_m_w_time': None,
+            'topology_cache_hits': 0,
+            'topology_cache_misses': 0,
+            'disk_cache_hits': 0,
+            'disk_cache_misses': 0,
+            'num_float32_recheck': 0,
+            'num_lodf_recheck': 0}
+        self.add_memory_info()
+
+    def add_memory_info(self, rss=None):
+
+        if rss is None:
+            rss = utils.get_memory_info()['rss bytes']
+        self.memory_rss_peak_bytes = max(self.memory_rss_peak_bytes, rss)
+
+    def add_t(self, r):
+        '''
+        add the result r of ContingencyEvaluator.eval_t()
+        '''
+
+        for i in self.phase_time.keys():
+            self.phase_time[i] += r['phase_time'][i]
+        for i in self.filter.keys():
+            self.filter[i]['num_possible_viol'] += r['filter_counts'][i][0]
+            self.filter[i]['num_checked'] += r['filter_counts'][i][1]
+        if r['topology_cache_hit'] is True:
+            self.info['topology_cache_hits'] += 1
+        elif r['topology_cache_hit'] is False:
+            self.info['topology_cache_misses'] += 1
+        if r['disk_cache_hit'] is True:
+            self.info['disk_cache_hits'] += 1
+        elif r['disk_cache_hit'] is False:
+            self.info['disk_cache_misses'] += 1
+        self.info['num_float32_recheck'] += r['num_float32_recheck']
+        self.info['num_lodf_recheck'] += r['num_lodf_recheck']
+        if r['t_use_smw']:
+            self.info['num_t_smw'] += 1
+        self.info['num_pruned_k'] += r['prune_counts'][0]
+        if r['prune_counts'][1] > 0 and r['prune_counts'][0] == r['prune_counts'][1]:
+            self.info['num_pruned_t'] += 1
+        self.add_memory_info(r['memory_rss_bytes'])
+        self.t.append({
+            't': r['t'],
+            'computation_time': r['computation_time'],
+            'phase_time': r['phase_time'],
+            'topology_cache_hit': r['topology_cache_hit'],
+            'disk_cache_hit': r['disk_cache_hit'],
+            'factor_backend': r['factor_backend'],
+            'factor_nnz': r['factor_nnz'],
+            't_use_smw': r['t_use_smw'],
+            'num_float32_recheck': r['num_float32_recheck'],
+            'num_lodf_recheck': r['num_lodf_recheck'],
+            'prune_counts': list(r['prune_counts']),
+            'filter_counts': {i: list(r['filter_counts'][i]) for i in self.filter.keys()},
+            'memory_rss_bytes': r['memory_rss_bytes']})
+
+    def to_dict(self):
+
+        filter_rates = {}
+        for i, v in self.filter.items():
+            filter_rates[i] = dict(v)
+            filter_rates[i]['hit_rate'] = (
+                v['num_possible_viol'] / v['num_checked'] if v['num_checked'] > 0 else None)
+        return {
+            'phase_time': dict(self.phase_time),
+            'total_phase_time': sum(self.phase_time.values()),
+            'filter': filter_rates,
+            'memory_rss_peak_bytes': self.memory_rss_peak_bytes,
+            'info': dict(self.info),
+            't': self.t}
+
+class ContingencyEvaluator(object):
+    '''
+    Post-contingency model evaluation, split into a problem-level setup phase
+    and a per-solution phase, so that repeated evaluation of many solutions
+    against one problem, as in a solver callback or a batch of candidate solutions,
+    does not repeat the work that depends only on the problem.
+
+    problem-level, computed once in the constructor:
+    * problem dimensions, reference bus
+    * branch incidence matrices on the non-reference buses
+    * branch susceptances and post-contingency flow limits
+    * branches outaged by contingencies
+    * multi-element contingencies, i.e. outaging more than one device, see eval_t_multi()
+
+    static topology level, computed on the first solution and cached
+    for every later solution with the same set of branches in service in at least one t:
+    * static negative admittance matrix A and its factorization
+    * W0 = A^-1 M for the contingency branches
+    * W = A^-1 M columns for branches switched in some t (SMW-t), computed as needed
+
+    topology level, computed on the first t with a given set of branches out of service
+    and cached for every later t, in this solution or a later one, with the same set:
+    * A_t factors, or the SMW-t factors of V_t
+    * W_tk = A_t^-1 M for the contingency branches, or L_tk = M^T W_tk with ctg_w_endpoint_rows, and the inverses of V_tk
+
+    the arrays indexed by contingency, e.g. W_tk and the post-contingency flows, are num_bus or num_br by num_k.
+    if these do not fit in ctg_memory_budget_mb, the contingencies are processed in chunks of columns,
+    and W0 and W_tk are not kept, but computed for each chunk as needed.
+
+    with ctg_cache_dir set, the static W0 and the topology level W_tk and V_tk inverses are also kept
+    in a DiskCache there, keyed by a hash of the network arrays, so that later processes evaluating
+    the same problem can read them instead of computing them.
+    the factors of A and A_t are not kept on disk, as they cannot be saved, but are computed as needed.
+
+    with ctg_checkpoint_dir set, the per-t results are saved there as each t is evaluated, see Checkpoint,
+    in a file keyed by a hash of the problem and solution arrays they depend on, see get_checkpoint_key(),
+    and a later evaluation of the same problem and solution, with the same options, see get_checkpoint_options(),
+    evaluates only the t that are missing there.
+    the file is removed when the evaluation finishes, so the directory holds only the checkpoints of interrupted evaluations.
+
+    with ctg_precision = 'float32', W_tk and the post-contingency flow deltas are computed in float32,
+    and the contingencies where some branch flow is within ctg_float32_recheck_tol of its limit
+    are evaluated again in float64, see eval_t_chunk_float32().
+    the penalties and worst violations are from the float64 evaluation.
+
+    usage:
+
+        ctg_eval = ContingencyEvaluator(problem, config)
+        for sol_eval in solution_evaluators:
+            ctg_eval.eval(sol_eval)
+
+    or pass ctg_eval to SolutionEvaluator(problem, solution, config, ctg_evaluator=ctg_eval)
+    '''
+
+    @utils.timeit
+    def __init__(self, problem, config={}):
+
+        self.problem = problem
+        self.config = config
+
+        # algorithm control parameters
+        self.br_filter_by_worst_ctg = config.get('ctg_screening', False) # exact screening of branches by upper bounds on flows
+        # update of A_t and W_tk from the static factors in each t:
+        # 'factor' forms and factors A_t, 'smw' applies SMW with respect to t to the branches switched out in t,
+        # and 'auto' chooses one of these in each t from a cost model calibrated on the recorded run times,
+        # updated in the serial loop over t as each t is evaluated, see get_t_use_smw()
+        self.t_update = config.get('ctg_t_update', 'factor')
+        if self.t_update not in ['factor', 'smw', 'auto']:
+            raise ValueError('ctg_t_update must be "factor", "smw", or "auto", got: {}'.format(self.t_update))
+        self.t_use_smw = (self.t_update == 'smw')
+        self.t_update_cost = {'factor': [0.0, 0], 'smw': [0.0, 0]} # see add_t_update_cost()
+        self.t_skip_update_if_no_br_change = False # set below from ctg_topology_cache_size
+        self.check_power_balance = True # not implemented yet # note this needs the exhaustive computation, as screening computes flows only on some branches
+
+        # concurrent evaluation of t, or with 'shard' of shards of the contingencies, see eval_t_all()
+        self.num_workers = config.get('ctg_num_workers', 1)
+        self.worker_type = config.get('ctg_worker_type', 'thread')
+        self.shard = None # index into self.shards of the shard evaluated in a shard worker process
+        self.shared_arrays = None # see SharedArrays
+
+        # LRU cache of topology dependent factors, keyed by the set of branches out of service in t.
+        # each entry holds W_tk for all contingency branches, i.e. num_bus * num_k floats,
+        # so the size should be kept small on large problems.
+        # 0 disables the cache
+        self.topology_cache_size = config.get('ctg_topology_cache_size', 1)
+        self.t_skip_update_if_no_br_change = (self.topology_cache_size > 0)
+
+        # factorization backend for A and A_t, and fill-reducing ordering, see AdmittanceFactors.
+        # the default 'auto' changes the last digits of the penalties from earlier versions, which used 'superlu'
+        self.factor_backend = config.get('ctg_factor_backend', 'auto')
+        self.factor_ordering = config.get('ctg_factor_ordering', 'auto')
+        # factor A_t in the ordering of the static A, instead of computing an ordering for each A_t
+        self.factor_reuse_ordering = config.get('ctg_factor_reuse_ordering', False)
+        self.topology_cache = collections.OrderedDict()
+        self.topology_cache_lock = threading.Lock()
+
+        # memory budget for the working arrays indexed by contingency, over all workers.
+        # if these do not fit, the contingencies are processed in chunks, see set_chunks.
+        # 0 means no limit
+        self.memory_budget_mb = config.get('ctg_memory_budget_mb', 0)
+
+        # store only the branch endpoint differences of W, i.e. L = M^T W, num_br by num_k, like LODFs,
+        # instead of W, num_bus by num_k.
+        # every use of W in the contingency deltas is through M^T W, or through M^T W at the outaged branch
+        self.w_endpoint_rows = config.get('ctg_w_endpoint_rows', False)
+
+        # precision of W_tk and the post-contingency flow deltas, 'float64' or 'float32'.
+        # with float32, a contingency is evaluated again in float64 if under it some branch has
+        # s * (1 + tol) + tol * |p| >= s_max in float32, where s is the post-contingency apparent power flow,
+        # p is the base case real power flow, and tol is ctg_float32_recheck_tol,
+        # i.e. if an error of tol relative to the flows could put the branch over its limit
+        self.precision = config.get('ctg_precision', 'float64')
+        if self.precision not in ['float64', 'float32']:
+            raise ValueError('ctg_precision must be "float64" or "float32", got: {}'.format(self.precision))
+        self.k_dtype = numpy.dtype(self.precision)
+        self.float32_recheck_tol = config.get('ctg_float32_recheck_tol', 1e-4)
+
+        # evaluate each run of consecutive t with the same AC branches in service together.
+        # the factors, the base case solves, and the contingency flow coefficients are computed once for the run,
+        # and the flow deltas in each t are then a single product, see eval_t_chunk_run().
+        # applies only with a single chunk and ctg_precision = 'float64', otherwise t are evaluated one by one
+        self.time_batch = config.get('ctg_time_batch', False)
+
+        # skip the contingencies that provably have no violation in t before computing their flows.
+        # a bound on the largest flow change under each outage, like the max LODF over the AC branches, is kept with W_tk,
+        # and with the smallest margin s_max - |p| over the AC branches in t it shows that no branch can go over its limit,
+        # see get_prune_cols(). the penalties and worst violations are unchanged.
+        # applies with ctg_precision = 'float64', and not in the runs of ctg_time_batch
+        self.prune = config.get('ctg_prune', False)
+
+        # keep W_tk in the topology cache in sparse form, dropping the LODF entries below this tolerance, see sparsify_w().
+        # the contingencies that might have a violation given the dropped entries are evaluated again
+        # from exact dense columns, see eval_t_chunk_sparse(), so the penalties and worst violations are unchanged.
+        # applies with ctg_w_endpoint_rows and ctg_precision = 'float64', and not with ctg_time_batch. 0 disables it
+        self.lodf_drop_tol = config.get('ctg_lodf_drop_tol', 0.0)
+
+        # persistent cache of W0 and W_tk on disk, see DiskCache. None disables it
+        self.disk_cache = None
+        if config.get('ctg_cache_dir') is not None:
+            self.disk_cache = DiskCache(
+                config['ctg_cache_dir'], config.get('ctg_cache_max_mb', 1024), config.get('ctg_cache_max_age_days', 7))
+
+        # directory of the checkpoint files of the per-t results, see Checkpoint. None disables checkpoints
+        self.checkpoint_dir = config.get('ctg_checkpoint_dir')
+
+        # print the per-t diagnostics, i.e. the branches switched out in each t, and the time and memory of each t.
+        # these are one line per t, so they are off by default, e.g. for an evaluator called repeatedly
+        self.verbose = config.get('ctg_verbose', False)
+
+        # number of largest violations over all t to report in each category of worst violations, see TopViolations.
+        # 0 reports only the worst violation
+        self.top_k = config.get('ctg_top_k', 0)
+
+        # categories of worst violations, (monitored branch type)_(outaged branch type)_delta_k
+        self.viol_keys = [
+            'acl_acl_delta_k',
+            'xfr_acl_delta_k',
+            'acl_dcl_delta_k',
+            'xfr_dcl_delta_k',
+            'acl_xfr_delta_k',
+            'xfr_xfr_delta_k']
+        # (monitored branch type)_multi_k, under multi-element contingencies
+        self.multi_viol_keys = [
+            'acl_multi_k',
+            'xfr_multi_k']
+
+        self.set_dimensions()
+        self.set_branches()
+        self.set_delta_k()
+        self.set_multi_k()
+        self.set_chunks()
+        self.set_network_hash()
+
+        # static topology - set on the first solution evaluated
+        self.static_br_u = None
+        self.num_static_setups = 0
+        self.num_static_reuses = 0
+
+    def __getstate__(self):
+        '''
+        for worker processes - the problem is not needed there,
+        and the SuperLU factors cannot be pickled.
+        with shard workers the large arrays are in shared memory, see eval_t_all_shards()
+        '''
+
+        state = get_shared_state(self)
+        state['problem'] = None
+        state['a_factors'] = None
+        state['topology_cache'] = None
+        state['topology_cache_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+
+        set_shared_state(self, state)
+        self.topology_cache = collections.OrderedDict()
+        self.topology_cache_lock = threading.Lock()
+        if self.static_br_u is not None:
+            self.factor_static(self.static_br_u)
+
+    def set_dimensions(self):
+
+        # problem dimensions
+        self.num_bus = self.problem.num_bus
+        self.num_acl = self.problem.num_acl
+        self.num_xfr = self.problem.num_xfr
+        self.num_dcl = self.problem.num_dcl
+        self.num_br = self.num_acl + self.num_xfr
+        self.num_k = self.problem.num_k
+        self.num_t = self.problem.num_t
+        print('problem dimensions. bus: {}, acl: {}, xfr: {}, dcl: {}, k: {}, t: {}'.format(
+            self.num_bus, self.num_acl, self.num_xfr, self.num_dcl, self.num_k, self.num_t))
+
+        # choose a reference bus
+        self.ref_bus = 0
+        self.nonref_bus = numpy.array(
+            list(range(self.ref_bus)) + list(range(self.ref_bus + 1, self.num_bus)), dtype=int)
+
+    def set_branches(self):
+
+        # branch matrices
+        self.nonref_bus_acl_inc = get_nonref_bus_br_inc(
+            self.num_bus, self.problem.acl_fbus, self.problem.acl_tbus, self.nonref_bus)
+        self.nonref_bus_dcl_inc = get_nonref_bus_br_inc(
+            self.num_bus, self.problem.dcl_fbus, self.problem.dcl_tbus, self.nonref_bus)
+        self.nonref_bus_xfr_inc = get_nonref_bus_br_inc(
+            self.num_bus, self.problem.xfr_fbus, self.problem.xfr_tbus, self.nonref_bus)
+        self.nonref_bus_br_inc = scipy.sparse.hstack((self.nonref_bus_acl_inc, self.nonref_bus_xfr_inc))
+        self.acl_b = numpy.array(self.problem.acl_b_sr, dtype=float)
+        self.xfr_b = numpy.array(self.problem.xfr_b_sr, dtype=float)
+        self.br_b = numpy.concatenate((self.acl_b, self.xfr_b))
+        self.br_b_nonneg = (self.br_b > 0.0) # X_sr < 0
+        self.acl_s_max = numpy.array(self.problem.acl_s_max_ctg, dtype=float)
+        self.xfr_s_max = numpy.array(self.problem.xfr_s_max_ctg, dtype=float)
+        self.br_s_max = numpy.concatenate((self.acl_s_max, self.xfr_s_max))
+        self.acl_uid = self.problem.acl_uid
+        self.dcl_uid = self.problem.dcl_uid
+        self.xfr_uid = self.problem.xfr_uid
+        self.t_d = self.problem.t_d
+        self.c_s = self.problem.c_s
+
+    def set_delta_k(self):
+
+        num_acl = self.num_acl
+        num_k = self.num_k
+        problem = self.problem
+
+        # single-element contingencies, i.e. rank-1 changes - multi-element contingencies are in set_multi_k()
+        k_single = (problem.k_num_out == 1)
+
+        # get AC branches going out of service in at least one contingency
+        self.acl_delta_k = numpy.array(sorted(list(set([
+            problem.k_out_acl[k] for k in range(num_k) if problem.k_out_is_acl[k] and k_single[k]]))), dtype=int)
+        self.xfr_delta_k = numpy.array(sorted(list(set([
+            problem.k_out_xfr[k] for k in range(num_k) if problem.k_out_is_xfr[k] and k_single[k]]))), dtype=int)
+        self.dcl_delta_k = numpy.array(sorted(list(set([
+            problem.k_out_dcl[k] for k in range(num_k) if problem.k_out_is_dcl[k] and k_single[k]]))), dtype=int)
+        self.br_delta_k = numpy.concatenate((self.acl_delta_k, num_acl + self.xfr_delta_k))
+        self.num_br_delta_k = self.br_delta_k.size
+        self.num_acl_delta_k = self.acl_delta_k.size
+        self.num_xfr_delta_k = self.xfr_delta_k.size
+        self.num_dcl_delta_k = self.dcl_delta_k.size
+        acl_delta_k_map = {self.acl_delta_k[i]:i for i in range(self.num_acl_delta_k)}
+        dcl_delta_k_map = {self.dcl_delta_k[i]:i for i in range(self.num_dcl_delta_k)}
+        xfr_delta_k_map = {self.xfr_delta_k[i]:i for i in range(self.num_xfr_delta_k)}
+        self.k_out_is_acl_list = numpy.nonzero(problem.k_out_is_acl * k_single)[0]
+        k_out_is_acl_acl_list = problem.k_out_acl[self.k_out_is_acl_list]
+        self.k_out_is_acl_acl_delta_k_list = numpy.array([acl_delta_k_map[i] for i in k_out_is_acl_acl_list], dtype=int)
+        self.k_out_is_dcl_list = numpy.nonzero(problem.k_out_is_dcl * k_single)[0]
+        k_out_is_dcl_dcl_list = problem.k_out_dcl[self.k_out_is_dcl_list]
+        self.k_out_is_dcl_dcl_delta_k_list = numpy.array([dcl_delta_k_map[i] for i in k_out_is_dcl_dcl_list], dtype=int)
+        self.k_out_is_xfr_list = numpy.nonzero(problem.k_out_is_xfr * k_single)[0]
+        k_out_is_xfr_xfr_list = problem.k_out_xfr[self.k_out_is_xfr_list]
+        self.k_out_is_xfr_xfr_delta_k_list = numpy.array([xfr_delta_k_map[i] for i in k_out_is_xfr_xfr_list], dtype=int)
+        self.br_acl_delta_k_out_idx_lists = (self.acl_delta_k, numpy.arange(self.num_acl_delta_k, dtype=int))
+        self.br_xfr_delta_k_out_idx_lists = (num_acl + self.xfr_delta_k, numpy.arange(self.num_xfr_delta_k, dtype=int))
+        print('contingency delta branches. acl: {}, xfr: {}, dcl: {}'.format(
+            self.num_acl_delta_k, self.num_xfr_delta_k, self.num_dcl_delta_k))
+
+        # uids of the monitored branches (rows) and outaged branches (columns) for each category of worst violations
+        # note the xfr rows are the first num_xfr rows of the branch arrays
+        uid = {'acl': self.acl_uid, 'dcl': self.dcl_uid, 'xfr': self.xfr_uid}
+        delta_k = {'acl': self.acl_delta_k, 'dcl': self.dcl_delta_k, 'xfr': self.xfr_delta_k}
+        self.viol_row_uid = {i: uid[i.split('_')[0]] for i in self.viol_keys}
+        self.viol_col_uid = {i: uid[i.split('_')[1]][delta_k[i.split('_')[1]]] for i in self.viol_keys}
+
+        # m columns for the SMW approach with respect to k - these depend only on the problem
+        self.m_acl_k = self.nonref_bus_acl_inc[:, self.acl_delta_k].toarray()
+        self.m_xfr_k = self.nonref_bus_xfr_inc[:, self.xfr_delta_k].toarray()
+
+    def set_multi_k(self):
+        '''
+        multi-element contingencies, i.e. contingencies outaging more than one device, see eval_t_multi().
+        * k_multi - the multi-element contingencies
+        * multi_br - AC branches outaged by at least one of them, and m_multi their columns of M
+        * k_multi_br - for each multi-element contingency, indices into multi_br of the AC branches it outages
+        * multi_xfr_sel, multi_dcl_sel - transformer and DC line by multi-element contingency outage indicators
+        '''
+
+        num_acl = self.num_acl
+        problem = self.problem
+
+        self.k_multi = numpy.nonzero(problem.k_num_out > 1)[0]
+        self.num_k_multi = self.k_multi.size
+        k_multi_br = [
+            numpy.concatenate((problem.k_out_acl_list[k], num_acl + problem.k_out_xfr_list[k])) for k in self.k_multi]
+        self.multi_br = numpy.array(sorted(list(set([j for i in k_multi_br for j in i]))), dtype=int)
+        self.num_multi_br = self.multi_br.size
+        self.k_multi_br = [numpy.searchsorted(self.multi_br, i) for i in k_multi_br]
+        self.m_multi = self.nonref_bus_br_inc.tocsc()[:, self.multi_br].toarray()
+        br_multi_sel = get_k_sel(self.num_br, k_multi_br)
+        self.br_multi_out_idx_lists = br_multi_sel.nonzero() # (branch, contingency) indices of the outaged branches
+        self.multi_xfr_sel = get_k_sel(self.num_xfr, [problem.k_out_xfr_list[k] for k in self.k_multi])
+        self.multi_dcl_sel = get_k_sel(self.num_dcl, [problem.k_out_dcl_list[k] for k in self.k_multi])
+
+        # uids of the monitored branches (rows) and contingencies (columns) for the worst violations
+        for i in self.multi_viol_keys:
+            self.viol_row_uid[i] = {'acl': self.acl_uid, 'xfr': self.xfr_uid}[i.split('_')[0]]
+            self.viol_col_uid[i] = problem.k_uid[self.k_multi]
+        print('multi-element contingencies: {}, outaged AC branches: {}'.format(self.num_k_multi, self.num_multi_br))
+
+    def set_network_hash(self):
+        '''
+        hash of the network arrays that W0 and W_tk depend on,
+        i.e. the branch incidence, the branch susceptances, and the contingency branches,
+        and of the settings that determine what is stored, for the keys of the disk cache
+        '''
+
+        problem = self.problem
+        self.network_hash = get_array_hash(
+            numpy.array([self.num_bus, self.ref_bus, int(self.w_endpoint_rows)]),
+            numpy.array(self.precision.encode()),
+            problem.acl_fbus, problem.acl_tbus, problem.xfr_fbus, problem.xfr_tbus,
+            self.acl_b, self.xfr_b,
+            self.acl_delta_k, self.xfr_delta_k)
+
+    def get_top_viol(self, top_viol):
+        '''
+        the largest violations in top_viol, see TopViolations, as a json serializable dict of lists
+        of worst violation records for each category, with the row and column indices converted to uids
+        '''
+
+        return {
+            i: [{'val': float(val), 'idx': {0: self.viol_row_uid[i][row], 1: self.viol_col_uid[i][col], 2: int(t)}}
+                for val, row, col, t in zip(*v)]
+            for i, v in top_viol.viol.items()}
+
+    def get_checkpoint_key(self, sol):
+        '''
+        hash of the problem and solution arrays that the per-t results depend on, for the checkpoint file name,
+        i.e. the network, the branch limits, the contingencies and their uids, the interval durations and penalty,
+        and the bus injections, transformer phase shifts, branch statuses, reactive flows, and DC line flows in each t
+        '''
+
+        problem = self.problem
+        uids = [self.acl_uid, self.xfr_uid, problem.k_uid]
+        return get_array_hash(
+            numpy.array(self.network_hash.encode()),
+            numpy.array('\n'.join(str(j) for i in uids for j in i).encode()),
+            self.br_s_max, self.t_d, numpy.array([self.c_s]), self.dcl_delta_k, self.k_multi,
+            self.br_multi_out_idx_lists[0], self.br_multi_out_idx_lists[1], *self.multi_dcl_sel.nonzero(),
+            sol.bus_t_float, sol.xfr_t_phi, sol.acl_t_u_on, sol.xfr_t_u_on,
+            sol.acl_t_q_fr, sol.xfr_t_q_fr, sol.acl_t_q_to, sol.xfr_t_q_to, sol.dcl_t_p)
+
+    def get_checkpoint_options(self):
+        '''
+        the options that change what a per-t result holds, e.g. the top violations with ctg_top_k,
+        for the checkpoint header, so that a checkpoint of the same solution written with other options is started over
+        '''
+
+        return {
+            'top_k': self.top_k, 'precision': self.precision, 'float32_recheck_tol': self.float32_recheck_tol,
+            'screening': self.br_filter_by_worst_ctg, 'prune': self.prune, 'lodf_drop_tol': self.lodf_drop_tol}
+
+    def set_chunks(self):
+        '''
+        divide the contingency branches into chunks
+        so that the working arrays for one chunk fit in the memory budget.
+        chunk j has columns j*size to (j+1)*size of each of acl_delta_k, dcl_delta_k, and xfr_delta_k.
+        with ctg_worker_type = 'shard', the columns are first divided into ctg_num_workers shards of contiguous columns,
+        and each shard into chunks. self.shards has the chunks of each shard, and self.chunks all of them.
+        the results do not depend on the shards or chunks.
+        '''
+
+        num_bus = self.num_bus
+        num_br = self.num_br
+        num_delta_k = {'acl': self.num_acl_delta_k, 'dcl': self.num_dcl_delta_k, 'xfr': self.num_xfr_delta_k}
+        max_num_delta_k = max(num_delta_k.values())
+
+        # bytes per contingency column of each of acl, dcl, xfr, in the working arrays of one worker, see make_work,
+        # and in the temporaries from the solves and products
+        if self.w_endpoint_rows:
+            col_bytes = self.k_dtype.itemsize * (5 * (num_bus - 1) + 8 * num_br)
+        else:
+            col_bytes = self.k_dtype.itemsize * (11 * (num_bus - 1) + 6 * num_br)
+        if self.worker_type == 'shard':
+            num_workers = max(1, min(self.num_workers, max_num_delta_k))
+            num_shards = num_workers
+        else:
+            num_workers = max(1, min(self.num_workers, self.num_t))
+            num_shards = 1
+        shard_start = {i: [(s * num_delta_k[i]) // num_shards for s in range(num_shards + 1)] for i in num_delta_k.keys()}
+        max_shard_width = {
+            i: max(shard_start[i][s + 1] - shard_start[i][s] for s in range(num_shards)) for i in num_delta_k.keys()}
+        max_num_delta_k = max(max_shard_width.values())
+        if self.memory_budget_mb > 0:
+            chunk_size = int(self.memory_budget_mb * 1024 * 1024 / num_workers / col_bytes)
+            chunk_size = max(1, min(max_num_delta_k, chunk_size))
+        else:
+            chunk_size = max(1, max_num_delta_k)
+        num_chunks = max(1, -(-max_num_delta_k // chunk_size))
+        self.k_chunk_width = {i: min(chunk_size, max_shard_width[i]) for i in num_delta_k.keys()}
+
+        self.shards = [
+            [self.make_chunk({
+                i: numpy.arange(
+                    min(shard_start[i][s] + j * chunk_size, shard_start[i][s + 1]),
+                    min(shard_start[i][s] + (j + 1) * chunk_size, shard_start[i][s + 1]))
+                for i in ['acl', 'dcl', 'xfr']})
+             for j in range(num_chunks)]
+            for s in range(num_shards)]
+        self.chunks = [chunk for shard in self.shards for chunk in shard]
+        print('contingency chunks. memory budget (MB): {}, chunk size: {}, shards: {}, chunks per shard: {}'.format(
+            self.memory_budget_mb, chunk_size, num_shards, num_chunks))
+
+    def make_chunk(self, cols):
+        '''
+        a chunk of contingencies.
+        cols[i] - sorted indices into i_delta_k of the contingency branches in the chunk, for i in acl, dcl, xfr.
+        chunk[i] has these, and chunk[i + '_index'] indexes i_delta_k and the columns of the static arrays,
+        a slice if the columns are contiguous, so that indexing gives views, otherwise cols[i] itself.
+        '''
+
+        num_acl = self.num_acl
+        chunk = {}
+        for i in ['acl', 'dcl', 'xfr']:
+            c = numpy.asarray(cols[i], dtype=int)
+            chunk[i] = c
+            if c.size == 0:
+                chunk[i + '_index'] = slice(0, 0)
+            elif c[-1] - c[0] + 1 == c.size:
+                chunk[i + '_index'] = slice(c[0], c[-1] + 1)
+            else:
+                chunk[i + '_index'] = c
+            k_list = getattr(self, 'k_out_is_{}_list'.format(i))
+            delta_k_list = getattr(self, 'k_out_is_{}_{}_delta_k_list'.format(i, i))
+            in_chunk = numpy.isin(delta_k_list, c)
+            chunk['k_out_is_{}_list'.format(i)] = k_list[in_chunk]
+            chunk['k_out_is_{}_{}_delta_k_list'.format(i, i)] = numpy.searchsorted(c, delta_k_list[in_chunk])
+        chunk['br_acl_delta_k_out_idx_lists'] = (
+            self.acl_delta_k[chunk['acl']],
+            numpy.arange(chunk['acl'].size, dtype=int))
+        chunk['br_xfr_delta_k_out_idx_lists'] = (
+            num_acl + self.xfr_delta_k[chunk['xfr']],
+            numpy.arange(chunk['xfr'].size, dtype=int))
+        return chunk
+
+    def static_topology_fits(self, br_u_max_over_t):
+        '''
+        True if the cached static factorization was computed on the same set of
+        branches in service in at least one t, so it can be reused
+        '''
+
+        return (self.static_br_u is not None) and numpy.array_equal(self.static_br_u, br_u_max_over_t)
+
+    def factor_static(self, br_u_max_over_t):
+        '''
+        construct and factor the static matrix
+        on the topology of branches in service in at least one t.
+        '''
+
+        num_br = self.num_br
+        nonref_bus_br_inc = self.nonref_bus_br_inc
+        br_b_u_max_over_t = numpy.multiply(br_u_max_over_t, self.br_b)
+
+        # static matrix A = -B = - M*Bsr*Mt on non-reference buses, generally symmetric nonsingular
+        # usually positive definite but may be indefinite if some branches have X_sr < 0
+        # if positive definite, a symmetric factorization is used instead of LU, see AdmittanceFactors
+        # note we exclude branches that are out of service for all t
+        # t delta will be on those that are out of service for a given t but in service for at least some t
+        start_time = time.time()
+        a_mat = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_u_max_over_t, newshape=(num_br, 1)))
+        a_mat = nonref_bus_br_inc.dot(a_mat)
+        a_mat = a_mat.multiply(-1.0)
+        end_time = time.time()
+        self.static_factor_time = end_time - start_time
+        print('construct static bus admittance matrix. time: {}'.format(end_time - start_time))
+
+        # factor
+        start_time = time.time()
+        self.a_factors = self.factor(a_mat, br_u_max_over_t)
+        end_time = time.time()
+        self.static_factor_time += end_time - start_time
+        print('factor static bus admittance matrix. backend: {}, ordering: {}, nnz: {}, time: {}'.format(
+            self.a_factors.backend, self.factor_ordering, self.a_factors.nnz, end_time - start_time))
+
+        # run time per column of a solve with the static factors, for the cost model of ctg_t_update,
+        # measured on a few columns here since the static W columns may be computed later, in chunks, or not at all
+        num_col = min(8, num_br)
+        start_time = time.time()
+        self.a_factors.solve(nonref_bus_br_inc[:, 0:num_col].toarray())
+        end_time = time.time()
+        self.static_solve_col_time = (end_time - start_time) / max(1, num_col)
+
+    def factor(self, a_mat, br_u, perm=None):
+        '''
+        factor A or A_t, with the branches in service given by br_u, and the ordering perm if not None.
+        A is positive definite if no branch in service has X_sr < 0
+        '''
+
+        definite = not numpy.any(numpy.logical_and(br_u, self.br_b_nonneg))
+        return AdmittanceFactors(a_mat, definite, self.factor_backend, self.factor_ordering, perm)
+
+    @utils.timeit
+    def set_static(self, br_u_max_over_t):
+        '''
+        construct and factor the static matrix and compute the static W columns
+        on the topology of branches in service in at least one t.
+        '''
+
+        num_bus = self.num_bus
+        self.factor_static(br_u_max_over_t)
+
+        # compute static w columns,
+        # i.e. Wk for the SMW approach with respect to k on A0
+        # this is expensive but it is a one time cost, not recurring for each t or for each solution.
+        # if the contingencies are processed in chunks, these are computed for each chunk as needed instead.
+        # with shards of one chunk each, they are computed for all shards here
+        start_time = time.time()
+        self.w0_acl_k = None
+        self.w0_xfr_k = None
+        self.l0_acl_k = None
+        self.l0_xfr_k = None
+        disk_key = None
+        cached = None
+        single_chunk = all(len(shard) == 1 for shard in self.shards)
+        if single_chunk and self.disk_cache is not None:
+            disk_key = 'static-' + get_array_hash(numpy.array(self.network_hash.encode()), br_u_max_over_t)
+            cached = self.disk_cache.get(disk_key)
+        if cached is not None:
+            print('static w columns from disk cache. key: {}'.format(disk_key))
+            for i in cached.keys():
+                setattr(self, i, cached[i])
+        elif single_chunk and self.w_endpoint_rows:
+            self.l0_acl_k = self.nonref_bus_br_inc.transpose().dot(self.a_factors.solve(self.m_acl_k)) # 0->k
+            self.l0_xfr_k = self.nonref_bus_br_inc.transpose().dot(self.a_factors.solve(self.m_xfr_k)) # 0->k
+        elif single_chunk:
+            self.w0_acl_k = self.a_factors.solve(self.m_acl_k) # 0->k
+            self.w0_xfr_k = self.a_factors.solve(self.m_xfr_k) # 0->k
+        if disk_key is not None and cached is None:
+            self.disk_cache.put(disk_key, {
+                i: getattr(self, i) for i in ['w0_acl_k', 'w0_xfr_k', 'l0_acl_k', 'l0_xfr_k']
+                if getattr(self, i) is not None})
+        end_time = time.time()
+        self.compute_static_w_time = end_time - start_time
+        print('compute_static_w_time: {}'.format(self.compute_static_w_time))
+
+        # W_t columns on A0 for SMW with respect to t, indexed by branch,
+        # filled in as branches going out of service in some t are encountered.
+        # Wt can just be all of the columns we need over any t and over any solution
+        self.m_br_t = numpy.zeros(shape=(num_bus - 1, 0), dtype=float)
+        self.w_br_t = numpy.zeros(shape=(num_bus - 1, 0), dtype=float) # 0->t
+        self.l_br_t = numpy.zeros(shape=(self.num_br, 0), dtype=float) # M^T W_t, for ctg_w_endpoint_rows
+        self.br_delta_t_map = {}
+
+        # cached SMW-t factors are relative to the old static factors
+        if self.t_use_smw or self.t_update == 'auto':
+            self.clear_topology_cache()
+
+        self.static_br_u = numpy.array(br_u_max_over_t)
+        self.num_static_setups += 1
+
+    def get_topology(self, key):
+        '''
+        return the cached factors for a topology key and mark them most recently used,
+        or None if not cached
+        '''
+
+        with self.topology_cache_lock:
+            topology = self.topology_cache.get(key)
+            if topology is not None:
+                self.topology_cache.move_to_end(key)
+            return topology
+
+    def put_topology(self, key, topology):
+        '''
+        cache the factors for a topology key, evicting the least recently used if full
+        '''
+
+        with self.topology_cache_lock:
+            self.topology_cache[key] = topology
+            self.topology_cache.move_to_end(key)
+            while len(self.topology_cache) > self.topology_cache_size:
+                self.topology_cache.popitem(last=False)
+
+    def clear_topology_cache(self):
+
+        with self.topology_cache_lock:
+            self.topology_cache.clear()
+
+    def add_static_w_br_t(self, br_delta_t):
+        '''
+        make sure the static W_t columns are available for every branch in br_delta_t
+        and return the map from branch index to column index
+        '''
+
+        br_new = numpy.array([i for i in br_delta_t if i not in self.br_delta_t_map], dtype=int)
+        if br_new.size > 0:
+            start_time = time.time()
+            m_br_new = self.nonref_bus_br_inc[:, br_new].toarray()
+            w_br_new = self.a_factors.solve(m_br_new)
+            num_old = self.w_br_t.shape[1]
+            self.m_br_t = numpy.concatenate((self.m_br_t, m_br_new), axis=1)
+            self.w_br_t = numpy.concatenate((self.w_br_t, w_br_new), axis=1)
+            if self.w_endpoint_rows:
+                self.l_br_t = numpy.concatenate((self.l_br_t, self.nonref_bus_br_inc.transpose().dot(w_br_new)), axis=1)
+            for i in range(br_new.size):
+                self.br_delta_t_map[br_new[i]] = num_old + i
+            end_time = time.time()
+            print('compute static w_br_t columns. new: {}, total: {}, time: {}'.format(
+                br_new.size, self.w_br_t.shape[1], end_time - start_time))
+        return self.br_delta_t_map
+
+    def get_t_update_cost_model(self):
+        '''
+        cost model of ctg_t_update = 'auto', returns c_factor, c_smw, num_factor, num_smw_br.
+        c_factor is the run time of forming and factoring A_t and solving for W_tk in one t,
+        and c_smw is the run time per switched branch of forming and factoring V_t and updating W_tk,
+        which is dominated by the dense products with the switched columns of W_t, linear in the number of branches.
+        both are means over the num_factor t and the num_smw_br switched branches evaluated so far,
+        see add_t_update_cost().
+        until there are some, c_factor is estimated by the run time of the static factors
+        and of solving for the W_tk columns with the measured time per column of a solve with the static factors,
+        and c_smw by the W_tk solve time scaled by num_bus / (2 nnz), the ratio of the flops of a dense column update
+        to a pair of triangular solves.
+        '''
+
+        factor_time, num_factor = self.t_update_cost['factor']
+        smw_time, num_smw_br = self.t_update_cost['smw']
+        w_solve_time = self.static_solve_col_time * (self.m_acl_k.shape[1] + self.m_xfr_k.shape[1])
+        if num_factor > 0:
+            c_factor = factor_time / num_factor
+        else:
+            c_factor = self.static_factor_time + w_solve_time
+        if num_smw_br > 0:
+            c_smw = smw_time / num_smw_br
+        else:
+            c_smw = w_solve_time * (self.num_bus - 1) / (2.0 * max(1, self.a_factors.nnz))
+        return c_factor, c_smw, num_factor, num_smw_br
+
+    def choose_t_use_smw(self, num_br_delta_t, explore=False):
+        '''
+        True to update with SMW with respect to t, False to form and factor A_t, in a t with num_br_delta_t
+        branches switched out, see ctg_t_update.
+        with 'auto', SMW-t is used if num_br_delta_t c_smw < c_factor, see get_t_update_cost_model(),
+        and always if num_br_delta_t = 0, as then SMW-t is just the static factors.
+        with explore, as in the serial loop over t, a method with no recorded run time yet is used
+        once the other one has one, so that the choice is made from measured run times of both.
+        '''
+
+        if self.t_update != 'auto':
+            return self.t_use_smw
+        if num_br_delta_t == 0:
+            return True
+        c_factor, c_smw, num_factor, num_smw_br = self.get_t_update_cost_model()
+        if explore and num_factor > 0 and num_smw_br == 0:
+            return True
+        if explore and num_smw_br > 0 and num_factor == 0:
+            return False
+        return bool(num_br_delta_t * c_smw < c_factor)
+
+    def get_t_use_smw(self, t_num_br_delta_t):
+        '''
+        for each t, the choice of choose_t_use_smw(), made for all t before the loop over t.
+        with 'auto' and a serial loop over t, see sol.t_update_in_loop,
+        it is made again in the loop for each run of t, see set_t_use_smw_in_loop(),
+        from the cost model updated with the run times of the t evaluated so far.
+        with workers, it is made here, from the run times recorded in the evaluation of previous solutions,
+        so it does not depend on the number or type of workers.
+        '''
+
+        if self.t_update == 'auto':
+            c_factor, c_smw, num_factor, num_smw_br = self.get_t_update_cost_model()
+            print('t update cost model. factor per t: {}, smw per switched branch: {}, measured t: {}, {}'.format(
+                c_factor, c_smw, num_factor, num_smw_br))
+        return [self.choose_t_use_smw(t_num_br_delta_t[t]) for t in range(self.num_t)]
+
+    def set_t_use_smw_in_loop(self, sol, ts):
+        '''
+        choose the update of A_t and W_tk for the run of t in ts in the serial loop over t,
+        exploring each method first, see choose_t_use_smw(),
+        and make sure the static W_t columns are available for SMW-t
+        '''
+
+        t_use_smw = self.choose_t_use_smw(sol.t_num_br_delta_t[ts[0]], explore=True)
+        for t in ts:
+            sol.t_use_smw[t] = t_use_smw
+        if t_use_smw:
+            self.set_static_w_br_t(sol, ts)
+
+    def set_static_w_br_t(self, sol, ts):
+        '''
+        make sure the static W_t columns are available for the branches switched out in the t in ts
+        and pass them to sol
+        '''
+
+        sol.br_delta_t_map = self.add_static_w_br_t(numpy.unique(numpy.concatenate(
+            [numpy.zeros(shape=(0, ), dtype=int)] + [sol.t_br_delta_t[t] for t in ts])))
+        sol.m_br_t = self.m_br_t
+        sol.w_br_t = self.w_br_t
+        sol.l_br_t = self.l_br_t
+
+    def add_t_update_cost(self, r):
+        '''
+        add the run time of the update of A_t and W_tk in the result r of eval_t() to the cost model of ctg_t_update.
+        t with the topology dependent factors from a cache, or from the disk cache, are not counted
+        '''
+
+        if r['t_update_time'] is None:
+            return
+        if r['t_use_smw']:
+            if r['t_num_br_delta_t'] > 0:
+                self.t_update_cost['smw'][0] += r['t_update_time']
+                self.t_update_cost['smw'][1] += r['t_num_br_delta_t']
+        else:
+            self.t_update_cost['factor'][0] += r['t_update_time']
+            self.t_update_cost['factor'][1] += 1
+
+    @utils.timeit
+    def eval(self, sol_eval):
+        '''
+        evaluate the post-contingency model for the solution in sol_eval, a SolutionEvaluator of self.problem,
+        setting sol_eval.t_k_z, the worst violations sol_eval.viol_*_t_s_max_ctg, and the top violations.
+        * factor the static A on the branches in service in some t, or reuse the factors of a previous solution
+        * solve for the base case bus angles in all t from the static factors
+        * loop over t, see eval_t_all() and eval_t():
+          update the static factors to A_t, by factoring A_t or by SMW on the branches switched out in t,
+          compute the rank-1 adjustments W_tk for the single branch contingencies k,
+          and the rank-k updates for the multi-element contingencies, see eval_t_multi(),
+          and evaluate the post-contingency flows, penalties, and violations, chunk by chunk
+        * merge the per-t results in order of t, and report the performance profile
+        '''
+
+        assert(sol_eval.problem is self.problem)
+
+        # performance profile, see ContingencyProfile
+        profile = ContingencyProfile(self)
+
+        # problem dimensions
+        num_bus = self.num_bus
+        num_acl = self.num_acl
+        num_xfr = self.num_xfr
+        num_t = self.num_t
+        nonref_bus = self.nonref_bus
+        xfr_b = self.xfr_b
+
+        # branches in service in at least one t
+        acl_u_max_over_t = numpy.amax(sol_eval.acl_t_u_on, axis=1)
+        xfr_u_max_over_t = numpy.amax(sol_eval.xfr_t_u_on, axis=1)
+        br_u_max_over_t = numpy.concatenate((acl_u_max_over_t, xfr_u_max_over_t))
+
+        # static matrix and factors - reuse if the topology fits, otherwise recompute
+        static_reused = self.static_topology_fits(br_u_max_over_t)
+        if static_reused:
+            self.num_static_reuses += 1
+            print('reuse static bus admittance matrix factors. reuses: {}'.format(self.num_static_reuses))
+        else:
+            self.set_static(br_u_max_over_t)
+        a_factors = self.a_factors
+
+        # get AC branches that are in service in at least one t but out of service in a given t
+        acl_in_some_t = numpy.nonzero(acl_u_max_over_t)[0]
+        xfr_in_some_t = numpy.nonzero(xfr_u_max_over_t)[0]
+        numpy.subtract(1, sol_eval.acl_t_u_on, out=sol_eval.acl_t_int)
+        numpy.subtract(1, sol_eval.xfr_t_u_on, out=sol_eval.xfr_t_int)
+        t_acl_delta_t = [numpy.nonzero(sol_eval.acl_t_int[:, t])[0] for t in range(num_t)]
+        t_xfr_delta_t = [numpy.nonzero(sol_eval.xfr_t_int[:, t])[0] for t in range(num_t)]
+        t_acl_delta_t = [numpy.intersect1d(acl_in_some_t, t_acl_delta_t[t], assume_unique=True) for t in range(num_t)]
+        t_xfr_delta_t = [numpy.intersect1d(xfr_in_some_t, t_xfr_delta_t[t], assume_unique=True) for t in range(num_t)]
+        t_br_delta_t = [numpy.concatenate((t_acl_delta_t[t], num_acl + t_xfr_delta_t[t])) for t in range(num_t)]
+        acl_delta_t = numpy.unique(numpy.nonzero(sol_eval.acl_t_int)[0])
+        xfr_delta_t = numpy.unique(numpy.nonzero(sol_eval.xfr_t_int)[0])
+        acl_delta_t = numpy.intersect1d(acl_in_some_t, acl_delta_t, assume_unique=True)
+        xfr_delta_t = numpy.intersect1d(xfr_in_some_t, xfr_delta_t, assume_unique=True)
+        br_delta_t = numpy.concatenate((acl_delta_t, num_acl + xfr_delta_t))
+        t_num_br_delta_t = [t_br_delta_t[t].size for t in range(num_t)]
+        print('branches switched out in some t. acl: {}, xfr: {}, max in one t: {}'.format(
+            acl_delta_t.size, xfr_delta_t.size, max(t_num_br_delta_t, default=0)))
+        if self.verbose:
+            print('t_acl_delta_t: {}, t_xfr_delta_t: {}, t_br_delta_t: {}, acl_delta_t: {}, xfr_delta_t: {}, br_delta_t: {}'.format(t_acl_delta_t, t_xfr_delta_t, t_br_delta_t, acl_delta_t, xfr_delta_t, br_delta_t))
+
+        # collect bus-t injections from producers, consumers, and shunts:
+        # p_inj = p_pr - p_cs - p_sh
+        start_time = time.time()
+        sol_eval.bus_t_float[:] = 0.0
+        utils.csr_mat_vec_add_to_vec(sol_eval.bus_sd_inj_mat, sol_eval.sd_t_p, out=sol_eval.bus_t_float)
+        utils.csr_mat_vec_add_to_vec(sol_eval.bus_sh_inj_mat, sol_eval.sh_t_p, out=sol_eval.bus_t_float)
+        # subtract the distributed slack
+        t_p_sl = numpy.sum(sol_eval.bus_t_float, axis=0)
+        numpy.subtract(
+            sol_eval.bus_t_float, (1.0 / num_bus) * numpy.reshape(t_p_sl, newshape=(1, num_t)), out=sol_eval.bus_t_float)
+        # subtract pre-contingency power absorption due to DC line flow
+        utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_fr_inj_mat, sol_eval.dcl_t_p, out=sol_eval.bus_t_float)
+        numpy.negative(sol_eval.dcl_t_p, out=sol_eval.dcl_t_float)
+        utils.csr_mat_vec_add_to_vec(sol_eval.bus_dcl_to_inj_mat, sol_eval.dcl_t_float, out=sol_eval.bus_t_float)
+        # subtract pre-contingency power absorption due to transformer phase difference
+        numpy.multiply(numpy.reshape(xfr_b, newshape=(num_xfr, 1)), sol_eval.xfr_t_phi, out=sol_eval.xfr_t_float)
+        numpy.multiply(sol_eval.xfr_t_u_on, sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
+        utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_fr_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
+        numpy.negative(sol_eval.xfr_t_float, out=sol_eval.xfr_t_float)
+        utils.csr_mat_vec_add_to_vec(sol_eval.bus_xfr_to_inj_mat, sol_eval.xfr_t_float, out=sol_eval.bus_t_float)
+        # todo - check sign on terms, especially transformer
+        end_time = time.time()
+        print('construct bus,t-indexed right hand side. time: {}'.format(end_time - start_time))
+
+        # solve for bus-t theta in the base case
+        start_time = time.time()
+        sol_eval.bus_t_float_1[:] = 0.0
+        sol_eval.bus_t_float_1[nonref_bus, :] = a_factors.solve(sol_eval.bus_t_float[nonref_bus, :])
+        end_time = time.time()
+        print('solve for base case bus,t-indexed theta. time: {}'.format(end_time - start_time))
+
+        # static w columns with respect to t, from the cache, computing any that are missing
+        # these are only needed for SMW-t
+        start_time = time.time()
+        sol = SolutionData(sol_eval, t_br_delta_t, t_num_br_delta_t)
+        sol.t_runs = self.get_runs(sol_eval)
+        if self.time_batch:
+            print('time batch. applies: {}, runs of t with the same branches in service: {}'.format(
+                self.time_batch_applies(), len(sol.t_runs)))
+        sol.t_use_smw = self.get_t_use_smw(t_num_br_delta_t)
+        sol.t_update_in_loop = (self.t_update == 'auto' and (
+            self.num_workers <= 1 or (self.worker_type == 'shard' and len(self.shards) == 1)))
+        if any(sol.t_use_smw) and not sol.t_update_in_loop:
+            self.set_static_w_br_t(sol, [t for t in range(num_t) if sol.t_use_smw[t]])
+        end_time = time.time()
+        initialize_m_w_time = end_time - start_time
+
+        # resume from the checkpoint of this problem and solution, evaluating only the t that are missing there
+        checkpoint = None
+        if self.checkpoint_dir is not None:
+            checkpoint_key = self.get_checkpoint_key(sol)
+            checkpoint = Checkpoint(
+                os.path.join(self.checkpoint_dir, 'ctg-checkpoint-{}.pkl'.format(checkpoint_key)), checkpoint_key,
+                self.get_checkpoint_options())
+            sol.t_runs = [i for i in [[t for t in ts if t not in checkpoint.results] for ts in sol.t_runs] if len(i) > 0]
+            print('checkpoint. file: {}, t resumed: {} of {}'.format(checkpoint.path, len(checkpoint.results), num_t))
+
+        # loop over t, serially or concurrently on a pool of workers
+        try:
+            t_results = self.eval_t_all(sol, checkpoint)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        if checkpoint is not None:
+            t_results = [checkpoint.results[t] for t in range(num_t)]
+            checkpoint.remove()
+        if self.t_update == 'auto':
+            print('t update. smw in t: {}, factor in t: {}'.format(
+                [r['t'] for r in t_results if r['t_use_smw']], [r['t'] for r in t_results if not r['t_use_smw']]))
+
+        # merge the per-t results in order of t,
+        # so that ties in the worst violations are broken as in a serial loop
+        self.t_factor_backend = {}
+        self.t_factor_nnz = {}
+        max_viol = {i: utils.make_empty_viol(val=0.0, num_indices=3) for i in self.viol_keys + self.multi_viol_keys}
+        top_viol = (None if self.top_k == 0 else TopViolations(self.top_k))
+        for r in t_results:
+            t = r['t']
+            sol_eval.t_k_z[t, :] = r['k_z']
+            for i in self.viol_keys + self.multi_viol_keys:
+                viol = r['viol'].get(i)
+                if viol is not None and viol['val'] > max_viol[i]['val']:
+                    max_viol[i] = viol
+            self.t_factor_backend[t] = r['factor_backend']
+            self.t_factor_nnz[t] = r['factor_nnz']
+            if top_viol is not None:
+                top_viol.update(r['top_viol'])
+            profile.add_t(r)
+        profile.add_memory_info()
+        phase_time = profile.phase_time
+        num_topology_cache_hits = profile.info['topology_cache_hits']
+        num_topology_cache_misses = profile.info['topology_cache_misses']
+        num_float32_recheck = profile.info['num_float32_recheck']
+
+        # report worst violations
+        sol_eval.viol_acl_acl_t_s_max_ctg = max_viol['acl_acl_delta_k']
+        sol_eval.viol_xfr_acl_t_s_max_ctg = max_viol['xfr_acl_delta_k']
+        sol_eval.viol_acl_dcl_t_s_max_ctg = max_viol['acl_dcl_delta_k']
+        sol_eval.viol_xfr_dcl_t_s_max_ctg = max_viol['xfr_dcl_delta_k']
+        sol_eval.viol_acl_xfr_t_s_max_ctg = max_viol['acl_xfr_delta_k']
+        sol_eval.viol_xfr_xfr_t_s_max_ctg = max_viol['xfr_xfr_delta_k']
+        sol_eval.viol_acl_multi_t_s_max_ctg = max_viol['acl_multi_k']
+        sol_eval.viol_xfr_multi_t_s_max_ctg = max_viol['xfr_multi_k']
+        sol_eval.ctg_top_viol_idx = top_viol
+
+        # report topology cache use
+        sol_eval.ctg_topology_cache_hits = num_topology_cache_hits
+        sol_eval.ctg_topology_cache_misses = num_topology_cache_misses
+        print('topology cache. hits: {}, misses: {}, entries: {}'.format(
+            num_topology_cache_hits, num_topology_cache_misses, len(self.topology_cache)))
+        if self.disk_cache is not None:
+            print('disk cache. hits: {}, misses: {}, dir: {}'.format(
+                profile.info['disk_cache_hits'], profile.info['disk_cache_misses'], self.disk_cache.cache_dir))
+
+        # report factorization backends
+        print('static factors. backend: {}, nnz: {}'.format(self.a_factors.backend, self.a_factors.nnz))
+        print('t factors. backend: {}, nnz: {}'.format(self.t_factor_backend, self.t_factor_nnz))
+
+        # report reduced precision
+        if self.precision == 'float32':
+            print('float32 contingency flows. contingency branch-intervals evaluated again in float64: {} of {}'.format(
+                num_float32_recheck, num_t * (self.num_acl_delta_k + self.num_dcl_delta_k + self.num_xfr_delta_k)))
+
+        # report pruning
+        if self.prune:
+            print('contingency pruning. contingency branch-intervals skipped: {} of {}, intervals skipped: {} of {}'.format(
+                profile.info['num_pruned_k'], num_t * (self.num_acl_delta_k + self.num_dcl_delta_k + self.num_xfr_delta_k),
+                profile.info['num_pruned_t'], num_t))
+        
+        print('initialize_m_w_time: {}'.format(initialize_m_w_time))
+        print('compute_static_w_time: {}'.format(self.compute_static_w_time))
+        for i in phase_time.keys():
+            print('{}: {}'.format(i, phase_time[i]))
+        print('end of contingency model method 1, memory info: {}'.format(utils.get_memory_info()))
+
+        # report the performance profile
+        profile.info['static_factor_backend'] = self.a_factors.backend
+        profile.info['static_factor_nnz'] = self.a_factors.nnz
+        profile.info['static_reused'] = static_reused
+        profile.info['compute_static_w_time'] = self.compute_static_w_time
+        profile.info['initialize_m_w_time'] = initialize_m_w_time
+        profile.info['num_runs'] = len(sol.t_runs)
+        self.profile = profile
+        sol_eval.ctg_profile = profile.to_dict()
+
+    def make_phase_time(self):
+        '''
+        run time of certain phases of the loop over t
+        '''
+
+        return {
+            'get_time_varying_branch_characteristics_time': 0.0,
+            'topology_cache_time': 0.0,
+            'disk_cache_time': 0.0,
+            'construct_a_t_time': 0.0,
+            'factor_a_t_time': 0.0,
+            'compute_w_with_t_a_solve_time': 0.0,
+            'compute_v_t_time': 0.0,
+            'compute_w_with_t_smw_time': 0.0,
+            'compute_v_time': 0.0,
+            'compute_bus_theta_with_t_a_solve_time': 0.0,
+            'compute_bus_theta_with_t_smw_time': 0.0,
+            'compute_br_p_time': 0.0,
+            'apply_w_v_wt_time': 0.0,
+            'compute_bus_dtheta_rhs_dcl_k_time': 0.0,
+            'compute_w_v_wt_xfr_k_time': 0.0,
+            'compute_bus_dtheta_rhs_xfr_k_time': 0.0,
+            'compute_br_acl_delta_k_p_delta_time': 0.0,
+            'compute_br_dcl_delta_k_p_delta_time': 0.0,
+            'compute_br_xfr_delta_k_p_delta_time': 0.0,
+            'filter_branches_acl_k_time': 0.0,
+            'filter_branches_dcl_k_time': 0.0,
+            'filter_branches_xfr_k_time': 0.0,
+            'compute_br_acl_delta_k_p_time': 0.0,
+            'compute_br_dcl_delta_k_p_time': 0.0,
+            'compute_br_xfr_delta_k_p_time': 0.0,
+            'compute_br_acl_delta_k_s_over_time': 0.0,
+            'compute_br_dcl_delta_k_s_over_time': 0.0,
+            'compute_br_xfr_delta_k_s_over_time': 0.0,
+            'zero_out_time': 0.0,
+            'compute_br_k_s_over_screened_time': 0.0,
+            'get_max_br_k_s_over_screened_time': 0.0,
+            'get_max_br_acl_delta_k_s_over_time': 0.0,
+            'get_max_br_dcl_delta_k_s_over_time': 0.0,
+            'get_max_br_xfr_delta_k_s_over_time': 0.0,
+            'compute_br_k_z_time': 0.0,
+            'collect_penalties_into_obj_array_time': 0.0,
+            'float32_recheck_time': 0.0,
+            'lodf_recheck_time': 0.0,
+            'compute_bus_theta_run_time': 0.0,
+            'compute_br_k_run_time': 0.0,
+            'compute_br_k_p_delta_run_time': 0.0,
+            'compute_w_multi_time': 0.0,
+            'compute_bus_dtheta_multi_k_time': 0.0,
+            'solve_v_multi_k_time': 0.0,
+            'compute_br_multi_k_s_over_time': 0.0,
+            'compute_k_bounds_time': 0.0,
+            'prune_time': 0.0}
+
+    def make_work(self, k_chunk_width=None, k_dtype=None):
+        '''
+        working arrays for the computation in one t.
+        each concurrent worker needs its own.
+        the arrays indexed by contingency hold one chunk of contingencies.
+        they are flat buffers of the size of the largest chunk,
+        viewed as 2-d arrays of the size of the current chunk by get_block(),
+        and have type k_dtype, by default from ctg_precision.
+        with float32, work['float64'] holds float64 working arrays for the recheck,
+        created as needed by eval_t_chunk_float32()
+        '''
+
+        if k_chunk_width is None:
+            k_chunk_width = self.k_chunk_width
+        if k_dtype is None:
+            k_dtype = self.k_dtype
+        num_bus = self.num_bus
+        num_acl = self.num_acl
+        num_br = self.num_br
+        num_acl_delta_k = k_chunk_width['acl']
+        num_dcl_delta_k = k_chunk_width['dcl']
+        num_xfr_delta_k = k_chunk_width['xfr']
+
+        work = {}
+        work['k_chunk_width'] = k_chunk_width
+        work['float64'] = None
+        work['acl_phi'] = numpy.zeros(shape=(num_acl, ), dtype=float)
+        # W_tk, or L_tk = M^T W_tk with endpoint rows only, which does not need the bus arrays for acl and xfr k
+        if self.w_endpoint_rows:
+            num_w_rows = num_br
+            num_bus_rows = 0
+        else:
+            num_w_rows = num_bus - 1
+            num_bus_rows = num_bus - 1
+        work['w_acl_k'] = numpy.zeros(shape=(num_w_rows * num_acl_delta_k, ), dtype=k_dtype) # t->k
+        work['w_xfr_k'] = numpy.zeros(shape=(num_w_rows * num_xfr_delta_k, ), dtype=k_dtype) # t->k
+        work['bus_rhs'] = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term of RHS
+        work['bus_theta'] = numpy.zeros(shape=(num_bus - 1, ), dtype=float) # main term
+        work['bus_float'] = numpy.zeros(shape=(num_bus - 1, ), dtype=float)
+        work['bus_acl_delta_k_float'] = numpy.zeros(shape=(num_bus_rows * num_acl_delta_k, ), dtype=k_dtype)
+        work['bus_dcl_delta_k_float'] = numpy.zeros(shape=((num_bus - 1) * num_dcl_delta_k, ), dtype=k_dtype)
+        work['bus_dcl_delta_k_float_1'] = numpy.zeros(shape=((num_bus - 1) * num_dcl_delta_k, ), dtype=float) # right hand side of solves
+        work['bus_xfr_delta_k_float'] = numpy.zeros(shape=(num_bus_rows * num_xfr_delta_k, ), dtype=k_dtype)
+        work['bus_xfr_delta_k_float_1'] = numpy.zeros(shape=(num_bus_rows * num_xfr_delta_k, ), dtype=float) # right hand side of solves
+        work['bus_xfr_delta_k_float_2'] = numpy.zeros(shape=(num_bus_rows * num_xfr_delta_k, ), dtype=k_dtype)
+
+        work['br_theta'] = numpy.zeros(shape=(num_br, ), dtype=float) # theta difference across each branch
+        work['br_p'] = numpy.zeros(shape=(num_br, ), dtype=float) # main term
+        work['br_float'] = numpy.zeros(shape=(num_br, ), dtype=float)
+        work['br_float_1'] = numpy.zeros(shape=(num_br, ), dtype=float)
+        work['br_acl_delta_k_float'] = numpy.zeros(shape=(num_br * num_acl_delta_k, ), dtype=k_dtype)
+        work['br_dcl_delta_k_float'] = numpy.zeros(shape=(num_br * num_dcl_delta_k, ), dtype=k_dtype)
+        work['br_xfr_delta_k_float'] = numpy.zeros(shape=(num_br * num_xfr_delta_k, ), dtype=k_dtype)
+
+        work['acl_delta_k_float'] = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
+        work['dcl_delta_k_float'] = numpy.zeros(shape=(num_dcl_delta_k, ), dtype=float)
+        work['xfr_delta_k_float'] = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
+
+        # compact arrays of the post-contingency flow limit violations on the screened branches,
+        # grown as needed by get_work_buf(), so their size follows the number of screened branches
+        work['br_acl_delta_k_s_over'] = numpy.zeros(shape=(0, ), dtype=k_dtype)
+        work['br_dcl_delta_k_s_over'] = numpy.zeros(shape=(0, ), dtype=k_dtype)
+        work['br_xfr_delta_k_s_over'] = numpy.zeros(shape=(0, ), dtype=k_dtype)
+        work['br_rows_float'] = numpy.zeros(shape=(num_br, ), dtype=float)
+
+        return work
+
+    def get_runs(self, sol_eval):
+        '''
+        maximal runs of consecutive t with the same AC branches in service, for ctg_time_batch,
+        or every t on its own if ctg_time_batch is off or does not apply
+        '''
+
+        num_t = self.num_t
+        if not self.time_batch_applies():
+            return [[t] for t in range(num_t)]
+        runs = []
+        for t in range(num_t):
+            if (t > 0 and
+                    numpy.array_equal(sol_eval.acl_t_u_on[:, t], sol_eval.acl_t_u_on[:, t - 1]) and
+                    numpy.array_equal(sol_eval.xfr_t_u_on[:, t], sol_eval.xfr_t_u_on[:, t - 1])):
+                runs[-1].append(t)
+            else:
+                runs.append([t])
+        return runs
+
+    def time_batch_applies(self):
+        '''
+        ctg_time_batch keeps the matrices for a run of t for all contingencies,
+        so it needs a single chunk, and its flow deltas are computed in float64
+        '''
+
+        return self.time_batch and len(self.chunks) == 1 and self.precision == 'float64'
+
+    def eval_run(self, sol, ts, work=None):
+        '''
+        evaluate the t in ts in order, returning a list of per-t results.
+        with ctg_time_batch, ts is a run of t with the same AC branches in service,
+        and the work that depends only on the run is done on the first t and shared through a run dict,
+        see eval_t() and eval_t_chunk_run()
+        '''
+
+        if work is None:
+            work = self.make_work()
+        run = None
+        if self.time_batch_applies():
+            run = {'t': ts, 't_index': {ts[i]: i for i in range(len(ts))}}
+        return [self.eval_t(sol, t, work, run) for t in ts]
+
+    def eval_t_all(self, sol, checkpoint=None):
+        '''
+        evaluate the t in sol.t_runs, returning a list of per-t results in order of t.
+
+        with ctg_num_workers > 1, the t are distributed over a pool of workers,
+        threads or processes according to ctg_worker_type.
+        the computation for one t does not depend on any other t,
+        and the results are merged by the caller in order of t,
+        so the outcome does not depend on the number or type of workers.
+        threads are effective since the sparse factorization and the dense linear algebra release the GIL.
+        processes each receive a copy of the evaluator and the solution data once, when the pool starts,
+        and refactor the static matrix there, since the factors cannot be pickled.
+        with ctg_time_batch, the units of work are the runs of t in sol.t_runs, see eval_run(), instead of single t.
+        with ctg_worker_type = 'shard', the workers are processes evaluating shards of the contingencies,
+        see eval_t_all_shards().
+        with a checkpoint, each result is saved there as it is received, in order of t,
+        or with shards, once the shards are merged.
+        the run time of the update of A_t and W_tk in each result is added to the cost model of ctg_t_update
+        as it is received, and with sol.t_update_in_loop, the update is chosen for each run of t from it,
+        see set_t_use_smw_in_loop().
+        '''
+
+        t_results = []
+        def add(rs):
+            for r in rs:
+                if checkpoint is not None:
+                    checkpoint.put(r)
+                self.add_t_update_cost(r)
+                t_results.append(r)
+
+        runs = sol.t_runs
+        num_workers = min(self.num_workers, len(runs))
+        if len(runs) == 0:
+            pass
+        elif self.worker_type == 'shard' and len(self.shards) > 1:
+            add(self.eval_t_all_shards(sol))
+        elif num_workers <= 1 or self.worker_type == 'shard':
+            work = self.make_work()
+            for ts in runs:
+                if sol.t_update_in_loop:
+                    self.set_t_use_smw_in_loop(sol, ts)
+                add(self.eval_run(sol, ts, work))
+        elif self.worker_type == 'process':
+            print('evaluate t on a pool of workers. type: {}, workers: {}'.format(self.worker_type, num_workers))
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=num_workers, initializer=_init_worker, initargs=(self, sol)) as executor:
+                for rs in executor.map(_eval_run_worker, runs):
+                    add(rs)
+        elif self.worker_type == 'thread':
+            print('evaluate t on a pool of workers. type: {}, workers: {}'.format(self.worker_type, num_workers))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+                for rs in executor.map(lambda ts: self.eval_run(sol, ts), runs):
+                    add(rs)
+        else:
+            raise ValueError('ctg_worker_type must be "thread", "process", or "shard", got: {}'.format(self.worker_type))
+        return t_results
+
+    def eval_t_all_shards(self, sol):
+        '''
+        evaluate all t, with each shard of the contingencies in self.shards evaluated over all t in a worker process,
+        returning a list of per-t results in order of t, merged over the shards by merge_shard_results().
+
+        the workers attach to the incidence matrices, the static W columns, and the per-t solution data
+        in shared memory, see SharedArrays, instead of receiving pickled copies,
+        and refactor the static matrix there, since the factors cannot be shared.
+        '''
+
+        num_shards = len(self.shards)
+        print('evaluate contingency shards on a pool of processes. shards: {}'.format(num_shards))
+        shared_ctg = SharedArrays()
+        shared_sol = SharedArrays()
+        try:
+            for i in [
+                    'nonref_bus_acl_inc', 'nonref_bus_dcl_inc', 'nonref_bus_xfr_inc', 'nonref_bus_br_inc',
+                    'm_acl_k', 'm_xfr_k', 'm_multi', 'w0_acl_k', 'w0_xfr_k', 'l0_acl_k', 'l0_xfr_k',
+                    'm_br_t', 'w_br_t', 'l_br_t']:
+                if getattr(self, i) is not None:
+                    shared_ctg.put(i, getattr(self, i))
+            for i in [
+                    'bus_t_float', 'xfr_t_phi', 'acl_t_u_on', 'xfr_t_u_on', 'acl_t_q_fr', 'xfr_t_q_fr',
+                    'acl_t_q_to', 'xfr_t_q_to', 'dcl_t_p', 'm_br_t', 'w_br_t', 'l_br_t']:
+                if getattr(sol, i) is not None:
+                    shared_sol.put(i, getattr(sol, i))
+            self.shared_arrays = shared_ctg
+            sol.shared_arrays = shared_sol
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=num_shards, initializer=_init_worker, initargs=(self, sol)) as executor:
+                shard_results = list(executor.map(_eval_shard_worker, range(num_shards)))
+        finally:
+            self.shared_arrays = None
+            sol.shared_arrays = None
+            shared_ctg.close(unlink=True)
+            shared_sol.close(unlink=True)
+        return [self.merge_shard_results([rs[j] for rs in shard_results]) for j in range(len(shard_results[0]))]
+
+    def eval_shard(self, sol, shard):
+        '''
+        evaluate all t on one shard of the contingencies, in a shard worker process
+        '''
+
+        if self.shard != shard:
+            # the cached W_tk are for the columns of the other shard
+            self.clear_topology_cache()
+        self.shard = shard
+        self.chunks = self.shards[shard]
+        work = self.make_work()
+        return [r for ts in sol.t_runs for r in self.eval_run(sol, ts, work)]
+
+    def merge_shard_results(self, rs):
+        '''
+        merge the results of eval_t() in one t over the shards.
+        each contingency is in one shard, with penalty 0 in the others,
+        and the worst violations are merged as over the chunks, so the result is the same as without shards.
+        the run times and counts are summed, and the other per-t information is from the first shard
+        '''
+
+        t = rs[0]['t']
+        r = dict(rs[0])
+        r['k_z'] = numpy.sum([i['k_z'] for i in rs], axis=0)
+        r['viol_idx'] = {}
+        for i in rs:
+            for key, v in i['viol_idx'].items():
+                merge_viol(r['viol_idx'], key, v[0], v[1], v[2])
+        r['viol'] = {}
+        for key, v in r['viol_idx'].items():
+            r['viol'][key] = {'val': v[0], 'idx': {0: self.viol_row_uid[key][v[1]], 1: self.viol_col_uid[key][v[2]], 2: t}}
+        r['phase_time'] = {key: sum(i['phase_time'][key] for i in rs) for key in r['phase_time'].keys()}
+        r['computation_time'] = sum(i['computation_time'] for i in rs)
+        for key in ['num_float32_recheck', 'num_lodf_recheck']:
+            r[key] = sum(i[key] for i in rs)
+        r['prune_counts'] = [sum(i['prune_counts'][j] for i in rs) for j in range(2)]
+        r['filter_counts'] = {
+            key: [sum(i['filter_counts'][key][j] for i in rs) for j in range(2)] for key in r['filter_counts'].keys()}
+        if all(i['t_update_time'] is not None for i in rs):
+            r['t_update_time'] = sum(i['t_update_time'] for i in rs)
+        r['memory_rss_bytes'] = max(i['memory_rss_bytes'] for i in rs)
+        if r['top_viol'] is not None:
+            r['top_viol'] = TopViolations(self.top_k, t)
+            for i in rs:
+                r['top_viol'].update(i['top_viol'])
+        return r
+
+    def eval_t(self, sol, t, work=None, run=None):
+        '''
+        evaluate the post-contingency model in one t.
+
+        run - with ctg_time_batch, the run of t containing t, see eval_run(), otherwise None.
+        the topology dependent factors, the base case solves, and the flow coefficients
+        are computed on the first t of the run and kept in the run dict for the others.
+
+        the work that depends only on t, i.e. the A_t factors and the base case flows, is done here.
+        the work for the contingencies is done by eval_t_chunk() on each chunk of contingencies in turn,
+        and by eval_t_multi() on the multi-element contingencies,
+        and the penalties and worst violations are merged over the chunks.
+
+        returns a dict with
+        * k_z - penalty for each contingency in t (with minus sign)
+        * viol - worst violation in t for each category in viol_keys and multi_viol_keys, or None if the category is empty
+        * viol_idx - the same with indices instead of uids, see merge_viol_idx()
+        * top_viol - the ctg_top_k largest violations in t in each category, see TopViolations, or None if ctg_top_k = 0
+        * phase_time - run time of certain phases
+        * topology_cache_hit - True if the topology dependent factors were found in the cache,
+          False if they were computed, None if the cache is disabled or they are from the run
+        * disk_cache_hit - True if W_tk and V_tk inverses were read from the disk cache, False if they were computed,
+          None if the disk cache is disabled or not used in t
+        * factor_backend, factor_nnz - backend and number of nonzeros of the A_t factors, None under SMW-t
+        * t_use_smw - True if A_t and W_tk are updated by SMW with respect to t, see get_t_use_smw()
+        * t_num_br_delta_t - number of branches switched out in t
+        * t_update_time - run time of the update of A_t and W_tk, or None if the factors are from a cache
+        * num_float32_recheck - number of contingencies evaluated again in float64, with ctg_precision = 'float32'
+        * num_lodf_recheck - number of contingencies evaluated again from exact dense columns, with ctg_lodf_drop_tol
+        * filter_counts - for i in acl, dcl, xfr, the number of AC branches with a possible violation
+          under some outage of type i and the number checked, summed over chunks
+        * prune_counts - with ctg_prune, the number of single-element contingency branches skipped
+          and the number checked, summed over chunks, see get_prune_cols()
+        * memory_rss_bytes - rss from utils.get_memory_info() at the end of t
+        '''
+
+        # algorithm control parameters
+        t_use_smw = sol.t_use_smw[t]
+        t_skip_update_if_no_br_change = self.t_skip_update_if_no_br_change
+
+        # problem dimensions
+        num_br = self.num_br
+        num_k = self.num_k
+
+        # problem data
+        nonref_bus = self.nonref_bus
+        nonref_bus_br_inc = self.nonref_bus_br_inc
+        br_b = self.br_b
+
+        # static factors
+        a_factors = self.a_factors
+
+        # solution data
+        t_br_delta_t = sol.t_br_delta_t
+        t_num_br_delta_t = sol.t_num_br_delta_t
+        if t_use_smw:
+            br_delta_t_map = sol.br_delta_t_map
+            m_br_t = sol.m_br_t
+            w_br_t = sol.w_br_t
+
+        # working arrays
+        if work is None:
+            work = self.make_work()
+        acl_phi = work['acl_phi']
+        bus_rhs = work['bus_rhs']
+        bus_theta = work['bus_theta']
+        bus_float = work['bus_float']
+        br_theta = work['br_theta']
+        br_p = work['br_p']
+
+        # outputs
+        k_z = numpy.zeros(shape=(num_k, ), dtype=float)
+        t_viol_idx = {}
+        phase_time = self.make_phase_time()
+
+
+        t_start_time = time.time()
 
         # do low rank update with respect to t, as in HIPPO/MISO paper
         # todo create test data with more line switching to test this sufficiently
@@ -347,56 +2104,86 @@ def eval_post_contingency_model(sol_eval):
 
         # get some time-varying characteristics of branches from the base case solution
         start_time = time.time()
-        xfr_phi = sol_eval.xfr_t_phi[:, t]
+        xfr_phi = sol.xfr_t_phi[:, t]
         br_phi = numpy.concatenate((acl_phi, xfr_phi))
-        acl_u = sol_eval.acl_t_u_on[:, t]
-        xfr_u = sol_eval.xfr_t_u_on[:, t]
+        acl_u = sol.acl_t_u_on[:, t]
+        xfr_u = sol.xfr_t_u_on[:, t]
         br_u = numpy.concatenate((acl_u, xfr_u))
         br_b_t = br_u * br_b
-        acl_q_fr = sol_eval.acl_t_q_fr[:, t]
-        xfr_q_fr = sol_eval.xfr_t_q_fr[:, t]
+        acl_q_fr = sol.acl_t_q_fr[:, t]
+        xfr_q_fr = sol.xfr_t_q_fr[:, t]
         br_q_fr = numpy.concatenate((acl_q_fr, xfr_q_fr))
-        acl_q_to = sol_eval.acl_t_q_to[:, t]
-        xfr_q_to = sol_eval.xfr_t_q_to[:, t]
+        acl_q_to = sol.acl_t_q_to[:, t]
+        xfr_q_to = sol.xfr_t_q_to[:, t]
         br_q_to = numpy.concatenate((acl_q_to, xfr_q_to))
         br_q = numpy.maximum(numpy.absolute(br_q_fr), numpy.absolute(br_q_to)) # no need to track which side is violated
-        dcl_p = sol_eval.dcl_t_p[:, t]
+        dcl_p = sol.dcl_t_p[:, t]
         end_time = time.time()
-        get_time_varying_branch_characteristics_time += (end_time - start_time)
+        phase_time['get_time_varying_branch_characteristics_time'] += (end_time - start_time)
+
+        # look up the topology dependent factors in the cache.
+        # consecutive t, and often many other t, have the same branches out of service,
+        # and then there is no need to form and factor A_t or V_t or to solve for W_tk again
+        start_time = time.time()
+        topology = None
+        topology_cache_hit = None
+        if run is not None and 'topology' in run:
+            topology = run['topology']
+        elif t_skip_update_if_no_br_change:
+            topology_key = get_topology_key(t_use_smw, br_u)
+            topology = self.get_topology(topology_key)
+            topology_cache_hit = (topology is not None)
+        a_factors_t = None
+        v_t_factors = None
+        t_br_delta_t_in_br_delta_t = None
+        chunk_w = None
+        w_multi = None
+        topology_computed = (topology is None)
+        if topology is not None:
+            a_factors_t = topology['a_factors_t']
+            v_t_factors = topology['v_t_factors']
+            t_br_delta_t_in_br_delta_t = topology['t_br_delta_t_in_br_delta_t']
+            chunk_w = topology['chunk_w']
+            w_multi = topology['w_multi']
+        end_time = time.time()
+        phase_time['topology_cache_time'] += (end_time - start_time)
+
+        # look up W_tk and V_tk inverses in the disk cache.
+        # A_t is still formed and factored below, for the base case flows
+        start_time = time.time()
+        disk_key = None
+        disk_cache_hit = None
+        if topology is None and self.disk_cache is not None and not t_use_smw and len(self.chunks) == 1:
+            disk_key = 'topology-' + get_array_hash(numpy.array(self.network_hash.encode()), numpy.flatnonzero(br_u == 0))
+            if self.shard is not None:
+                disk_key = 'topology-' + get_array_hash(
+                    numpy.array(disk_key.encode()), *[self.chunks[0][i] for i in ['acl', 'dcl', 'xfr']])
+            cached = self.disk_cache.get(disk_key)
+            disk_cache_hit = (cached is not None)
+            if disk_cache_hit:
+                chunk_w = [cached]
+        end_time = time.time()
+        phase_time['disk_cache_time'] += (end_time - start_time)
 
         # form A_t
         start_time = time.time()
-        if not t_use_smw:
+        if topology is None and not t_use_smw:
             a_mat_t = nonref_bus_br_inc.transpose().multiply(numpy.reshape(br_b_t, newshape=(num_br, 1)))
             a_mat_t = nonref_bus_br_inc.dot(a_mat_t)
             a_mat_t = a_mat_t.multiply(-1.0)
         end_time = time.time()
-        construct_a_t_time += (end_time - start_time)
+        phase_time['construct_a_t_time'] += (end_time - start_time)
 
         # factor A_t
         start_time = time.time()
-        if not t_use_smw:
-            a_factors_t = scipy.sparse.linalg.splu(a_mat_t)
-        end_time = time.time()
-        factor_a_t_time += (end_time - start_time)
-
-        # solve with A_t for W_tk - this is expensive ~80 s
-        # two ideas can improve this:
-        # skipping updates if ac br u_su/sd == 0
-        # applying low rank update technique to network changes with respect to t
-        start_time = time.time()
-        if not t_use_smw:
-            w_acl_k[:] = a_factors_t.solve(m_acl_k)
-            w_xfr_k[:] = a_factors_t.solve(m_xfr_k)
-            #w_k = a_factors_t.solve(m_k) # no in-place, creating w_k for each t (instead of w[:] = ..) is better
-            #for k in range(sol_eval.problem.num_k):
-            #    w[:, k] = bus_b_mat_factors.solve(m[:, k])
+        if topology is None and not t_use_smw:
+            a_factors_t = self.factor(a_mat_t, br_u, (self.a_factors.perm if self.factor_reuse_ordering else None))
         end_time = time.time()
-        compute_w_with_t_a_solve_time += (end_time - start_time)
+        phase_time['factor_a_t_time'] += (end_time - start_time)
 
         # compute v_t
         start_time = time.time()
-        if t_use_smw:
+        if topology is None and t_use_smw:
             # note w_t, v_t, etc., are with all branches, - need to make sure the phi term is multiplied by u_t todo
             if t_num_br_delta_t[t] > 0:
                 # set w_acl_k and w_xfr_k equal to the delta term in SMW formula for w_tk, then subtract from w_k
@@ -406,79 +2193,10 @@ def eval_post_contingency_model(sol_eval):
                 # factor v_t
                 v_t_factors = scipy.linalg.lu_factor(v_t)
         end_time = time.time()
-        compute_v_t_time += (end_time - start_time)
-
-        # compute w_tk using SMW with respect to t
-        start_time = time.time()
-        if t_use_smw:
-            # note w_t, v_t, etc., are with all branches, - need to make sure the phi term is multiplied by u_t todo
-            if t_num_br_delta_t[t] > 0:
-                #w_t_m_acl_k = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(m_acl_k) # dense m
-                #w_t_m_xfr_k = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(m_xfr_k) # dense m
-                w_t_m_acl_k = nonref_bus_acl_inc[:, acl_delta_k].transpose().dot( # sparse m, should return dense
-                    w_br_t[:, t_br_delta_t_in_br_delta_t]).transpose()
-                w_t_m_xfr_k = nonref_bus_xfr_inc[:, xfr_delta_k].transpose().dot( # sparse m, should return dense
-                    w_br_t[:, t_br_delta_t_in_br_delta_t]).transpose()
-                # solve with v_t
-                w_t_m_acl_k = scipy.linalg.lu_solve(v_t_factors, w_t_m_acl_k)
-                w_t_m_xfr_k = scipy.linalg.lu_solve(v_t_factors, w_t_m_xfr_k)
-                # multiply w_t onto w_t_m_k
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_m_acl_k, out=w_acl_k)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_m_xfr_k, out=w_xfr_k)
-                numpy.subtract(w0_acl_k, w_acl_k, out=w_acl_k)
-                numpy.subtract(w0_xfr_k, w_xfr_k, out=w_xfr_k)
-            else:
-                w_acl_k[:] = w0_acl_k
-                w_xfr_k[:] = w0_xfr_k
-        end_time = time.time()
-        compute_w_with_t_smw_time += (end_time - start_time)
-        
-        # compute V_tk and inverses
-        start_time = time.time()
-        v_acl_k = (1.0 / acl_b[acl_delta_k]) + numpy.einsum('ij,ij->j', m_acl_k, w_acl_k)
-        # v_acl_k should be nonzero so the following division should work
-        # for contingencies k where the line going out of service is not already out of service in the base case,
-        # we have the assumption that the network remains connected post-contingency,
-        # so the post-contingency negative admittance matrix is nonsingular,
-        # so the rank-1 update formula holds and the inner factor is nonzero.
-        # for contingencies k where the line going out of service is already out of service in the base case,
-        # the rank-1 update to the network amounts to putting the line in with its susceptance multiplied by -1.
-        # we assume that the pre-contingency network is connected, and adding a line cannot disconnect it,
-        # so the post-contingency network is connected.
-        # the theoretical result that the negative admittance matrix on the non-reference buses resulting from a
-        # connected network is nonsingular does not require that the branch reactances be positive
-        # (or that they be negative).
-        # if this step ever fails, we have some work to do.
-        # todo catch this and ensure that it is not treated as a competitor error
-        # and that it raises an issue for debugging.
-        # todo ctg-bug
-        # fix xfr as well
-        # v_acl_k has some 0 entries.
-        # apparently only when ac_u is also 0
-        # we later zero that out, so maybe we can just do that
-        print('v_acl_k: {}'.format(v_acl_k))
-        print('acl_u[acl_delta_k]: {}'.format(acl_u[acl_delta_k]))
-        #v_acl_k_inv = 1.0 / v_acl_k
-        v_acl_k = v_acl_k * acl_u[acl_delta_k] # zero out v_acl_k from base case - this is not necessary
-        # for now only do the division on nonzero entries
-        v_acl_k_inv = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
-        v_acl_k_inv[numpy.nonzero(acl_u[acl_delta_k])[0]] = 1.0 / v_acl_k[numpy.nonzero(acl_u[acl_delta_k])[0]]
-        # zero out v_acl_k_inv for any branches that are out of service due to pre-contingency state
-        # this will zero out the delta contribution to the solved theta,
-        # so the solved theta is that of the base case, as it should be
-        #v_acl_k_inv = v_acl_k_inv * acl_u[acl_delta_k]
-        v_xfr_k = (1.0 / xfr_b[xfr_delta_k]) + numpy.einsum('ij,ij->j', m_xfr_k, w_xfr_k)
-        #v_xfr_k_inv = 1.0 / v_xfr_k
-        v_xfr_k = v_xfr_k * xfr_u[xfr_delta_k]
-        #v_xfr_k_inv = v_xfr_k_inv * xfr_u[xfr_delta_k]
-        # for now only do the division on nonzero entries
-        v_xfr_k_inv = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
-        v_xfr_k_inv[numpy.nonzero(xfr_u[xfr_delta_k])[0]] = 1.0 / v_xfr_k[numpy.nonzero(xfr_u[xfr_delta_k])[0]]
-        end_time = time.time()
-        compute_v_time += (end_time - start_time)
+        phase_time['compute_v_t_time'] += (end_time - start_time)
 
         # set RHS terms
-        bus_rhs[:] = sol_eval.bus_t_float[nonref_bus, t]
+        bus_rhs[:] = sol.bus_t_float[nonref_bus, t]
 
         # compute terms in theta expression
 
@@ -487,14 +2205,14 @@ def eval_post_contingency_model(sol_eval):
         # every contingency outages exactly one branch
         # some branches might be outaged by more than one contingency - why though?
         start_time = time.time()
-        if not t_use_smw:
+        if run is None and not t_use_smw:
             bus_theta[:] = a_factors_t.solve(bus_rhs)
         end_time = time.time()
-        compute_bus_theta_with_t_a_solve_time += (end_time - start_time)
+        phase_time['compute_bus_theta_with_t_a_solve_time'] += (end_time - start_time)
 
         # solve for base case bus theta using SMW-t
         start_time = time.time()
-        if t_use_smw:
+        if run is None and t_use_smw:
             bus_theta[:] = a_factors.solve(bus_rhs)
             if t_num_br_delta_t[t] > 0:
                 w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_rhs)
@@ -502,127 +2220,775 @@ def eval_post_contingency_model(sol_eval):
                 numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_float)
                 numpy.subtract(bus_theta, bus_float, out=bus_theta)
         end_time = time.time()
-        compute_bus_theta_with_t_smw_time += (end_time - start_time)
+        phase_time['compute_bus_theta_with_t_smw_time'] += (end_time - start_time)
+
+        # solve for base case bus theta in every t of the run at once
+        start_time = time.time()
+        if run is not None:
+            if 'bus_theta' not in run:
+                run['bus_rhs'] = sol.bus_t_float[numpy.ix_(nonref_bus, run['t'])]
+                run['bus_theta'] = self.solve_t(sol, {
+                    't': t,
+                    't_use_smw': t_use_smw,
+                    'a_factors_t': a_factors_t,
+                    'v_t_factors': v_t_factors,
+                    't_br_delta_t_in_br_delta_t': t_br_delta_t_in_br_delta_t}, run['bus_rhs'])
+                run['br_theta'] = nonref_bus_br_inc.transpose().dot(run['bus_theta'])
+            bus_theta[:] = run['bus_theta'][:, run['t_index'][t]]
+        end_time = time.time()
+        phase_time['compute_bus_theta_run_time'] += (end_time - start_time)
 
         # compute br p under no outages from theta
         start_time = time.time()
         #numpy.multiply(nonref_bus_br_inc.transpose(), bus_acl_delta_k_float, out=br_acl_delta_k_float)
-        br_p[:] = nonref_bus_br_inc.transpose().dot(bus_theta)
-        numpy.subtract(br_p, br_phi, out=br_p)
+        if run is not None:
+            br_theta[:] = run['br_theta'][:, run['t_index'][t]]
+        else:
+            br_theta[:] = nonref_bus_br_inc.transpose().dot(bus_theta)
+        numpy.subtract(br_theta, br_phi, out=br_p)
         numpy.multiply(br_b_t, br_p, out=br_p)
         numpy.negative(br_p, out=br_p)
         end_time = time.time()
-        compute_br_p_time += (end_time - start_time)
+        phase_time['compute_br_p_time'] += (end_time - start_time)
+
+        # loop over chunks of contingencies
+        t_data = {
+            't': t,
+            't_use_smw': t_use_smw,
+            'acl_u': acl_u,
+            'xfr_u': xfr_u,
+            'br_u': br_u,
+            'xfr_phi': xfr_phi,
+            'dcl_p': dcl_p,
+            'br_b_t': br_b_t,
+            'br_q': br_q,
+            'br_theta': br_theta,
+            'run': run,
+            'a_factors_t': a_factors_t,
+            'v_t_factors': v_t_factors,
+            't_br_delta_t_in_br_delta_t': t_br_delta_t_in_br_delta_t,
+            'filter_counts': {i: [0, 0] for i in ['acl', 'dcl', 'xfr']},
+            'prune_counts': [0, 0],
+            'top_viol': (None if self.top_k == 0 else TopViolations(self.top_k, t))}
+        num_float32_recheck = 0
+        num_lodf_recheck = 0
+        for j, chunk in enumerate(self.chunks):
+            cached_w = (None if (chunk_w is None or j > 0) else chunk_w[0])
+            if self.precision == 'float32':
+                chunk_new_w, num_recheck = self.eval_t_chunk_float32(
+                    sol, t_data, chunk, work, cached_w, k_z, t_viol_idx, phase_time)
+                num_float32_recheck += num_recheck
+            elif cached_w is not None and scipy.sparse.issparse(cached_w['w_acl_k']):
+                chunk_new_w, num_recheck = self.eval_t_chunk_sparse(
+                    sol, t_data, chunk, work, cached_w, k_z, t_viol_idx, phase_time)
+                num_lodf_recheck += num_recheck
+            else:
+                chunk_new_w = self.eval_t_chunk(sol, t_data, chunk, work, cached_w, k_z, t_viol_idx, phase_time)
+            if j == 0:
+                new_chunk_w = chunk_new_w
+
+        # multi-element contingencies, in the first shard with shard workers
+        if self.shard is None or self.shard == 0:
+            w_multi = self.eval_t_multi(sol, t_data, work, w_multi, k_z, t_viol_idx, phase_time)
+
+        # cache the topology dependent factors.
+        # W_tk and V_tk are cached only if there is a single chunk, i.e. if they fit in the memory budget.
+        # the cached arrays are not modified after this, so they can be shared by concurrent t
+        # with ctg_time_batch they are also kept for the rest of the run
+        start_time = time.time()
+        if (t_skip_update_if_no_br_change or run is not None) and topology is None:
+            if len(self.chunks) == 1 and self.sparse_lodf_applies():
+                cached_w = [self.sparsify_w(new_chunk_w, br_b_t)]
+            elif disk_cache_hit:
+                cached_w = chunk_w
+            elif len(self.chunks) == 1:
+                cached_w = [{i: numpy.copy(new_chunk_w[i]) for i in new_chunk_w.keys()}]
+            else:
+                cached_w = None
+            topology = {
+                'a_factors_t': a_factors_t,
+                'v_t_factors': v_t_factors,
+                't_br_delta_t_in_br_delta_t': t_br_delta_t_in_br_delta_t,
+                'chunk_w': cached_w,
+                'w_multi': w_multi}
+            if t_skip_update_if_no_br_change:
+                self.put_topology(topology_key, topology)
+        if run is not None:
+            run['topology'] = topology
+        end_time = time.time()
+        phase_time['topology_cache_time'] += (end_time - start_time)
 
-        # compute bus theta delta term under ACL outages - from w rank 1 update of matrix
-        # this is somewhat expensive ~7 s
-        # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
+        # write W_tk and V_tk inverses to the disk cache
         start_time = time.time()
-        w_acl_k_rhs = numpy.dot(w_acl_k.transpose(), bus_rhs)
-        w_acl_k_rhs = v_acl_k_inv * w_acl_k_rhs
-        numpy.multiply(
-            w_acl_k, numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)), out=bus_acl_delta_k_float) #subtract this from A^-1 p
+        if disk_cache_hit is False:
+            self.disk_cache.put(disk_key, new_chunk_w)
         end_time = time.time()
-        apply_w_v_wt_time += (end_time - start_time)
+        phase_time['disk_cache_time'] += (end_time - start_time)
+
+        # run time of the update of A_t and W_tk, for the cost model of ctg_t_update
+        t_update_time = None
+        if topology_computed and disk_cache_hit is not True:
+            if t_use_smw:
+                t_update_time = phase_time['compute_v_t_time'] + phase_time['compute_w_with_t_smw_time']
+            else:
+                t_update_time = (
+                    phase_time['construct_a_t_time'] + phase_time['factor_a_t_time'] +
+                    phase_time['compute_w_with_t_a_solve_time'])
 
-        # compute bus theta delta term under DCL outages - from RHS
+        # worst violations, with indices converted to uids
+        t_viol = {}
+        for i, v in t_viol_idx.items():
+            t_viol[i] = {'val': v[0], 'idx': {0: self.viol_row_uid[i][v[1]], 1: self.viol_col_uid[i][v[2]], 2: t}}
+
+        t_end_time = time.time()
+        t_computation_time = t_end_time - t_start_time
+        memory_info = utils.get_memory_info()
+        if self.verbose:
+            print('t: {}, time: {}, memory_info: {}'.format(t, t_computation_time, memory_info))
+
+        return {
+            't': t,
+            'k_z': k_z,
+            'viol': t_viol,
+            'viol_idx': t_viol_idx,
+            'phase_time': phase_time,
+            'computation_time': t_computation_time,
+            'topology_cache_hit': topology_cache_hit,
+            'disk_cache_hit': disk_cache_hit,
+            'factor_backend': (None if a_factors_t is None else a_factors_t.backend),
+            'factor_nnz': (None if a_factors_t is None else a_factors_t.nnz),
+            'num_float32_recheck': num_float32_recheck,
+            'num_lodf_recheck': num_lodf_recheck,
+            't_use_smw': t_use_smw,
+            't_num_br_delta_t': t_num_br_delta_t[t],
+            't_update_time': t_update_time,
+            'filter_counts': t_data['filter_counts'],
+            'prune_counts': t_data['prune_counts'],
+            'top_viol': t_data['top_viol'],
+            'memory_rss_bytes': memory_info['rss bytes']}
+
+    def eval_t_chunk_float32(self, sol, t_data, chunk, work, chunk_w, k_z, t_viol_idx, phase_time):
+        '''
+        evaluate the post-contingency model in one t on one chunk of contingencies,
+        with W_tk and the post-contingency flow deltas in float32.
+
+        the flows are computed in float32, and the contingencies where some branch flow is within
+        ctg_float32_recheck_tol of its limit are evaluated again in float64 by eval_t_chunk() on a chunk of just those.
+        every other contingency has no violation, i.e. penalty 0 and worst violation 0,
+        so the penalties and worst violations are the same as from the float64 evaluation of the whole chunk,
+        unless the float32 error in some flow exceeds the tolerance.
+        (under SMW-t the dense products over the switched branches are computed on the chunk of rechecked contingencies,
+        so the results may differ from the whole chunk in rounding.)
+
+        returns W_tk and V_tk inverses for this chunk in float32, and the number of contingencies evaluated again
+        '''
+
+        # float32 flows, and the contingencies to evaluate again
+        recheck = {}
+        new_chunk_w = self.eval_t_chunk(sol, t_data, chunk, work, chunk_w, k_z, t_viol_idx, phase_time, recheck)
+
+        # no violation on the contingencies not evaluated again
         start_time = time.time()
-        bus_dcl_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
-        nonref_bus_dcl_inc[:, dcl_delta_k].toarray(out=bus_dcl_delta_k_float_1)
-        numpy.multiply(
-            bus_dcl_delta_k_float_1,
-            numpy.reshape(dcl_p[dcl_delta_k], newshape=(1, num_dcl_delta_k)),
-            out=bus_dcl_delta_k_float_1)
-        if t_use_smw:
-            bus_dcl_delta_k_float[:] = a_factors.solve(bus_dcl_delta_k_float_1)
-            if t_num_br_delta_t[t] > 0:
-                w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_dcl_delta_k_float_1)
-                w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_dcl_delta_k_float_1)
-                numpy.subtract(bus_dcl_delta_k_float, bus_dcl_delta_k_float_1, out=bus_dcl_delta_k_float)
-        else:
-            bus_dcl_delta_k_float[:] = a_factors_t.solve(bus_dcl_delta_k_float_1)
-        numpy.negative(bus_dcl_delta_k_float, out=bus_dcl_delta_k_float) # could eliminate this
+        self.merge_zero_viol(chunk, t_viol_idx)
+        recheck_chunk = self.make_chunk(recheck)
+        k_chunk_width = {i: recheck_chunk[i].size for i in ['acl', 'dcl', 'xfr']}
+        num_recheck = sum(k_chunk_width.values())
+        recheck_work = work['float64']
+        if num_recheck > 0 and (
+                recheck_work is None or
+                any(k_chunk_width[i] > recheck_work['k_chunk_width'][i] for i in k_chunk_width.keys())):
+            if recheck_work is not None:
+                k_chunk_width = {i: max(k_chunk_width[i], recheck_work['k_chunk_width'][i]) for i in k_chunk_width.keys()}
+            recheck_work = self.make_work(k_chunk_width, numpy.dtype(float))
+            work['float64'] = recheck_work
         end_time = time.time()
-        compute_bus_dtheta_rhs_dcl_k_time += (end_time - start_time)
+        phase_time['float32_recheck_time'] += (end_time - start_time)
+
+        # evaluate again in float64
+        if num_recheck > 0:
+            for i in ['bus_rhs', 'br_p']:
+                recheck_work[i][:] = work[i]
+            self.eval_t_chunk(sol, t_data, recheck_chunk, recheck_work, None, k_z, t_viol_idx, phase_time)
+
+        return new_chunk_w, num_recheck
+
+    def sparse_lodf_applies(self):
+        '''
+        ctg_lodf_drop_tol keeps L_tk = M^T W_tk in sparse form, so it needs ctg_w_endpoint_rows,
+        and the runs of ctg_time_batch keep their matrices dense
+        '''
+
+        return (
+            self.lodf_drop_tol > 0.0 and self.w_endpoint_rows and self.precision == 'float64' and
+            not self.time_batch_applies())
+
+    def sparsify_w(self, chunk_w, br_b_t):
+        '''
+        W_tk and V_tk inverses for the topology cache, with L_tk = M^T W_tk in sparse form.
+
+        b_t L_tk is the matrix of LODFs, i.e. the flow delta on each branch per unit of the coefficient
+        of each outage, see get_prune_cols(). the entries with |b_t L_tk| < ctg_lodf_drop_tol are dropped,
+        and w_i_k is kept as a csc matrix, for i in acl, xfr.
+        i_k_drop_max has the largest dropped |b_t L_tk| on each branch, so the flow delta dropped on branch l
+        under an outage with coefficient c_k is at most i_k_drop_max[l] |c_k|, see eval_t_chunk_sparse().
+        xfr_k_w_diag has M_k^T W_k for the xfr coefficients.
+        '''
 
-        # todo - definitely some benefit from treating xfr with phi==0 as acl - only if we have large cases with many xfr outage contingencies
-        # compute bus theta delta term under XFR outages - from rhs
         start_time = time.time()
-        numpy.multiply(xfr_b[xfr_delta_k], xfr_phi[xfr_delta_k], out=xfr_delta_k_float)
-        numpy.multiply(xfr_u[xfr_delta_k], xfr_delta_k_float, out=xfr_delta_k_float)
-        bus_xfr_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
-        nonref_bus_xfr_inc[:, xfr_delta_k].toarray(out=bus_xfr_delta_k_float_1)
-        numpy.multiply(
-            bus_xfr_delta_k_float_1,
-            numpy.reshape(xfr_delta_k_float, newshape=(1, num_xfr_delta_k)),
-            out=bus_xfr_delta_k_float_1)
-        if t_use_smw:
-            bus_xfr_delta_k_float[:] = a_factors.solve(bus_xfr_delta_k_float_1)
-            if t_num_br_delta_t[t] > 0:
-                w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_xfr_delta_k_float_1)
-                w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
-                numpy.dot(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_xfr_delta_k_float_2)
-                numpy.subtract(bus_xfr_delta_k_float, bus_xfr_delta_k_float_2, out=bus_xfr_delta_k_float)
-        else:
-            bus_xfr_delta_k_float[:] = a_factors_t.solve(bus_xfr_delta_k_float_1)
-        numpy.add(
-            numpy.reshape(bus_rhs, newshape=(num_bus - 1, 1)), bus_xfr_delta_k_float_1, out=bus_xfr_delta_k_float_1)
-        w_xfr_k_rhs = numpy.einsum('ij,ij->j', w_xfr_k, bus_xfr_delta_k_float_1)
-        w_xfr_k_rhs = v_xfr_k_inv * w_xfr_k_rhs
-        numpy.multiply(
-            w_xfr_k, numpy.reshape(w_xfr_k_rhs, newshape=(1, num_xfr_delta_k)), out=bus_xfr_delta_k_float_1)
-        numpy.subtract(bus_xfr_delta_k_float_1, bus_xfr_delta_k_float, out=bus_xfr_delta_k_float) #subtract this from A^-1 p
+        num_br = self.num_br
+        tol = self.lodf_drop_tol
+        chunk = self.chunks[0]
+        xfr_delta_k = self.xfr_delta_k[chunk['xfr_index']]
+        br_b_t = numpy.reshape(br_b_t, newshape=(num_br, 1))
+        sparse_w = {i: numpy.copy(v) for i, v in chunk_w.items() if i not in ['w_acl_k', 'w_xfr_k']}
+        sparse_w['xfr_k_w_diag'] = chunk_w['w_xfr_k'][self.num_acl + xfr_delta_k, numpy.arange(xfr_delta_k.size)]
+        num_nz = 0
+        num_dense = 0
+        for i in ['acl', 'xfr']:
+            l_k = chunk_w['w_{}_k'.format(i)]
+            lodf_abs = numpy.absolute(br_b_t * l_k)
+            dropped = (lodf_abs < tol)
+            lodf_abs[numpy.logical_not(dropped)] = 0.0
+            if l_k.shape[1] > 0:
+                sparse_w['{}_k_drop_max'.format(i)] = numpy.amax(lodf_abs, axis=1)
+            else:
+                sparse_w['{}_k_drop_max'.format(i)] = numpy.zeros(shape=(num_br, ), dtype=float)
+            sparse_w['w_{}_k'.format(i)] = scipy.sparse.csc_matrix(numpy.where(dropped, 0.0, l_k))
+            num_nz += sparse_w['w_{}_k'.format(i)].nnz
+            num_dense += l_k.size
         end_time = time.time()
-        compute_w_v_wt_xfr_k_time += (end_time - start_time)
+        print('sparse lodf. nonzeros: {} of {}, time: {}'.format(num_nz, num_dense, end_time - start_time))
+        return sparse_w
+
+    def eval_t_chunk_sparse(self, sol, t_data, chunk, work, chunk_w, k_z, t_viol_idx, phase_time):
+        '''
+        evaluate the post-contingency model in one t on one chunk of contingencies,
+        with W_tk from the topology cache in sparse form, see sparsify_w().
+
+        for each acl or xfr outage k with coefficient c_k, the flow delta on branch l is exact where the LODF entry
+        is kept, and at most drop_max[l] |c_k| in absolute value where it is dropped.
+        a branch l with s_max_l >= |q_l| is within its limit as long as |p_l + delta| <= a_l = (s_max_l^2 - q_l^2)^(1/2),
+        so k cannot have a violation if |p_l + delta| <= a_l on the kept entries and |p_l| + drop_max[l] |c_k| <= a_l
+        on all branches, with a relative tolerance of 1e-9 for the rounding.
+        every other outage k, and all dcl outages, whose flows do not use W_tk, are evaluated again by eval_t_chunk()
+        on a chunk of just those, solving for their exact dense columns of W_tk.
+        the outages not evaluated again have penalty 0 and worst violation 0,
+        so the penalties and worst violations are the same as from the dense evaluation of the whole chunk.
+
+        returns the cached W_tk, and the number of contingencies evaluated again
+        '''
 
-        # todo we do not need this separate block
-        # compute bus theta delta term under XFR outages - from w rank 1 update of matrix
-        # todo
         start_time = time.time()
-        #w_acl_k_rhs = numpy.dot(w_acl_k.transpose(), bus_rhs)
-        #w_acl_k_rhs = v_acl_k_inv * w_acl_k_rhs
-        #bus_acl_delta_k_float[:] = w_acl_k * numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)) #subtract this from A^-1 p
-        #bus_xfr_delta_k_float[:] = 0.0 # todo this is a placeholder
+        tol = 1e-9
+        num_acl = self.num_acl
+        br_s_max = self.br_s_max
+        br_q = t_data['br_q']
+        br_b_t = t_data['br_b_t']
+        br_theta = t_data['br_theta']
+        br_p = work['br_p']
+
+        # limits on |p + delta|, with the tolerance
+        br_a = numpy.power(br_s_max, 2) - numpy.power(br_q, 2)
+        br_in_limit = (br_a >= 0.0)
+        br_a = numpy.sqrt(numpy.maximum(br_a, 0.0))
+        br_p_abs = numpy.absolute(br_p)
+        br_a = br_a - tol * (br_a + br_p_abs)
+        br_a[numpy.logical_not(br_in_limit)] = -numpy.inf
+        br_margin = br_a - br_p_abs
+
+        # coefficients
+        acl_delta_k = self.acl_delta_k[chunk['acl_index']]
+        xfr_delta_k = self.xfr_delta_k[chunk['xfr_index']]
+        xfr_phi_k = self.xfr_b[xfr_delta_k] * t_data['xfr_phi'][xfr_delta_k] * t_data['xfr_u'][xfr_delta_k]
+        c_k = {
+            'acl': chunk_w['v_acl_k_inv'] * br_theta[acl_delta_k],
+            'xfr': (
+                chunk_w['v_xfr_k_inv'] * (br_theta[num_acl + xfr_delta_k] + chunk_w['xfr_k_w_diag'] * xfr_phi_k) -
+                xfr_phi_k)}
+        br_out = {'acl': acl_delta_k, 'xfr': num_acl + xfr_delta_k}
+
+        # the contingencies to evaluate again
+        recheck = {'dcl': chunk['dcl']}
+        for i in ['acl', 'xfr']:
+            l_k = chunk_w['w_{}_k'.format(i)]
+            drop_max = chunk_w['{}_k_drop_max'.format(i)]
+            c_abs = numpy.absolute(c_k[i])
+            num_cols = l_k.shape[1]
+            # dropped entries, on all branches
+            if numpy.any(br_margin < 0.0):
+                possible_viol = numpy.ones(shape=(num_cols, ), dtype=bool)
+            else:
+                has_drop = (drop_max > 0.0)
+                c_abs_max = numpy.amin(br_margin[has_drop] / drop_max[has_drop]) if numpy.any(has_drop) else numpy.inf
+                possible_viol = (c_abs > c_abs_max)
+            # kept entries, except on the outaged branch, where the flow is 0
+            rows = l_k.indices
+            cols = numpy.repeat(numpy.arange(num_cols), numpy.diff(l_k.indptr))
+            delta = l_k.data * br_b_t[rows] * c_k[i][cols]
+            entry_viol = numpy.absolute(br_p[rows] + delta) + tol * numpy.absolute(delta) > br_a[rows]
+            entry_viol = numpy.logical_and(entry_viol, rows != br_out[i][cols])
+            possible_viol[cols[entry_viol]] = True
+            recheck[i] = chunk[i][possible_viol]
+
+        # no violation on the contingencies not evaluated again
+        self.merge_zero_viol(chunk, t_viol_idx)
+        recheck_chunk = self.make_chunk(recheck)
+        num_recheck = sum(recheck_chunk[i].size for i in ['acl', 'dcl', 'xfr'])
         end_time = time.time()
-        compute_bus_dtheta_rhs_xfr_k_time += (end_time - start_time)
-        
-        # compute AC branch flow deltas under ACL outages
-        # this is somewhat expensive ~9 s
-        # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
-        # apply M, phi, B to get AC branch flows
+        phase_time['lodf_recheck_time'] += (end_time - start_time)
+
+        # evaluate again from exact dense columns
+        if num_recheck > 0:
+            self.eval_t_chunk(sol, t_data, recheck_chunk, work, None, k_z, t_viol_idx, phase_time, pruned=True)
+
+        return chunk_w, num_recheck
+
+    def merge_zero_viol(self, chunk, t_viol_idx):
+        '''
+        merge a worst violation of 0 for every category with contingencies in the chunk,
+        for the contingencies shown to have no violation without computing their flows.
+        the first max of 0 is at the first row and column, as in the evaluation of the whole chunk
+        '''
+
+        num_rows = {'acl': self.num_acl, 'xfr': self.num_xfr}
+        for i in self.viol_keys:
+            cols = chunk[i.split('_')[1]]
+            if num_rows[i.split('_')[0]] > 0 and cols.size > 0:
+                merge_viol(t_viol_idx, i, numpy.float64(0.0), 0, cols[0])
+
+    def eval_t_chunk(self, sol, t_data, chunk, work, chunk_w, k_z, t_viol_idx, phase_time, recheck=None, pruned=False):
+        '''
+        evaluate the post-contingency model in one t on one chunk of contingencies.
+
+        chunk_w - W_tk and V_tk inverses for this chunk from the topology cache, or None to compute them
+        k_z - penalties of the contingencies in this chunk are set here
+        t_viol_idx - worst violations are merged here, see merge_viol_idx()
+        recheck - if not None, only the contingencies to evaluate again in float64 are found,
+          and recheck[i] is set to their indices into i_delta_k for i in acl, dcl, xfr, see eval_t_chunk_float32()
+        pruned - True if the chunk has the contingencies left by ctg_prune or by eval_t_chunk_sparse(),
+          so they are not pruned again
+
+        returns W_tk and V_tk inverses for this chunk, and with ctg_prune the bounds from get_k_bounds()
+        '''
+
+        # algorithm control parameters
+        br_filter_by_worst_ctg = self.br_filter_by_worst_ctg
+        t_use_smw = t_data['t_use_smw']
+        w_endpoint_rows = self.w_endpoint_rows
+
+        # problem dimensions
+        num_bus = self.num_bus
+        num_acl = self.num_acl
+        num_xfr = self.num_xfr
+        num_br = self.num_br
+
+        # problem data, restricted to the contingencies in this chunk
+        nonref_bus_acl_inc = self.nonref_bus_acl_inc
+        nonref_bus_dcl_inc = self.nonref_bus_dcl_inc
+        nonref_bus_xfr_inc = self.nonref_bus_xfr_inc
+        nonref_bus_br_inc = self.nonref_bus_br_inc
+        acl_b = self.acl_b
+        xfr_b = self.xfr_b
+        br_s_max = self.br_s_max
+        acl_cols = chunk['acl']
+        dcl_cols = chunk['dcl']
+        xfr_cols = chunk['xfr']
+        acl_index = chunk['acl_index']
+        dcl_index = chunk['dcl_index']
+        xfr_index = chunk['xfr_index']
+        acl_delta_k = self.acl_delta_k[acl_index]
+        xfr_delta_k = self.xfr_delta_k[xfr_index]
+        dcl_delta_k = self.dcl_delta_k[dcl_index]
+        num_acl_delta_k = acl_delta_k.size
+        num_xfr_delta_k = xfr_delta_k.size
+        num_dcl_delta_k = dcl_delta_k.size
+        k_out_is_acl_list = chunk['k_out_is_acl_list']
+        k_out_is_acl_acl_delta_k_list = chunk['k_out_is_acl_acl_delta_k_list']
+        k_out_is_dcl_list = chunk['k_out_is_dcl_list']
+        k_out_is_dcl_dcl_delta_k_list = chunk['k_out_is_dcl_dcl_delta_k_list']
+        k_out_is_xfr_list = chunk['k_out_is_xfr_list']
+        k_out_is_xfr_xfr_delta_k_list = chunk['k_out_is_xfr_xfr_delta_k_list']
+        br_acl_delta_k_out_idx_lists = chunk['br_acl_delta_k_out_idx_lists']
+        br_xfr_delta_k_out_idx_lists = chunk['br_xfr_delta_k_out_idx_lists']
+        m_acl_k = self.m_acl_k[:, acl_index]
+        m_xfr_k = self.m_xfr_k[:, xfr_index]
+
+        # static factors
+        a_factors = self.a_factors
+        if t_use_smw and chunk_w is None:
+            # the static W columns are only kept if there is a single chunk
+            if w_endpoint_rows and self.l0_acl_k is not None:
+                w0_acl_k = self.l0_acl_k[:, acl_index]
+                w0_xfr_k = self.l0_xfr_k[:, xfr_index]
+            elif w_endpoint_rows:
+                w0_acl_k = nonref_bus_br_inc.transpose().dot(a_factors.solve(m_acl_k))
+                w0_xfr_k = nonref_bus_br_inc.transpose().dot(a_factors.solve(m_xfr_k))
+            elif self.w0_acl_k is not None:
+                w0_acl_k = self.w0_acl_k[:, acl_index]
+                w0_xfr_k = self.w0_xfr_k[:, xfr_index]
+            else:
+                w0_acl_k = a_factors.solve(m_acl_k)
+                w0_xfr_k = a_factors.solve(m_xfr_k)
+
+        # solution data
+        t_num_br_delta_t = sol.t_num_br_delta_t
+        if t_use_smw:
+            w_br_t = sol.w_br_t
+            l_br_t = sol.l_br_t
+
+        # time-varying data
+        t = t_data['t']
+        acl_u = t_data['acl_u']
+        xfr_u = t_data['xfr_u']
+        xfr_phi = t_data['xfr_phi']
+        dcl_p = t_data['dcl_p']
+        br_b_t = t_data['br_b_t']
+        br_q = t_data['br_q']
+        br_theta = t_data['br_theta']
+        a_factors_t = t_data['a_factors_t']
+        v_t_factors = t_data['v_t_factors']
+        t_br_delta_t_in_br_delta_t = t_data['t_br_delta_t_in_br_delta_t']
+
+        # working arrays
+        bus_rhs = work['bus_rhs']
+        br_p = work['br_p']
+        br_float = work['br_float']
+        br_float_1 = work['br_float_1']
+        # with endpoint rows, w_acl_k and w_xfr_k hold L_tk = M^T W_tk, num_br by num_k, and the bus arrays are not used
+        w_acl_k = get_block(work['w_acl_k'], (num_br if w_endpoint_rows else num_bus - 1), num_acl_delta_k)
+        w_xfr_k = get_block(work['w_xfr_k'], (num_br if w_endpoint_rows else num_bus - 1), num_xfr_delta_k)
+        if not w_endpoint_rows:
+            bus_acl_delta_k_float = get_block(work['bus_acl_delta_k_float'], num_bus - 1, num_acl_delta_k)
+            bus_xfr_delta_k_float = get_block(work['bus_xfr_delta_k_float'], num_bus - 1, num_xfr_delta_k)
+            bus_xfr_delta_k_float_1 = get_block(work['bus_xfr_delta_k_float_1'], num_bus - 1, num_xfr_delta_k)
+            bus_xfr_delta_k_float_2 = get_block(work['bus_xfr_delta_k_float_2'], num_bus - 1, num_xfr_delta_k)
+        bus_dcl_delta_k_float = get_block(work['bus_dcl_delta_k_float'], num_bus - 1, num_dcl_delta_k)
+        bus_dcl_delta_k_float_1 = get_block(work['bus_dcl_delta_k_float_1'], num_bus - 1, num_dcl_delta_k)
+        br_acl_delta_k_float = get_block(work['br_acl_delta_k_float'], num_br, num_acl_delta_k)
+        br_dcl_delta_k_float = get_block(work['br_dcl_delta_k_float'], num_br, num_dcl_delta_k)
+        br_xfr_delta_k_float = get_block(work['br_xfr_delta_k_float'], num_br, num_xfr_delta_k)
+        acl_delta_k_float = work['acl_delta_k_float'][0:num_acl_delta_k]
+        dcl_delta_k_float = work['dcl_delta_k_float'][0:num_dcl_delta_k]
+        xfr_delta_k_float = work['xfr_delta_k_float'][0:num_xfr_delta_k]
+
+        br_acl_delta_k_float[:] = 0.0
+        acl_delta_k_float[:] = 0.0
+        br_dcl_delta_k_float[:] = 0.0
+        dcl_delta_k_float[:] = 0.0
+        br_xfr_delta_k_float[:] = 0.0
+        xfr_delta_k_float[:] = 0.0
+
+        # W_tk and V_tk inverses from the topology cache
+        if chunk_w is not None:
+            w_acl_k = chunk_w['w_acl_k']
+            w_xfr_k = chunk_w['w_xfr_k']
+            v_acl_k_inv = chunk_w['v_acl_k_inv']
+            v_xfr_k_inv = chunk_w['v_xfr_k_inv']
+
+        # solve with A_t for W_tk - this is expensive ~80 s
+        # two ideas can improve this:
+        # skipping updates if ac br u_su/sd == 0 (done, with the topology cache)
+        # applying low rank update technique to network changes with respect to t
         start_time = time.time()
-        #numpy.multiply(nonref_bus_br_inc.transpose(), bus_acl_delta_k_float, out=br_acl_delta_k_float)
-        br_acl_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_acl_delta_k_float)
-        numpy.multiply(
-            numpy.reshape(br_b_t, newshape=(num_br, 1)), br_acl_delta_k_float, out=br_acl_delta_k_float)
-        # zero out br-acl-delta-k that are outaged
-        # this is correct, but still need to do it again after adding
-        # it is not necessary to do it here for correctness,
-        # but if we do not do it here, then we lose much of the gain from filtering the delta terms
-        # drops number of branches down from ~1700 (out of 3000) to ~40
-        br_acl_delta_k_float[br_acl_delta_k_out_idx_lists] = 0.0
-        end_time = time.time()
-        compute_br_acl_delta_k_p_delta_time += (end_time - start_time)
-        
-        # compute AC branch flow deltas under DCL outages
+        if chunk_w is None and not t_use_smw and w_endpoint_rows:
+            w_acl_k[:] = nonref_bus_br_inc.transpose().dot(a_factors_t.solve(m_acl_k))
+            w_xfr_k[:] = nonref_bus_br_inc.transpose().dot(a_factors_t.solve(m_xfr_k))
+        elif chunk_w is None and not t_use_smw:
+            w_acl_k[:] = a_factors_t.solve(m_acl_k)
+            w_xfr_k[:] = a_factors_t.solve(m_xfr_k)
+            #w_k = a_factors_t.solve(m_k) # no in-place, creating w_k for each t (instead of w[:] = ..) is better
+            #for k in range(self.num_k):
+            #    w[:, k] = bus_b_mat_factors.solve(m[:, k])
+        end_time = time.time()
+        phase_time['compute_w_with_t_a_solve_time'] += (end_time - start_time)
+
+        # compute w_tk using SMW with respect to t
         start_time = time.time()
-        br_dcl_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_dcl_delta_k_float)
-        numpy.multiply(
-            numpy.reshape(br_b_t, newshape=(num_br, 1)), br_dcl_delta_k_float, out=br_dcl_delta_k_float)
-        # zero-out step not necessary here since
-        # these contingencies are DC line outages and we are computing AC branch flow
+        if chunk_w is None and t_use_smw:
+            # note w_t, v_t, etc., are with all branches, - need to make sure the phi term is multiplied by u_t todo
+            if t_num_br_delta_t[t] > 0:
+                #w_t_m_acl_k = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(m_acl_k) # dense m
+                #w_t_m_xfr_k = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(m_xfr_k) # dense m
+                if w_endpoint_rows:
+                    # M_k^T W_t is in the rows of M^T W_t at the outaged branches
+                    w_t_m_acl_k = l_br_t[numpy.ix_(acl_delta_k, t_br_delta_t_in_br_delta_t)].transpose()
+                    w_t_m_xfr_k = l_br_t[numpy.ix_(num_acl + xfr_delta_k, t_br_delta_t_in_br_delta_t)].transpose()
+                else:
+                    w_t_m_acl_k = nonref_bus_acl_inc[:, acl_delta_k].transpose().dot( # sparse m, should return dense
+                        w_br_t[:, t_br_delta_t_in_br_delta_t]).transpose()
+                    w_t_m_xfr_k = nonref_bus_xfr_inc[:, xfr_delta_k].transpose().dot( # sparse m, should return dense
+                        w_br_t[:, t_br_delta_t_in_br_delta_t]).transpose()
+                # solve with v_t
+                w_t_m_acl_k = scipy.linalg.lu_solve(v_t_factors, w_t_m_acl_k)
+                w_t_m_xfr_k = scipy.linalg.lu_solve(v_t_factors, w_t_m_xfr_k)
+                # multiply w_t onto w_t_m_k
+                w_t = (l_br_t if w_endpoint_rows else w_br_t)[:, t_br_delta_t_in_br_delta_t]
+                dot_out(w_t, w_t_m_acl_k, out=w_acl_k)
+                dot_out(w_t, w_t_m_xfr_k, out=w_xfr_k)
+                numpy.subtract(w0_acl_k, w_acl_k, out=w_acl_k)
+                numpy.subtract(w0_xfr_k, w_xfr_k, out=w_xfr_k)
+            else:
+                w_acl_k[:] = w0_acl_k
+                w_xfr_k[:] = w0_xfr_k
         end_time = time.time()
-        compute_br_dcl_delta_k_p_delta_time += (end_time - start_time)
-        
-        # compute AC branch flow deltas under XFR outages
+        phase_time['compute_w_with_t_smw_time'] += (end_time - start_time)
+
+        # compute V_tk and inverses
         start_time = time.time()
-        br_xfr_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_xfr_delta_k_float)
-        numpy.multiply(
-            numpy.reshape(br_b_t, newshape=(num_br, 1)), br_xfr_delta_k_float, out=br_xfr_delta_k_float)
-        br_xfr_delta_k_float[br_xfr_delta_k_out_idx_lists] = 0.0
+        if chunk_w is None:
+            if w_endpoint_rows:
+                v_acl_k = (1.0 / acl_b[acl_delta_k]) + w_acl_k[acl_delta_k, numpy.arange(num_acl_delta_k)]
+            else:
+                v_acl_k = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
+                numpy.multiply(m_acl_k, w_acl_k, out=bus_acl_delta_k_float)
+                sum_rows(bus_acl_delta_k_float, out=v_acl_k)
+                v_acl_k = (1.0 / acl_b[acl_delta_k]) + v_acl_k
+            # v_acl_k should be nonzero so the following division should work
+            # for contingencies k where the line going out of service is not already out of service in the base case,
+            # we have the assumption that the network remains connected post-contingency,
+            # so the post-contingency negative admittance matrix is nonsingular,
+            # so the rank-1 update formula holds and the inner factor is nonzero.
+            # for contingencies k where the line going out of service is already out of service in the base case,
+            # the rank-1 update to the network amounts to putting the line in with its susceptance multiplied by -1.
+            # we assume that the pre-contingency network is connected, and adding a line cannot disconnect it,
+            # so the post-contingency network is connected.
+            # the theoretical result that the negative admittance matrix on the non-reference buses resulting from a
+            # connected network is nonsingular does not require that the branch reactances be positive
+            # (or that they be negative).
+            # if this step ever fails, we have some work to do.
+            # todo catch this and ensure that it is not treated as a competitor error
+            # and that it raises an issue for debugging.
+            # todo ctg-bug
+            # fix xfr as well
+            # v_acl_k has some 0 entries.
+            # apparently only when ac_u is also 0
+            # we later zero that out, so maybe we can just do that
+            print('v_acl_k: {}'.format(v_acl_k))
+            print('acl_u[acl_delta_k]: {}'.format(acl_u[acl_delta_k]))
+            #v_acl_k_inv = 1.0 / v_acl_k
+            v_acl_k = v_acl_k * acl_u[acl_delta_k] # zero out v_acl_k from base case - this is not necessary
+            # for now only do the division on nonzero entries
+            v_acl_k_inv = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
+            v_acl_k_inv[numpy.nonzero(acl_u[acl_delta_k])[0]] = 1.0 / v_acl_k[numpy.nonzero(acl_u[acl_delta_k])[0]]
+            # zero out v_acl_k_inv for any branches that are out of service due to pre-contingency state
+            # this will zero out the delta contribution to the solved theta,
+            # so the solved theta is that of the base case, as it should be
+            #v_acl_k_inv = v_acl_k_inv * acl_u[acl_delta_k]
+            if w_endpoint_rows:
+                v_xfr_k = (1.0 / xfr_b[xfr_delta_k]) + w_xfr_k[num_acl + xfr_delta_k, numpy.arange(num_xfr_delta_k)]
+            else:
+                v_xfr_k = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
+                numpy.multiply(m_xfr_k, w_xfr_k, out=bus_xfr_delta_k_float_2)
+                sum_rows(bus_xfr_delta_k_float_2, out=v_xfr_k)
+                v_xfr_k = (1.0 / xfr_b[xfr_delta_k]) + v_xfr_k
+            #v_xfr_k_inv = 1.0 / v_xfr_k
+            v_xfr_k = v_xfr_k * xfr_u[xfr_delta_k]
+            #v_xfr_k_inv = v_xfr_k_inv * xfr_u[xfr_delta_k]
+            # for now only do the division on nonzero entries
+            v_xfr_k_inv = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
+            v_xfr_k_inv[numpy.nonzero(xfr_u[xfr_delta_k])[0]] = 1.0 / v_xfr_k[numpy.nonzero(xfr_u[xfr_delta_k])[0]]
         end_time = time.time()
-        compute_br_xfr_delta_k_p_delta_time += (end_time - start_time)
+        phase_time['compute_v_time'] += (end_time - start_time)
+
+        # prune the contingencies that cannot have a violation, see get_prune_cols().
+        # the bounds depend only on the topology, so they are cached with W_tk
+        k_bounds = None
+        if self.prune and self.precision == 'float64' and recheck is None and not pruned and t_data['run'] is None:
+            start_time = time.time()
+            if chunk_w is not None and 'acl_k_lodf_max' in chunk_w:
+                k_bounds = {i: chunk_w[i] for i in ['acl_k_lodf_max', 'dcl_k_lodf_max', 'xfr_k_lodf_max', 'xfr_k_w_diag']}
+            else:
+                k_bounds = self.get_k_bounds(sol, t_data, chunk, w_acl_k, w_xfr_k)
+            end_time = time.time()
+            phase_time['compute_k_bounds_time'] += (end_time - start_time)
+            start_time = time.time()
+            keep = self.get_prune_cols(t_data, chunk, k_bounds, v_acl_k_inv, v_xfr_k_inv, br_p)
+            num_keep = sum(keep[i].size for i in ['acl', 'dcl', 'xfr'])
+            num_chunk = num_acl_delta_k + num_dcl_delta_k + num_xfr_delta_k
+            t_data['prune_counts'][0] += num_chunk - num_keep
+            t_data['prune_counts'][1] += num_chunk
+            end_time = time.time()
+            phase_time['prune_time'] += (end_time - start_time)
+            if num_keep < num_chunk:
+                # the pruned contingencies have penalty 0, and k_z is 0 already
+                self.merge_zero_viol(chunk, t_viol_idx)
+                if num_keep > 0:
+                    keep_chunk = self.make_chunk({i: chunk[i][keep[i]] for i in ['acl', 'dcl', 'xfr']})
+                    keep_chunk_w = {
+                        'w_acl_k': w_acl_k[:, keep['acl']],
+                        'w_xfr_k': w_xfr_k[:, keep['xfr']],
+                        'v_acl_k_inv': v_acl_k_inv[keep['acl']],
+                        'v_xfr_k_inv': v_xfr_k_inv[keep['xfr']]}
+                    self.eval_t_chunk(
+                        sol, t_data, keep_chunk, work, keep_chunk_w, k_z, t_viol_idx, phase_time, pruned=True)
+                chunk_new_w = {
+                    'w_acl_k': w_acl_k,
+                    'w_xfr_k': w_xfr_k,
+                    'v_acl_k_inv': v_acl_k_inv,
+                    'v_xfr_k_inv': v_xfr_k_inv}
+                chunk_new_w.update(k_bounds)
+                return chunk_new_w
+
+        # time batch - the flow deltas from the matrices and coefficients for the run, see eval_t_chunk_run()
+        if t_data['run'] is not None:
+            self.eval_t_chunk_run(
+                sol, t_data, chunk, w_acl_k, w_xfr_k, v_acl_k_inv, v_xfr_k_inv,
+                br_acl_delta_k_float, br_dcl_delta_k_float, br_xfr_delta_k_float, phase_time)
+        else:
+
+            # compute bus theta delta term under ACL outages - from w rank 1 update of matrix
+            # this is somewhat expensive ~7 s
+            # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
+            # with endpoint rows, W_k^T p = M_k^T A_t^-1 p = M_k^T theta, the theta difference across the outaged branch
+            start_time = time.time()
+            if w_endpoint_rows:
+                w_acl_k_rhs = br_theta[acl_delta_k]
+            else:
+                # W_k^T p column by column, adding the rows in order,
+                # so the result for a contingency does not depend on the other contingencies in the chunk
+                w_acl_k_rhs = numpy.zeros(shape=(num_acl_delta_k, ), dtype=float)
+                numpy.multiply(w_acl_k, numpy.reshape(bus_rhs, newshape=(num_bus - 1, 1)), out=bus_acl_delta_k_float)
+                sum_rows(bus_acl_delta_k_float, out=w_acl_k_rhs)
+            w_acl_k_rhs = v_acl_k_inv * w_acl_k_rhs
+            if not w_endpoint_rows:
+                numpy.multiply(
+                    w_acl_k, numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)), out=bus_acl_delta_k_float) #subtract this from A^-1 p
+            end_time = time.time()
+            phase_time['apply_w_v_wt_time'] += (end_time - start_time)
+
+            # compute bus theta delta term under DCL outages - from RHS
+            start_time = time.time()
+            bus_dcl_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
+            nonref_bus_dcl_inc[:, dcl_delta_k].toarray(out=bus_dcl_delta_k_float_1)
+            numpy.multiply(
+                bus_dcl_delta_k_float_1,
+                numpy.reshape(dcl_p[dcl_delta_k], newshape=(1, num_dcl_delta_k)),
+                out=bus_dcl_delta_k_float_1)
+            if t_use_smw:
+                bus_dcl_delta_k_float[:] = a_factors.solve(bus_dcl_delta_k_float_1)
+                if t_num_br_delta_t[t] > 0:
+                    w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_dcl_delta_k_float_1)
+                    w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
+                    dot_out(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_dcl_delta_k_float_1)
+                    numpy.subtract(bus_dcl_delta_k_float, bus_dcl_delta_k_float_1, out=bus_dcl_delta_k_float)
+            else:
+                bus_dcl_delta_k_float[:] = a_factors_t.solve(bus_dcl_delta_k_float_1)
+            numpy.negative(bus_dcl_delta_k_float, out=bus_dcl_delta_k_float) # could eliminate this
+            end_time = time.time()
+            phase_time['compute_bus_dtheta_rhs_dcl_k_time'] += (end_time - start_time)
+
+            # todo - definitely some benefit from treating xfr with phi==0 as acl - only if we have large cases with many xfr outage contingencies
+            # compute bus theta delta term under XFR outages - from rhs
+            start_time = time.time()
+            numpy.multiply(xfr_b[xfr_delta_k], xfr_phi[xfr_delta_k], out=xfr_delta_k_float)
+            numpy.multiply(xfr_u[xfr_delta_k], xfr_delta_k_float, out=xfr_delta_k_float)
+            if w_endpoint_rows:
+                # W_k^T (p + M_k b_k phi_k) = M_k^T theta + (M_k^T W_k) b_k phi_k,
+                # and the delta term is W_k (w_xfr_k_rhs - b_k phi_k)
+                w_xfr_k_rhs = br_theta[num_acl + xfr_delta_k] + w_xfr_k[num_acl + xfr_delta_k, numpy.arange(num_xfr_delta_k)] * xfr_delta_k_float
+                w_xfr_k_rhs = v_xfr_k_inv * w_xfr_k_rhs
+                numpy.subtract(w_xfr_k_rhs, xfr_delta_k_float, out=w_xfr_k_rhs)
+            else:
+                bus_xfr_delta_k_float_1[:] = 0.0 # todo does toarray do this already?
+                nonref_bus_xfr_inc[:, xfr_delta_k].toarray(out=bus_xfr_delta_k_float_1)
+                numpy.multiply(
+                    bus_xfr_delta_k_float_1,
+                    numpy.reshape(xfr_delta_k_float, newshape=(1, num_xfr_delta_k)),
+                    out=bus_xfr_delta_k_float_1)
+                if t_use_smw:
+                    bus_xfr_delta_k_float[:] = a_factors.solve(bus_xfr_delta_k_float_1)
+                    if t_num_br_delta_t[t] > 0:
+                        w_t_bus_rhs = w_br_t[:, t_br_delta_t_in_br_delta_t].transpose().dot(bus_xfr_delta_k_float_1)
+                        w_t_bus_rhs = scipy.linalg.lu_solve(v_t_factors, w_t_bus_rhs)
+                        dot_out(w_br_t[:, t_br_delta_t_in_br_delta_t], w_t_bus_rhs, out=bus_xfr_delta_k_float_2)
+                        numpy.subtract(bus_xfr_delta_k_float, bus_xfr_delta_k_float_2, out=bus_xfr_delta_k_float)
+                else:
+                    bus_xfr_delta_k_float[:] = a_factors_t.solve(bus_xfr_delta_k_float_1)
+                numpy.add(
+                    numpy.reshape(bus_rhs, newshape=(num_bus - 1, 1)), bus_xfr_delta_k_float_1, out=bus_xfr_delta_k_float_1)
+                w_xfr_k_rhs = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
+                numpy.multiply(w_xfr_k, bus_xfr_delta_k_float_1, out=bus_xfr_delta_k_float_2)
+                sum_rows(bus_xfr_delta_k_float_2, out=w_xfr_k_rhs)
+                w_xfr_k_rhs = v_xfr_k_inv * w_xfr_k_rhs
+                numpy.multiply(
+                    w_xfr_k, numpy.reshape(w_xfr_k_rhs, newshape=(1, num_xfr_delta_k)), out=bus_xfr_delta_k_float_1)
+                numpy.subtract(bus_xfr_delta_k_float_1, bus_xfr_delta_k_float, out=bus_xfr_delta_k_float) #subtract this from A^-1 p
+            end_time = time.time()
+            phase_time['compute_w_v_wt_xfr_k_time'] += (end_time - start_time)
+
+            # todo we do not need this separate block
+            # compute bus theta delta term under XFR outages - from w rank 1 update of matrix
+            # todo
+            start_time = time.time()
+            #w_acl_k_rhs = numpy.dot(w_acl_k.transpose(), bus_rhs)
+            #w_acl_k_rhs = v_acl_k_inv * w_acl_k_rhs
+            #bus_acl_delta_k_float[:] = w_acl_k * numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)) #subtract this from A^-1 p
+            #bus_xfr_delta_k_float[:] = 0.0 # todo this is a placeholder
+            end_time = time.time()
+            phase_time['compute_bus_dtheta_rhs_xfr_k_time'] += (end_time - start_time)
+    
+            # compute AC branch flow deltas under ACL outages
+            # this is somewhat expensive ~9 s
+            # might be able to apply the idea on eliminating AC line computations that cannot possibly lead to violation
+            # apply M, phi, B to get AC branch flows
+            start_time = time.time()
+            #numpy.multiply(nonref_bus_br_inc.transpose(), bus_acl_delta_k_float, out=br_acl_delta_k_float)
+            if w_endpoint_rows:
+                numpy.multiply(
+                    w_acl_k, numpy.reshape(w_acl_k_rhs, newshape=(1, num_acl_delta_k)), out=br_acl_delta_k_float)
+            else:
+                br_acl_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_acl_delta_k_float)
+            numpy.multiply(
+                numpy.reshape(br_b_t, newshape=(num_br, 1)), br_acl_delta_k_float, out=br_acl_delta_k_float)
+            # zero out br-acl-delta-k that are outaged
+            # this is correct, but still need to do it again after adding
+            # it is not necessary to do it here for correctness,
+            # but if we do not do it here, then we lose much of the gain from filtering the delta terms
+            # drops number of branches down from ~1700 (out of 3000) to ~40
+            br_acl_delta_k_float[br_acl_delta_k_out_idx_lists] = 0.0
+            end_time = time.time()
+            phase_time['compute_br_acl_delta_k_p_delta_time'] += (end_time - start_time)
+    
+            # compute AC branch flow deltas under DCL outages
+            start_time = time.time()
+            br_dcl_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_dcl_delta_k_float)
+            numpy.multiply(
+                numpy.reshape(br_b_t, newshape=(num_br, 1)), br_dcl_delta_k_float, out=br_dcl_delta_k_float)
+            # zero-out step not necessary here since
+            # these contingencies are DC line outages and we are computing AC branch flow
+            end_time = time.time()
+            phase_time['compute_br_dcl_delta_k_p_delta_time'] += (end_time - start_time)
+    
+            # compute AC branch flow deltas under XFR outages
+            start_time = time.time()
+            if w_endpoint_rows:
+                numpy.multiply(
+                    w_xfr_k, numpy.reshape(w_xfr_k_rhs, newshape=(1, num_xfr_delta_k)), out=br_xfr_delta_k_float)
+            else:
+                br_xfr_delta_k_float[:] = nonref_bus_br_inc.transpose().dot(bus_xfr_delta_k_float)
+            numpy.multiply(
+                numpy.reshape(br_b_t, newshape=(num_br, 1)), br_xfr_delta_k_float, out=br_xfr_delta_k_float)
+            br_xfr_delta_k_float[br_xfr_delta_k_out_idx_lists] = 0.0
+            end_time = time.time()
+            phase_time['compute_br_xfr_delta_k_p_delta_time'] += (end_time - start_time)
+
+        # reduced precision - find the contingencies to evaluate again
+        if recheck is not None:
+            start_time = time.time()
+            tol = self.float32_recheck_tol
+            recheck['acl'] = acl_cols[get_recheck_cols(
+                br_acl_delta_k_float, br_p, br_q, br_s_max, br_acl_delta_k_out_idx_lists, tol)]
+            recheck['dcl'] = dcl_cols[get_recheck_cols(
+                br_dcl_delta_k_float, br_p, br_q, br_s_max, None, tol)]
+            recheck['xfr'] = xfr_cols[get_recheck_cols(
+                br_xfr_delta_k_float, br_p, br_q, br_s_max, br_xfr_delta_k_out_idx_lists, tol)]
+            end_time = time.time()
+            phase_time['float32_recheck_time'] += (end_time - start_time)
+            return {
+                'w_acl_k': w_acl_k,
+                'w_xfr_k': w_xfr_k,
+                'v_acl_k_inv': v_acl_k_inv,
+                'v_xfr_k_inv': v_xfr_k_inv}
 
         # before adding, eliminate entries that do not need to be added because they cannot exceed the limit
         # that could reduce the compute time (and memory use)
@@ -644,14 +3010,14 @@ def eval_post_contingency_model(sol_eval):
         numpy.power(br_float, 0.5, out=br_float)
         numpy.subtract(br_float, br_s_max, out=br_float)
         numpy.maximum(0.0, br_float, out=br_float)
-        # do we want a list of nonzero indices?
-        # or a boolean array with true at the nonzero indices and false at the others?
-        numpy.greater(br_float, 0.0, out=br_bool_1)
+        # list of the branches that can possibly exceed the limit, for screening
         br_viol_list_acl_k = numpy.nonzero(br_float)[0]
         num_br_viol_list_acl_k = br_viol_list_acl_k.size
         print('num AC branches with possible violations in ACL contingencies: {}'.format(num_br_viol_list_acl_k))
+        t_data['filter_counts']['acl'][0] += num_br_viol_list_acl_k
+        t_data['filter_counts']['acl'][1] += num_br
         end_time = time.time()
-        filter_branches_acl_k_time += (end_time - start_time)
+        phase_time['filter_branches_acl_k_time'] += (end_time - start_time)
 
         # before adding, eliminate entries that do not need to be added because they cannot exceed the limit
         start_time = time.time()
@@ -671,12 +3037,13 @@ def eval_post_contingency_model(sol_eval):
         numpy.power(br_float, 0.5, out=br_float)
         numpy.subtract(br_float, br_s_max, out=br_float)
         numpy.maximum(0.0, br_float, out=br_float)
-        numpy.greater(br_float, 0.0, out=br_bool_2)
         br_viol_list_dcl_k = numpy.nonzero(br_float)[0]
         num_br_viol_list_dcl_k = br_viol_list_dcl_k.size
         print('num AC branches with possible violations in DCL contingencies: {}'.format(num_br_viol_list_dcl_k))
+        t_data['filter_counts']['dcl'][0] += num_br_viol_list_dcl_k
+        t_data['filter_counts']['dcl'][1] += num_br
         end_time = time.time()
-        filter_branches_dcl_k_time += (end_time - start_time)
+        phase_time['filter_branches_dcl_k_time'] += (end_time - start_time)
 
         # before adding, eliminate entries that do not need to be added because they cannot exceed the limit
         start_time = time.time()
@@ -696,256 +3063,577 @@ def eval_post_contingency_model(sol_eval):
         numpy.power(br_float, 0.5, out=br_float)
         numpy.subtract(br_float, br_s_max, out=br_float)
         numpy.maximum(0.0, br_float, out=br_float)
-        numpy.greater(br_float, 0.0, out=br_bool_3)
         br_viol_list_xfr_k = numpy.nonzero(br_float)[0]
         num_br_viol_list_xfr_k = br_viol_list_xfr_k.size
         print('num AC branches with possible violations in XFR contingencies: {}'.format(num_br_viol_list_xfr_k))
+        t_data['filter_counts']['xfr'][0] += num_br_viol_list_xfr_k
+        t_data['filter_counts']['xfr'][1] += num_br
         end_time = time.time()
-        filter_branches_xfr_k_time += (end_time - start_time)
+        phase_time['filter_branches_xfr_k_time'] += (end_time - start_time)
+
+        # worst violations and penalties for this chunk
+        chunk_viol_idx = {}
+        chunk_top = (None if t_data['top_viol'] is None else TopViolations(self.top_k, t))
+
+        # screening mode:
+        # compute the post-contingency flow limit violations, the worst violations, and the penalties
+        # only on the branches that can possibly exceed the limit in some contingency,
+        # as found from the upper bounds above, gathered into compact arrays of those rows.
+        # on every other branch the violation is exactly 0 in every contingency,
+        # so the penalties and the worst violations are the same as from the exhaustive computation.
+        # the post-contingency flows on the other branches are not computed,
+        # so a post-contingency power balance check could not be done on them
+        if br_filter_by_worst_ctg:
+
+            # compute AC branch flow violations on the screened branches
+            start_time = time.time()
+            br_acl_delta_k_s_over = get_br_k_s_over_rows(
+                br_acl_delta_k_float, br_viol_list_acl_k, br_p, br_q, br_s_max, br_acl_delta_k_out_idx_lists,
+                get_work_buf(work, 'br_acl_delta_k_s_over', num_br_viol_list_acl_k * num_acl_delta_k), work['br_rows_float'])
+            br_dcl_delta_k_s_over = get_br_k_s_over_rows(
+                br_dcl_delta_k_float, br_viol_list_dcl_k, br_p, br_q, br_s_max, None,
+                get_work_buf(work, 'br_dcl_delta_k_s_over', num_br_viol_list_dcl_k * num_dcl_delta_k), work['br_rows_float'])
+            br_xfr_delta_k_s_over = get_br_k_s_over_rows(
+                br_xfr_delta_k_float, br_viol_list_xfr_k, br_p, br_q, br_s_max, br_xfr_delta_k_out_idx_lists,
+                get_work_buf(work, 'br_xfr_delta_k_s_over', num_br_viol_list_xfr_k * num_xfr_delta_k), work['br_rows_float'])
+            end_time = time.time()
+            phase_time['compute_br_k_s_over_screened_time'] += (end_time - start_time)
+
+            # get worst violations on the screened branches
+            start_time = time.time()
+            if num_acl_delta_k > 0:
+                merge_viol_idx_rows(
+                    chunk_viol_idx, 'acl_acl_delta_k', br_acl_delta_k_s_over, br_viol_list_acl_k, num_acl, acl_cols, chunk_top)
+                merge_viol_idx_rows(
+                    chunk_viol_idx, 'xfr_acl_delta_k', br_acl_delta_k_s_over, br_viol_list_acl_k, num_xfr, acl_cols, chunk_top)
+            if num_dcl_delta_k > 0:
+                merge_viol_idx_rows(
+                    chunk_viol_idx, 'acl_dcl_delta_k', br_dcl_delta_k_s_over, br_viol_list_dcl_k, num_acl, dcl_cols, chunk_top)
+                merge_viol_idx_rows(
+                    chunk_viol_idx, 'xfr_dcl_delta_k', br_dcl_delta_k_s_over, br_viol_list_dcl_k, num_xfr, dcl_cols, chunk_top)
+            if num_xfr_delta_k > 0:
+                merge_viol_idx_rows(
+                    chunk_viol_idx, 'acl_xfr_delta_k', br_xfr_delta_k_s_over, br_viol_list_xfr_k, num_acl, xfr_cols, chunk_top)
+                merge_viol_idx_rows(
+                    chunk_viol_idx, 'xfr_xfr_delta_k', br_xfr_delta_k_s_over, br_viol_list_xfr_k, num_xfr, xfr_cols, chunk_top)
+            end_time = time.time()
+            phase_time['get_max_br_k_s_over_screened_time'] += (end_time - start_time)
+
+            # compute AC branch flow penalties on the screened branches
+            start_time = time.time()
+            sum_rows(br_acl_delta_k_s_over, out=acl_delta_k_float)
+            numpy.multiply(self.t_d[t] * self.c_s, acl_delta_k_float, out=acl_delta_k_float)
+            sum_rows(br_dcl_delta_k_s_over, out=dcl_delta_k_float)
+            numpy.multiply(self.t_d[t] * self.c_s, dcl_delta_k_float, out=dcl_delta_k_float)
+            sum_rows(br_xfr_delta_k_s_over, out=xfr_delta_k_float)
+            numpy.multiply(self.t_d[t] * self.c_s, xfr_delta_k_float, out=xfr_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_k_z_time'] += (end_time - start_time)
+
+        # exhaustive computation on all branches
+        if not br_filter_by_worst_ctg:
+
+            # add br_p delta term from base case br_p to get post-k br_p
+            start_time = time.time()
+            numpy.add(
+                numpy.reshape(br_p, newshape=(num_br, 1)), br_acl_delta_k_float, out=br_acl_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_acl_delta_k_p_time'] += (end_time - start_time)
+
+            # add br_p delta term from base case br_p to get post-k br_p - dcl k
+            start_time = time.time()
+            numpy.add(
+                numpy.reshape(br_p, newshape=(num_br, 1)), br_dcl_delta_k_float, out=br_dcl_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_dcl_delta_k_p_time'] += (end_time - start_time)
+
+            # add br_p delta term from base case br_p to get post-k br_p - xfr k
+            start_time = time.time()
+            numpy.add(
+                numpy.reshape(br_p, newshape=(num_br, 1)), br_xfr_delta_k_float, out=br_xfr_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_xfr_delta_k_p_time'] += (end_time - start_time)
+
+            # compute AC branch flow violations under ACL outages
+            # this is expensive ~83 s but reduced hugely to about 2 or 3 s by
+            # eliminating AC branch computations that cannot possibly lead to violation
+            # as in HIPPO SFT, i.e. the screening mode above.
+            # using that idea requires a couple of extra steps, including filtering the branches,
+            # which take a few seconds.
+            # but the time saved is typically much greater.
+            # The benefit of this relies on the fact that usually, the number of branches that exceed their limit
+            # in at least one contingency is very small
+            # this in turn depends on enforcing the base case constraints,
+            # but it should be noted that many branches will automatically be within their limits in the base case
+            # as long as just a few critical ones are controlled.
+            # this redundancy is critical to many security constraint evaluation and enforcement techniques.
+            start_time = time.time()
+            numpy.power(br_acl_delta_k_float, 2, out=br_acl_delta_k_float)
+            numpy.add(
+                br_acl_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
+                out=br_acl_delta_k_float)
+            numpy.power(br_acl_delta_k_float, 0.5, out=br_acl_delta_k_float)
+            numpy.subtract(
+                br_acl_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_acl_delta_k_float)
+            numpy.maximum(0.0, br_acl_delta_k_float, out=br_acl_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_acl_delta_k_s_over_time'] += (end_time - start_time)
+
+            # compute AC branch flow violations under DCL outages
+            start_time = time.time()
+            numpy.power(br_dcl_delta_k_float, 2, out=br_dcl_delta_k_float)
+            numpy.add(
+                br_dcl_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
+                out=br_dcl_delta_k_float)
+            numpy.power(br_dcl_delta_k_float, 0.5, out=br_dcl_delta_k_float)
+            numpy.subtract(
+                br_dcl_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_dcl_delta_k_float)
+            numpy.maximum(0.0, br_dcl_delta_k_float, out=br_dcl_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_dcl_delta_k_s_over_time'] += (end_time - start_time)
+
+            # compute AC branch flow violations under XFR outages
+            start_time = time.time()
+            numpy.power(br_xfr_delta_k_float, 2, out=br_xfr_delta_k_float)
+            numpy.add(
+                br_xfr_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
+                out=br_xfr_delta_k_float)
+            numpy.power(br_xfr_delta_k_float, 0.5, out=br_xfr_delta_k_float)
+            numpy.subtract(
+                br_xfr_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_xfr_delta_k_float)
+            numpy.maximum(0.0, br_xfr_delta_k_float, out=br_xfr_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_xfr_delta_k_s_over_time'] += (end_time - start_time)
+
+            # zero out flows for branch-contingency pairs where the branch is out of service
+            # may need to use this multiple times so time it - it should be trivial
+            # not needed on DC lines since the outaged branch is not in the computed branches
+            start_time = time.time()
+            br_acl_delta_k_float[br_acl_delta_k_out_idx_lists] = 0.0
+            br_xfr_delta_k_float[br_xfr_delta_k_out_idx_lists] = 0.0
+            end_time = time.time()
+            phase_time['zero_out_time'] += (end_time - start_time)
+
+            # get worst violations under ACL outages
+            start_time = time.time()
+            if num_acl_delta_k > 0:
+                # on acl
+                merge_viol_idx(chunk_viol_idx, 'acl_acl_delta_k', br_acl_delta_k_float[0:num_acl, :], acl_cols, chunk_top)
+                # on xfr
+                merge_viol_idx(chunk_viol_idx, 'xfr_acl_delta_k', br_acl_delta_k_float[0:num_xfr, :], acl_cols, chunk_top)
+            end_time = time.time()
+            phase_time['get_max_br_acl_delta_k_s_over_time'] += (end_time - start_time)
+
+            # get worst violations under DCL outages
+            start_time = time.time()
+            if num_dcl_delta_k > 0:
+                # on acl
+                merge_viol_idx(chunk_viol_idx, 'acl_dcl_delta_k', br_dcl_delta_k_float[0:num_acl, :], dcl_cols, chunk_top)
+                # on xfr
+                merge_viol_idx(chunk_viol_idx, 'xfr_dcl_delta_k', br_dcl_delta_k_float[0:num_xfr, :], dcl_cols, chunk_top)
+            end_time = time.time()
+            phase_time['get_max_br_dcl_delta_k_s_over_time'] += (end_time - start_time)
+
+            # get worst violations under XFR outages
+            start_time = time.time()
+            if num_xfr_delta_k > 0:
+                # on acl
+                merge_viol_idx(chunk_viol_idx, 'acl_xfr_delta_k', br_xfr_delta_k_float[0:num_acl, :], xfr_cols, chunk_top)
+                # on xfr
+                merge_viol_idx(chunk_viol_idx, 'xfr_xfr_delta_k', br_xfr_delta_k_float[0:num_xfr, :], xfr_cols, chunk_top)
+            end_time = time.time()
+            phase_time['get_max_br_xfr_delta_k_s_over_time'] += (end_time - start_time)
+
+            # compute AC branch flow penalties
+            # t_d[t] * c_s * viol
+            start_time = time.time()
+            # acl out
+            sum_rows(br_acl_delta_k_float, out=acl_delta_k_float)
+            numpy.multiply(self.t_d[t] * self.c_s, acl_delta_k_float, out=acl_delta_k_float)
+            # dcl out
+            sum_rows(br_dcl_delta_k_float, out=dcl_delta_k_float)
+            numpy.multiply(self.t_d[t] * self.c_s, dcl_delta_k_float, out=dcl_delta_k_float)
+            # xfr out
+            sum_rows(br_xfr_delta_k_float, out=xfr_delta_k_float)
+            numpy.multiply(self.t_d[t] * self.c_s, xfr_delta_k_float, out=xfr_delta_k_float)
+            end_time = time.time()
+            phase_time['compute_br_k_z_time'] += (end_time - start_time)
 
-        # add br_p delta term from base case br_p to get post-k br_p - only on filtered branches
+        # acl_delta_k_float, dcl_delta_k_float, and xfr_delta_k_float
+        # have the total penalties for this t under ACL, DCL, and XFR outages
+        # need to collect these into total penalty for this t under each contingency
+        # goes into sol_eval.t_k_z (with minus sign), via k_z
         start_time = time.time()
-        numpy.add(
-            numpy.reshape(br_p, newshape=(num_br, 1)), br_acl_delta_k_float, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        k_z[k_out_is_acl_list] = (-1.0) * acl_delta_k_float[k_out_is_acl_acl_delta_k_list]
+        k_z[k_out_is_dcl_list] = (-1.0) * dcl_delta_k_float[k_out_is_dcl_dcl_delta_k_list]
+        k_z[k_out_is_xfr_list] = (-1.0) * xfr_delta_k_float[k_out_is_xfr_xfr_delta_k_list]
+        for i, v in chunk_viol_idx.items():
+            merge_viol(t_viol_idx, i, v[0], v[1], v[2])
+        if chunk_top is not None:
+            t_data['top_viol'].update(chunk_top)
         end_time = time.time()
-        compute_br_acl_delta_k_p_time += (end_time - start_time)
-
-        # add br_p delta term from base case br_p to get post-k br_p - only on filtered branches - dcl k
+        phase_time['collect_penalties_into_obj_array_time'] += (end_time - start_time)
+
+        chunk_new_w = {
+            'w_acl_k': w_acl_k,
+            'w_xfr_k': w_xfr_k,
+            'v_acl_k_inv': v_acl_k_inv,
+            'v_xfr_k_inv': v_xfr_k_inv}
+        if k_bounds is not None:
+            chunk_new_w.update(k_bounds)
+        return chunk_new_w
+
+    def get_k_bounds(self, sol, t_data, chunk, w_acl_k, w_xfr_k):
+        '''
+        topology dependent bounds for ctg_prune, for the contingencies in one chunk:
+        * i_k_lodf_max - for i in acl, dcl, xfr, the max over AC branches of |b_t M^T W_k| for each outage of type i,
+          i.e. the largest change in a branch flow per unit of the coefficient of the outage, see get_prune_cols().
+          for acl this is the max LODF. for dcl, W_k = A_t^-1 M_k, like the PTDF of the DC line
+        * xfr_k_w_diag - M_k^T W_k for each xfr outage
+        '''
+
+        num_acl = self.num_acl
+        num_br = self.num_br
+        nonref_bus_br_inc = self.nonref_bus_br_inc
+        xfr_delta_k = self.xfr_delta_k[chunk['xfr_index']]
+        dcl_delta_k = self.dcl_delta_k[chunk['dcl_index']]
+        br_b_t = numpy.reshape(numpy.absolute(t_data['br_b_t']), newshape=(num_br, 1))
+
+        if self.w_endpoint_rows:
+            l_acl_k = w_acl_k
+            l_xfr_k = w_xfr_k
+        else:
+            l_acl_k = nonref_bus_br_inc.transpose().dot(w_acl_k)
+            l_xfr_k = nonref_bus_br_inc.transpose().dot(w_xfr_k)
+        if dcl_delta_k.size > 0:
+            l_dcl_k = nonref_bus_br_inc.transpose().dot(
+                self.solve_t(sol, t_data, self.nonref_bus_dcl_inc[:, dcl_delta_k].toarray()))
+        else:
+            l_dcl_k = numpy.zeros(shape=(num_br, 0), dtype=float)
+        return {
+            'acl_k_lodf_max': numpy.amax(br_b_t * numpy.absolute(l_acl_k), axis=0),
+            'dcl_k_lodf_max': numpy.amax(br_b_t * numpy.absolute(l_dcl_k), axis=0),
+            'xfr_k_lodf_max': numpy.amax(br_b_t * numpy.absolute(l_xfr_k), axis=0),
+            'xfr_k_w_diag': l_xfr_k[num_acl + xfr_delta_k, numpy.arange(xfr_delta_k.size)]}
+
+    def get_prune_cols(self, t_data, chunk, k_bounds, v_acl_k_inv, v_xfr_k_inv, br_p):
+        '''
+        positions in the chunk of the contingencies that might have a violation in t, for i in acl, dcl, xfr.
+        the others are pruned.
+
+        under the outage of a branch k the flow delta on each AC branch is a column of the LODF-like matrix
+        b_t M^T W_k, see get_k_bounds(), times a coefficient c_k:
+        * acl - c_k = V_k^-1 M_k^T theta
+        * xfr - c_k = V_k^-1 (M_k^T theta + M_k^T W_k b_k phi_k) - b_k phi_k
+        * dcl - c_k = p_k
+        so the flow delta is at most lodf_max_k |c_k| on every branch. a branch l with s_max_l >= |q_l|
+        is within its limit as long as |p_l + delta| <= a_l = (s_max_l^2 - q_l^2)^(1/2), which holds if
+        |delta| <= a_l - |p_l|. the contingency is pruned if the bound is within the smallest such margin over the
+        branches in service, so that it has penalty 0 and worst violation 0, as if its flows were computed.
+        a relative tolerance of 1e-9 on the bound and the margins covers the rounding in the flows.
+        nothing is pruned if a branch is over its limit in the base case.
+        '''
+
+        tol = 1e-9
+        num_acl = self.num_acl
+        br_s_max = self.br_s_max
+        acl_delta_k = self.acl_delta_k[chunk['acl_index']]
+        dcl_delta_k = self.dcl_delta_k[chunk['dcl_index']]
+        xfr_delta_k = self.xfr_delta_k[chunk['xfr_index']]
+        br_q = t_data['br_q']
+        br_b_t = t_data['br_b_t']
+        br_theta = t_data['br_theta']
+
+        # smallest margin. branches out of service have no flow delta and only need to be within the limit in the base case
+        br_a = numpy.power(br_s_max, 2) - numpy.power(br_q, 2)
+        br_in_limit = (br_a >= 0.0)
+        br_a = numpy.sqrt(numpy.maximum(br_a, 0.0))
+        br_p_abs = numpy.absolute(br_p)
+        br_margin = br_a - br_p_abs - tol * (br_a + br_p_abs)
+        br_margin[br_b_t == 0.0] = numpy.inf
+        br_margin[numpy.logical_not(br_in_limit)] = -numpy.inf
+        margin = numpy.amin(br_margin)
+
+        # coefficients
+        xfr_phi_k = self.xfr_b[xfr_delta_k] * t_data['xfr_phi'][xfr_delta_k] * t_data['xfr_u'][xfr_delta_k]
+        c_k = {
+            'acl': v_acl_k_inv * br_theta[acl_delta_k],
+            'dcl': t_data['dcl_p'][dcl_delta_k],
+            'xfr': v_xfr_k_inv * (br_theta[num_acl + xfr_delta_k] + k_bounds['xfr_k_w_diag'] * xfr_phi_k) - xfr_phi_k}
+
+        keep = {}
+        for i in ['acl', 'dcl', 'xfr']:
+            bound = (k_bounds[i + '_k_lodf_max'] + tol) * numpy.absolute(c_k[i]) * (1.0 + tol)
+            keep[i] = numpy.flatnonzero(numpy.logical_not(bound <= margin))
+        return keep
+
+    def eval_t_chunk_run(
+            self, sol, t_data, chunk, w_acl_k, w_xfr_k, v_acl_k_inv, v_xfr_k_inv,
+            br_acl_delta_k_float, br_dcl_delta_k_float, br_xfr_delta_k_float, phase_time):
+        '''
+        AC branch flow deltas in one t of a run, with ctg_time_batch, see eval_run().
+
+        the branches in service are the same in every t of the run, so the flow delta under outage k in t is
+
+            br_k_p_delta[:, k] = br_k[:, k] * c[k, t],
+
+        with br_k, like LODFs, the same in every t of the run:
+        * acl, xfr: br_k = diag(b_t) M^T W_k
+        * dcl: br_k = -diag(b_t) M^T A_t^-1 M_k
+        and the coefficients c, for all t of the run:
+        * acl: V_k^-1 W_k^T p_t
+        * xfr: V_k^-1 (W_k^T p_t + M_k^T W_k b_k phi_kt) - b_k phi_kt
+        * dcl: p_kt, the DC line flow
+        where W_k^T p_t for all t is a single dense matrix product, or with ctg_w_endpoint_rows,
+        the base case theta difference across the outaged branch.
+        these are computed on the first t of the run, and in each t the deltas are a single product.
+        br_acl_delta_k_float, br_dcl_delta_k_float, br_xfr_delta_k_float are set here.
+        '''
+
+        num_acl = self.num_acl
+        num_br = self.num_br
+        nonref_bus_br_inc = self.nonref_bus_br_inc
+        acl_delta_k = self.acl_delta_k[chunk['acl_index']]
+        dcl_delta_k = self.dcl_delta_k[chunk['dcl_index']]
+        xfr_delta_k = self.xfr_delta_k[chunk['xfr_index']]
+        num_acl_delta_k = acl_delta_k.size
+        num_dcl_delta_k = dcl_delta_k.size
+        num_xfr_delta_k = xfr_delta_k.size
+        t = t_data['t']
+        br_b_t = numpy.reshape(t_data['br_b_t'], newshape=(num_br, 1))
+        xfr_u = t_data['xfr_u']
+        run = t_data['run']
+        ts = run['t']
+
+        # br_k and the coefficients for the run
         start_time = time.time()
-        numpy.add(
-            numpy.reshape(br_p, newshape=(num_br, 1)), br_dcl_delta_k_float, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        if 'br_acl_k' not in run:
+            xfr_phi_run = (
+                numpy.reshape(self.xfr_b[xfr_delta_k] * xfr_u[xfr_delta_k], newshape=(num_xfr_delta_k, 1)) *
+                sol.xfr_t_phi[numpy.ix_(xfr_delta_k, ts)])
+            if self.w_endpoint_rows:
+                run['br_acl_k'] = br_b_t * w_acl_k
+                run['br_xfr_k'] = br_b_t * w_xfr_k
+                acl_k_rhs = run['br_theta'][acl_delta_k, :]
+                xfr_k_rhs = run['br_theta'][num_acl + xfr_delta_k, :]
+                xfr_k_w = w_xfr_k[num_acl + xfr_delta_k, numpy.arange(num_xfr_delta_k)]
+            else:
+                run['br_acl_k'] = br_b_t * nonref_bus_br_inc.transpose().dot(w_acl_k)
+                run['br_xfr_k'] = br_b_t * nonref_bus_br_inc.transpose().dot(w_xfr_k)
+                acl_k_rhs = w_acl_k.transpose().dot(run['bus_rhs'])
+                xfr_k_rhs = w_xfr_k.transpose().dot(run['bus_rhs'])
+                xfr_k_w = numpy.zeros(shape=(num_xfr_delta_k, ), dtype=float)
+                sum_rows(self.m_xfr_k[:, chunk['xfr_index']] * w_xfr_k, out=xfr_k_w)
+            run['br_acl_k'][chunk['br_acl_delta_k_out_idx_lists']] = 0.0
+            run['br_xfr_k'][chunk['br_xfr_delta_k_out_idx_lists']] = 0.0
+            run['acl_k_coef'] = numpy.reshape(v_acl_k_inv, newshape=(num_acl_delta_k, 1)) * acl_k_rhs
+            run['xfr_k_coef'] = (
+                numpy.reshape(v_xfr_k_inv, newshape=(num_xfr_delta_k, 1)) *
+                (xfr_k_rhs + numpy.reshape(xfr_k_w, newshape=(num_xfr_delta_k, 1)) * xfr_phi_run) - xfr_phi_run)
+            bus_dcl_k = self.solve_t(sol, t_data, self.nonref_bus_dcl_inc[:, dcl_delta_k].toarray())
+            run['br_dcl_k'] = (-1.0 * br_b_t) * nonref_bus_br_inc.transpose().dot(bus_dcl_k)
+            run['dcl_k_coef'] = sol.dcl_t_p[numpy.ix_(dcl_delta_k, ts)]
         end_time = time.time()
-        compute_br_dcl_delta_k_p_time += (end_time - start_time)
+        phase_time['compute_br_k_run_time'] += (end_time - start_time)
 
-        # add br_p delta term from base case br_p to get post-k br_p - only on filtered branches - xfr k
+        # flow deltas in t
         start_time = time.time()
-        numpy.add(
-            numpy.reshape(br_p, newshape=(num_br, 1)), br_xfr_delta_k_float, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        end_time = time.time()
-        compute_br_xfr_delta_k_p_time += (end_time - start_time)
-
-        # compute AC branch flow violations under ACL outages
-        # this is expensive ~83 s but reduced hugely to about 2 or 3 s by
-        # eliminating AC branch computations that cannot possibly lead to violation
-        # as in HIPPO SFT
-        # using that idea requires a couple of extra steps, including filtering the branches,
-        # which take a few seconds.
-        # but the time saved is typically much greater.
-        # The benefit of this relies on the fact that usually, the number of branches that exceed their limit
-        # in at least one contingency is very small
-        # this in turn depends on enforcing the base case constraints,
-        # but it should be noted that many branches will automatically be within their limits in the base case
-        # as long as just a few critical ones are controlled.
-        # this redundancy is critical to many security constraint evaluation and enforcement techniques.
-        start_time = time.time()
-        numpy.power(br_acl_delta_k_float, 2, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.add(
-            br_acl_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
-            out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.power(br_acl_delta_k_float, 0.5, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.subtract(
-            br_acl_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.maximum(0.0, br_acl_delta_k_float, out=br_acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        i = run['t_index'][t]
+        numpy.multiply(
+            run['br_acl_k'], numpy.reshape(run['acl_k_coef'][:, i], newshape=(1, num_acl_delta_k)),
+            out=br_acl_delta_k_float)
+        numpy.multiply(
+            run['br_dcl_k'], numpy.reshape(run['dcl_k_coef'][:, i], newshape=(1, num_dcl_delta_k)),
+            out=br_dcl_delta_k_float)
+        numpy.multiply(
+            run['br_xfr_k'], numpy.reshape(run['xfr_k_coef'][:, i], newshape=(1, num_xfr_delta_k)),
+            out=br_xfr_delta_k_float)
         end_time = time.time()
-        compute_br_acl_delta_k_s_over_time += (end_time - start_time)
-
-        # compute AC branch flow violations under DCL outages
+        phase_time['compute_br_k_p_delta_run_time'] += (end_time - start_time)
+
+    def solve_t(self, sol, t_data, rhs):
+        '''
+        A_t^-1 rhs, with the A_t factors, or under SMW-t with the static factors and the factors of V_t
+        '''
+
+        if not t_data['t_use_smw']:
+            return t_data['a_factors_t'].solve(rhs)
+        x = self.a_factors.solve(rhs)
+        if sol.t_num_br_delta_t[t_data['t']] > 0:
+            w_t = sol.w_br_t[:, t_data['t_br_delta_t_in_br_delta_t']]
+            x = x - w_t.dot(scipy.linalg.lu_solve(t_data['v_t_factors'], w_t.transpose().dot(rhs)))
+        return x
+
+    def eval_t_multi(self, sol, t_data, work, w_multi, k_z, t_viol_idx, phase_time):
+        '''
+        evaluate the post-contingency model in one t on the multi-element contingencies.
+
+        a contingency k outaging the AC branches B_k in service in t, and any transformers and DC lines,
+        changes A_t by rank r = |B_k|, and by the Sherman-Morrison-Woodbury formula
+
+            theta - theta_k = W_B V_k^-1 W_B^T (p + d_k) - A_t^-1 d_k,
+
+        where W_B = A_t^-1 M_B, V_k = diag(1 / b_B) + M_B^T W_B is r by r,
+        p is the base case right hand side, and d_k is the change in the right hand side
+        from the phase shift of the outaged transformers and the flow of the outaged DC lines.
+        W = A_t^-1 M is computed once for all the branches outaged by some multi-element contingency,
+        then the contingencies are grouped by r, which varies with t,
+        and V_k^-1 W_B^T (p + d_k) is computed for each group by one batched dense solve.
+        this is done in float64 on all branches, whatever ctg_precision and ctg_screening.
+
+        w_multi - W for the multi-element contingency branches from the topology cache, or None to compute it
+        k_z, t_viol_idx - as in eval_t_chunk()
+
+        returns w_multi, or None if there are no multi-element contingencies
+        '''
+
+        if self.num_k_multi == 0:
+            return None
+
+        # problem dimensions
+        num_acl = self.num_acl
+        num_xfr = self.num_xfr
+        num_dcl = self.num_dcl
+        num_br = self.num_br
+        num_k_multi = self.num_k_multi
+        num_multi_br = self.num_multi_br
+
+        # time-varying data
+        t = t_data['t']
+        br_u = t_data['br_u']
+        xfr_u = t_data['xfr_u']
+        xfr_phi = t_data['xfr_phi']
+        dcl_p = t_data['dcl_p']
+        br_b_t = t_data['br_b_t']
+        br_q = t_data['br_q']
+        bus_rhs = work['bus_rhs']
+        br_p = work['br_p']
+
+        # W for the multi-element contingency branches
         start_time = time.time()
-        numpy.power(br_dcl_delta_k_float, 2, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.add(
-            br_dcl_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
-            out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.power(br_dcl_delta_k_float, 0.5, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.subtract(
-            br_dcl_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.maximum(0.0, br_dcl_delta_k_float, out=br_dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        if w_multi is None:
+            w_multi = self.solve_t(sol, t_data, self.m_multi)
         end_time = time.time()
-        compute_br_dcl_delta_k_s_over_time += (end_time - start_time)
+        phase_time['compute_w_multi_time'] += (end_time - start_time)
 
-        # compute AC branch flow violations under XFR outages
+        # right hand side changes d_k, the bus theta delta term -A_t^-1 d_k, and W_B^T (p + d_k) for all branches B
         start_time = time.time()
-        numpy.power(br_xfr_delta_k_float, 2, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.add(
-            br_xfr_delta_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)),
-            out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.power(br_xfr_delta_k_float, 0.5, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.subtract(
-            br_xfr_delta_k_float, numpy.reshape(br_s_max, newshape=(num_br, 1)), out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.maximum(0.0, br_xfr_delta_k_float, out=br_xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
+        bus_multi_k_rhs = (
+            self.nonref_bus_xfr_inc.dot(
+                self.multi_xfr_sel.multiply(numpy.reshape(self.xfr_b * xfr_phi * xfr_u, newshape=(num_xfr, 1)))) +
+            self.nonref_bus_dcl_inc.dot(
+                self.multi_dcl_sel.multiply(numpy.reshape(dcl_p, newshape=(num_dcl, 1))))).toarray()
+        bus_multi_k_float = self.solve_t(sol, t_data, bus_multi_k_rhs)
+        numpy.negative(bus_multi_k_float, out=bus_multi_k_float)
+        numpy.add(numpy.reshape(bus_rhs, newshape=(bus_rhs.size, 1)), bus_multi_k_rhs, out=bus_multi_k_rhs)
+        multi_br_k_rhs = w_multi.transpose().dot(bus_multi_k_rhs)
         end_time = time.time()
-        compute_br_xfr_delta_k_s_over_time += (end_time - start_time)
+        phase_time['compute_bus_dtheta_multi_k_time'] += (end_time - start_time)
 
-        # zero out flows for branch-contingency pairs where the branch is out of service
-        # may need to use this multiple times so time it - it should be trivial
-        # not needed on DC lines since the outaged branch is not in the computed branches
+        # solve with V_k, one batched solve for each rank r
         start_time = time.time()
-        br_acl_delta_k_float[br_acl_delta_k_out_idx_lists] = 0.0
-        br_xfr_delta_k_float[br_xfr_delta_k_out_idx_lists] = 0.0
+        multi_br_v = self.m_multi.transpose().dot(w_multi)
+        multi_br_b_inv = 1.0 / self.br_b[self.multi_br]
+        k_multi_br_t = [i[br_u[self.multi_br[i]] == 1] for i in self.k_multi_br] # outaged branches in service in t
+        k_rank = numpy.array([i.size for i in k_multi_br_t], dtype=int)
+        multi_br_k_float = numpy.zeros(shape=(num_multi_br, num_k_multi), dtype=float)
+        for r in sorted(list(set(k_rank))):
+            if r == 0:
+                continue
+            k_group = numpy.nonzero(k_rank == r)[0]
+            br_group = numpy.array([k_multi_br_t[k] for k in k_group], dtype=int)
+            v = multi_br_v[br_group[:, :, None], br_group[:, None, :]]
+            v[:, numpy.arange(r), numpy.arange(r)] += multi_br_b_inv[br_group]
+            multi_br_k_float[br_group, k_group[:, None]] = numpy.linalg.solve(
+                v, multi_br_k_rhs[br_group, k_group[:, None], None])[:, :, 0]
+        bus_multi_k_float += w_multi.dot(multi_br_k_float)
         end_time = time.time()
-        zero_out_time += (end_time - start_time)
+        phase_time['solve_v_multi_k_time'] += (end_time - start_time)
 
-        # get worst violations under ACL outages
+        # AC branch flow violations, worst violations, and penalties
         start_time = time.time()
-        if num_acl_delta_k > 0:
-            # on acl
-            viol = utils.get_max(
-                br_acl_delta_k_float[0:num_acl, :],
-                idx_lists=[sol_eval.problem.acl_uid, sol_eval.problem.acl_uid[acl_delta_k]])
-            if viol['val'] > max_viol_acl_acl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_acl_acl_delta_k = viol
-            # on xfr
-            viol = utils.get_max(
-                br_acl_delta_k_float[0:num_xfr, :],
-                idx_lists=[sol_eval.problem.xfr_uid, sol_eval.problem.acl_uid[acl_delta_k]])
-            if viol['val'] > max_viol_xfr_acl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_xfr_acl_delta_k = viol
-        end_time = time.time()
-        get_max_br_acl_delta_k_s_over_time += (end_time - start_time)
-
-        # get worst violations under DCL outages
-        start_time = time.time()
-        if num_dcl_delta_k > 0:
-            # on acl
-            viol = utils.get_max(
-                br_dcl_delta_k_float[0:num_acl, :],
-                idx_lists=[sol_eval.problem.acl_uid, sol_eval.problem.dcl_uid[dcl_delta_k]])
-            if viol['val'] > max_viol_acl_dcl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_acl_dcl_delta_k = viol
-            # on xfr
-            viol = utils.get_max(
-                br_dcl_delta_k_float[0:num_xfr, :],
-                idx_lists=[sol_eval.problem.xfr_uid, sol_eval.problem.dcl_uid[dcl_delta_k]])
-            if viol['val'] > max_viol_xfr_dcl_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_xfr_dcl_delta_k = viol
-        end_time = time.time()
-        get_max_br_dcl_delta_k_s_over_time += (end_time - start_time)
-
-        # get worst violations under XFR outages
-        start_time = time.time()
-        if num_xfr_delta_k > 0:
-            # on acl
-            viol = utils.get_max(
-                br_xfr_delta_k_float[0:num_acl, :],
-                idx_lists=[sol_eval.problem.acl_uid, sol_eval.problem.xfr_uid[xfr_delta_k]])
-            if viol['val'] > max_viol_acl_xfr_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_acl_xfr_delta_k = viol
-            # on xfr
-            viol = utils.get_max(
-                br_xfr_delta_k_float[0:num_xfr, :],
-                idx_lists=[sol_eval.problem.xfr_uid, sol_eval.problem.xfr_uid[xfr_delta_k]])
-            if viol['val'] > max_viol_xfr_xfr_delta_k['val']:
-                viol['idx'][2] = t
-                max_viol_xfr_xfr_delta_k = viol
-        end_time = time.time()
-        get_max_br_xfr_delta_k_s_over_time += (end_time - start_time)
-
-        # compute AC branch flow penalties
-        # t_d[t] * c_s * viol
-        start_time = time.time()
-        # acl out
-        numpy.sum(br_acl_delta_k_float, axis=0, out=acl_delta_k_float,
-            where=(numpy.reshape(br_bool_1, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.multiply(sol_eval.problem.t_d[t] * sol_eval.problem.c_s, acl_delta_k_float, out=acl_delta_k_float)
-        # dcl out
-        numpy.sum(br_dcl_delta_k_float, axis=0, out=dcl_delta_k_float,
-            where=(numpy.reshape(br_bool_2, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.multiply(sol_eval.problem.t_d[t] * sol_eval.problem.c_s, dcl_delta_k_float, out=dcl_delta_k_float)
-        # xfr out
-        numpy.sum(br_xfr_delta_k_float, axis=0, out=xfr_delta_k_float,
-            where=(numpy.reshape(br_bool_3, newshape=(num_br, 1)) if br_filter_by_worst_ctg else True))
-        numpy.multiply(sol_eval.problem.t_d[t] * sol_eval.problem.c_s, xfr_delta_k_float, out=xfr_delta_k_float)
-        end_time = time.time()
-        compute_br_k_z_time += (end_time - start_time)
-
-        # acl_delta_k_float, dcl_delta_k_float, and xfr_delta_k_float
-        # have the total penalties for this t under ACL, DCL, and XFR outages
-        # need to collect these into total penalty for this t under each contingency
-        # goes into sol_eval.t_k_z (with minus sign)
-        start_time = time.time()
-        sol_eval.t_k_z[t, k_out_is_acl_list] = (-1.0) * acl_delta_k_float[k_out_is_acl_acl_delta_k_list]
-        sol_eval.t_k_z[t, k_out_is_dcl_list] = (-1.0) * dcl_delta_k_float[k_out_is_dcl_dcl_delta_k_list]
-        sol_eval.t_k_z[t, k_out_is_xfr_list] = (-1.0) * xfr_delta_k_float[k_out_is_xfr_xfr_delta_k_list]
+        br_multi_k_float = self.nonref_bus_br_inc.transpose().dot(bus_multi_k_float)
+        numpy.multiply(numpy.reshape(br_b_t, newshape=(num_br, 1)), br_multi_k_float, out=br_multi_k_float)
+        numpy.add(numpy.reshape(br_p, newshape=(num_br, 1)), br_multi_k_float, out=br_multi_k_float)
+        numpy.power(br_multi_k_float, 2, out=br_multi_k_float)
+        numpy.add(
+            br_multi_k_float, numpy.reshape(numpy.power(br_q, 2), newshape=(num_br, 1)), out=br_multi_k_float)
+        numpy.power(br_multi_k_float, 0.5, out=br_multi_k_float)
+        numpy.subtract(br_multi_k_float, numpy.reshape(self.br_s_max, newshape=(num_br, 1)), out=br_multi_k_float)
+        numpy.maximum(0.0, br_multi_k_float, out=br_multi_k_float)
+        br_multi_k_float[self.br_multi_out_idx_lists] = 0.0
+        k_cols = numpy.arange(num_k_multi)
+        merge_viol_idx(t_viol_idx, 'acl_multi_k', br_multi_k_float[0:num_acl, :], k_cols, t_data['top_viol'])
+        merge_viol_idx(t_viol_idx, 'xfr_multi_k', br_multi_k_float[num_acl:num_br, :], k_cols, t_data['top_viol'])
+        multi_k_float = numpy.zeros(shape=(num_k_multi, ), dtype=float)
+        sum_rows(br_multi_k_float, out=multi_k_float)
+        k_z[self.k_multi] = (-1.0 * self.t_d[t] * self.c_s) * multi_k_float
         end_time = time.time()
-        collect_penalties_into_obj_array_time += (end_time - start_time)
+        phase_time['compute_br_multi_k_s_over_time'] += (end_time - start_time)
 
-        t_end_time = time.time()
-        t_computation_time[t] = t_end_time - t_start_time
-        print('t: {}, time: {}, memory_info: {}'.format(t, t_computation_time[t], utils.get_memory_info()))
-
-    # todo check result
-
-    # not needed
-    # reduce as in HIPPO SFT
-    # LHS : monitored branches (well, they are all monitored so this will not help)
-    # RHS : injection buses (generators, loads, shunts) and deal with distributed slack
-    # really this is only of value in case of repeated evaluation, as in a solver callback, not in solution eval
-
-    # not needed
-    # GPU deployment of linear algebra, as in DMC-SCY0 paper
-
-    # report worst violations
-    sol_eval.viol_acl_acl_t_s_max_ctg = max_viol_acl_acl_delta_k
-    sol_eval.viol_xfr_acl_t_s_max_ctg = max_viol_xfr_acl_delta_k
-    sol_eval.viol_acl_dcl_t_s_max_ctg = max_viol_acl_dcl_delta_k
-    sol_eval.viol_xfr_dcl_t_s_max_ctg = max_viol_xfr_dcl_delta_k
-    sol_eval.viol_acl_xfr_t_s_max_ctg = max_viol_acl_xfr_delta_k
-    sol_eval.viol_xfr_xfr_t_s_max_ctg = max_viol_xfr_xfr_delta_k
-        
-    print('initialize_m_w_time: {}'.format(initialize_m_w_time))
-    print('compute_static_w_time: {}'.format(compute_static_w_time))
-    print('get_time_varying_branch_characteristics_time: {}'.format(get_time_varying_branch_characteristics_time))
-    print('construct_a_t_time: {}'.format(construct_a_t_time))
-    print('factor_a_t_time: {}'.format(factor_a_t_time))
-    print('compute_w_with_t_a_solve_time: {}'.format(compute_w_with_t_a_solve_time))
-    print('compute_v_t_time: {}'.format(compute_v_t_time))
-    print('compute_w_with_t_smw_time: {}'.format(compute_w_with_t_smw_time))
-    print('compute_v_time: {}'.format(compute_v_time))
-    print('compute_bus_theta_with_t_a_solve_time: {}'.format(compute_bus_theta_with_t_a_solve_time))
-    print('compute_bus_theta_with_t_smw_time: {}'.format(compute_bus_theta_with_t_smw_time))
-    print('compute_br_p_time: {}'.format(compute_br_p_time))
-    print('apply_w_v_wt_time: {}'.format(apply_w_v_wt_time))
-    print('compute_bus_dtheta_rhs_dcl_k_time: {}'.format(compute_bus_dtheta_rhs_dcl_k_time))
-    print('compute_w_v_wt_xfr_k_time: {}'.format(compute_w_v_wt_xfr_k_time))
-    print('compute_bus_dtheta_rhs_xfr_k_time: {}'.format(compute_bus_dtheta_rhs_xfr_k_time))
-    print('compute_br_acl_delta_k_p_delta_time: {}'.format(compute_br_acl_delta_k_p_delta_time))
-    print('compute_br_dcl_delta_k_p_delta_time: {}'.format(compute_br_dcl_delta_k_p_delta_time))
-    print('compute_br_xfr_delta_k_p_delta_time: {}'.format(compute_br_xfr_delta_k_p_delta_time))
-    print('filter_branches_acl_k_time: {}'.format(filter_branches_acl_k_time))
-    print('filter_branches_dcl_k_time: {}'.format(filter_branches_dcl_k_time))
-    print('filter_branches_xfr_k_time: {}'.format(filter_branches_xfr_k_time))
-    print('compute_br_acl_delta_k_p_time: {}'.format(compute_br_acl_delta_k_p_time))
-    print('compute_br_dcl_delta_k_p_time: {}'.format(compute_br_dcl_delta_k_p_time))
-    print('compute_br_xfr_delta_k_p_time: {}'.format(compute_br_xfr_delta_k_p_time))
-    print('compute_br_acl_delta_k_s_over_time: {}'.format(compute_br_acl_delta_k_s_over_time))
-    print('compute_br_dcl_delta_k_s_over_time: {}'.format(compute_br_dcl_delta_k_s_over_time))
-    print('compute_br_xfr_delta_k_s_over_time: {}'.format(compute_br_xfr_delta_k_s_over_time))
-    print('zero_out_time: {}'.format(zero_out_time))
-    print('get_max_br_acl_delta_k_s_over_time: {}'.format(get_max_br_acl_delta_k_s_over_time))
-    print('get_max_br_dcl_delta_k_s_over_time: {}'.format(get_max_br_dcl_delta_k_s_over_time))
-    print('get_max_br_xfr_delta_k_s_over_time: {}'.format(get_max_br_xfr_delta_k_s_over_time))
-    print('compute_br_k_z_time: {}'.format(compute_br_k_z_time))
-    print('collect_penalties_into_obj_array_time: {}'.format(collect_penalties_into_obj_array_time))
-    print('end of contingency model method 1, memory info: {}'.format(utils.get_memory_info()))
+        return w_multi
+
+class SolutionData(object):
+    '''
+    per-solution inputs to the evaluation of a single t,
+    taken from a SolutionEvaluator,
+    so that they can be passed to workers without the whole SolutionEvaluator
+    '''
+
+    def __init__(self, sol_eval, t_br_delta_t, t_num_br_delta_t):
+
+        self.bus_t_float = sol_eval.bus_t_float
+        self.xfr_t_phi = sol_eval.xfr_t_phi
+        self.acl_t_u_on = sol_eval.acl_t_u_on
+        self.xfr_t_u_on = sol_eval.xfr_t_u_on
+        self.acl_t_q_fr = sol_eval.acl_t_q_fr
+        self.xfr_t_q_fr = sol_eval.xfr_t_q_fr
+        self.acl_t_q_to = sol_eval.acl_t_q_to
+        self.xfr_t_q_to = sol_eval.xfr_t_q_to
+        self.dcl_t_p = sol_eval.dcl_t_p
+        self.t_br_delta_t = t_br_delta_t
+        self.t_num_br_delta_t = t_num_br_delta_t
+        self.br_delta_t_map = None
+        self.m_br_t = None
+        self.w_br_t = None
+        self.l_br_t = None
+        self.t_runs = None
+        self.t_use_smw = None
+        self.t_update_in_loop = False # see ContingencyEvaluator.get_t_use_smw()
+        self.shared_arrays = None # see SharedArrays
+
+    def __getstate__(self):
+
+        return get_shared_state(self)
+
+    def __setstate__(self, state):
+
+        set_shared_state(self, state)
+
+# evaluator and solution data in a worker process of the pool in ContingencyEvaluator.eval_t_all()
+_worker_ctg_evaluator = None
+_worker_sol = None
+
+def _init_worker(ctg_evaluator, sol):
+
+    global _worker_ctg_evaluator, _worker_sol
+    _worker_ctg_evaluator = ctg_evaluator
+    _worker_sol = sol
+
+def _eval_run_worker(ts):
+
+    return _worker_ctg_evaluator.eval_run(_worker_sol, ts)
+
+def _eval_shard_worker(shard):
+
+    return _worker_ctg_evaluator.eval_shard(_worker_sol, shard)
+
+@utils.timeit
+def eval_post_contingency_model(sol_eval):
+    '''
+    evaluate the post-contingency model for one solution.
+    for repeated evaluation against the same problem,
+    construct a ContingencyEvaluator once and call its eval() method instead.
+    '''
+
+    ContingencyEvaluator(sol_eval.problem, sol_eval.config).eval(sol_eval)
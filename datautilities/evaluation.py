@@ -9,9 +9,13 @@ from datautilities import arraydata, utils, ctgmodel
 class SolutionEvaluator(object):
 
     @utils.timeit
-    def __init__(self, problem, solution, config={}):
+    def __init__(self, problem, solution, config={}, ctg_evaluator=None):
         
         self.config = config
+        # a ctgmodel.ContingencyEvaluator can be shared by evaluators of
+        # different solutions to the same problem to reuse the problem-level setup
+        self.ctg_evaluator = ctg_evaluator
+        self.ctg_top_viol_idx = None # see ctgmodel.TopViolations
         self.set_summary()
         self.set_problem(problem)
         self.set_solution(solution)
@@ -759,6 +763,14 @@ class SolutionEvaluator(object):
              'val_type': float,
              'tol': None,
              'num_indices': 2},
+            {'key': 'viol_acl_multi_t_s_max_ctg',
+             'val_type': float,
+             'tol': None,
+             'num_indices': 2},
+            {'key': 'viol_xfr_multi_t_s_max_ctg',
+             'val_type': float,
+             'tol': None,
+             'num_indices': 2},
             #'t_min_t_k_z', # this is a list of dicts and may be awkward to put in the summary - others too
             {'key': 'z',
              'val_type': float,
@@ -840,18 +852,36 @@ class SolutionEvaluator(object):
              'val_type': float,
              'tol': None,
              'num_indices': 0},
+            {'key': 'ctg_topology_cache_hits',
+             'val_type': int,
+             'tol': None,
+             'num_indices': 0},
+            {'key': 'ctg_topology_cache_misses',
+             'val_type': int,
+             'tol': None,
+             'num_indices': 0},
+            {'key': 'ctg_profile',
+             'val_type': dict,
+             'tol': None,
+             'num_indices': None},
+            {'key': 'ctg_top_viol',
+             'val_type': dict,
+             'tol': None,
+             'num_indices': None},
         ]
 
         # set up the summary items based on the structure
         for i in self.summary_structure:
             assert(not hasattr(self, i['key']))
-            setattr(self, i['key'], utils.make_empty_viol(val=i['val_type'](0), num_indices=i['num_indices']))
+            setattr(self, i['key'], utils.make_empty_viol(val=i['val_type'](), num_indices=i['num_indices']))
 
     @utils.timeit
     def set_problem(self, prob):
 
         # todo - might be more convenient to flatten the problem attributes into SolutionEvaluator
         self.problem = prob
+        # the sd window matrices, if not already built with this time_eq_tol by prob.set_from_data_model()
+        self.problem.set_sd_window_mats(self.config['time_eq_tol'])
 
     @utils.timeit
     def set_solution(self, sol):
@@ -1088,6 +1118,10 @@ class SolutionEvaluator(object):
 
         keys = [i['key'] for i in self.summary_structure]
         summary = {k: getattr(self, k, None) for k in keys}
+        # the largest post-contingency violations are kept as indices, and converted to uids only here.
+        # None if they are not computed, i.e. ctg_top_k = 0 or the post-contingency evaluation is skipped
+        summary['ctg_top_viol'] = (
+            None if self.ctg_top_viol_idx is None else self.ctg_evaluator.get_top_viol(self.ctg_top_viol_idx))
         return summary
 
     def get_infeas_summary(self):
@@ -1292,6 +1326,11 @@ class SolutionEvaluator(object):
         Then, for each contingency, the graph for that contingency is connected if and only if
         the branch going out of service is either not an AC branch or not a bridge.
 
+        A multi-element contingency, outaging more than one device, can disconnect the graph
+        without outaging a bridge, so for these the contingency graph is formed
+        and its connected components are counted.
+        A disconnecting multi-element contingency counts as one contingency bridge.
+
         '''
 
         start_time = time.time()
@@ -1320,6 +1359,10 @@ class SolutionEvaluator(object):
         ctg_violation_i0 = None
         ctg_violation_i1 = None
 
+        # connected components of the graph of a multi-element contingency,
+        # keyed by the AC branches in service in t and the edges of these outaged by the contingency
+        multi_k_components = {}
+
         for t in range(self.problem.num_t):
 
             # todo performance
@@ -1335,8 +1378,12 @@ class SolutionEvaluator(object):
 
             # need this to select only the contingency edges from the bridges
             # bridges not outaged by a contingency are not a violation of post-contingency connectedness
-            t_ctg_acl = [self.problem.k_out_acl[i] for i in range(self.problem.num_k) if self.problem.k_out_is_acl[i]]
-            t_ctg_xfr = [self.problem.k_out_xfr[i] for i in range(self.problem.num_k) if self.problem.k_out_is_xfr[i]]
+            t_ctg_acl = [
+                self.problem.k_out_acl[i] for i in range(self.problem.num_k)
+                if self.problem.k_out_is_acl[i] and self.problem.k_num_out[i] == 1]
+            t_ctg_xfr = [
+                self.problem.k_out_xfr[i] for i in range(self.problem.num_k)
+                if self.problem.k_out_is_xfr[i] and self.problem.k_num_out[i] == 1]
             t_ctg_acl = [i for i in t_ctg_acl if self.acl_t_u_on[i,t] == 1]
             t_ctg_xfr = [i for i in t_ctg_xfr if self.xfr_t_u_on[i,t] == 1]
             t_ctg_acl_edges = [(self.problem.acl_fbus[i], self.problem.acl_tbus[i]) for i in t_ctg_acl]
@@ -1347,6 +1394,8 @@ class SolutionEvaluator(object):
             # only needed for information, not to determine if there is a violation
             t_ctg_edge_ctg_map = {i:[] for i in t_ctg_edges_set}
             for i in range(self.problem.num_k):
+                if self.problem.k_num_out[i] > 1:
+                    continue
                 if self.problem.k_out_is_acl[i]:
                     if self.acl_t_u_on[self.problem.k_out_acl[i], t] == 1:
                         t_ctg_edge_ctg_map[(self.problem.k_out_fbus[i], self.problem.k_out_tbus[i])].append(i)
@@ -1375,6 +1424,34 @@ class SolutionEvaluator(object):
                 ctg_violation_i1 = t_ctg_bridge_edges[0][1]
                 ctg_violation_k = t_ctg_edge_ctg_map[(ctg_violation_i0, ctg_violation_i1)][0]
 
+            # multi-element contingencies - connected components of the contingency graph.
+            # there is one graph search for each distinct set of in service AC branches outaged,
+            # over the contingencies and the t with the same AC branches in service, see multi_k_components
+            t_acl_edge_map = {t_acl[i]: i for i in range(len(t_acl))}
+            t_xfr_edge_map = {t_xfr[i]: len(t_acl) + i for i in range(len(t_xfr))}
+            t_branches = (tuple(t_acl), tuple(t_xfr))
+            for i in range(self.problem.num_k):
+                if self.problem.k_num_out[i] < 2:
+                    continue
+                k_edges_out = frozenset(
+                    [t_acl_edge_map[j] for j in self.problem.k_out_acl_list[i] if j in t_acl_edge_map] +
+                    [t_xfr_edge_map[j] for j in self.problem.k_out_xfr_list[i] if j in t_xfr_edge_map])
+                if len(k_edges_out) == 0:
+                    continue
+                k_connected_components = multi_k_components.get((t_branches, k_edges_out))
+                if k_connected_components is None:
+                    k_edges = [t_edges[j] for j in range(len(t_edges)) if j not in k_edges_out]
+                    k_connected_components = utils.get_connected_components(vertices, k_edges)
+                    multi_k_components[(t_branches, k_edges_out)] = k_connected_components
+                if len(k_connected_components) > 1:
+                    self.t_ctg_bridges[t] += 1
+                    if not found_ctg_violation:
+                        found_ctg_violation = True
+                        ctg_violation_t = t
+                        ctg_violation_i0 = k_connected_components[0][0]
+                        ctg_violation_i1 = k_connected_components[1][0]
+                        ctg_violation_k = i
+
         # report violations
         self.viol_t_connected_base = utils.get_max(
             self.t_connected_components_base - 1, idx_lists=[self.problem.t_num])
@@ -1407,9 +1484,15 @@ class SolutionEvaluator(object):
 
         start_time = time.time()
         #self.t_k_z = numpy.zeros(shape=(self.problem.num_t, self.problem.num_k), dtype=float) # this is done earlier
+        self.ctg_topology_cache_hits = 0
+        self.ctg_topology_cache_misses = 0
+        self.ctg_profile = {}
+        self.ctg_top_viol_idx = None
         # skip post-contingency evaluation if not connected - might as well skip if infeasible so far - todo
         if self.viol_t_connected_base['val'] == 0 and self.viol_t_connected_ctg['val'] == 0:
-            ctgmodel.eval_post_contingency_model(self)
+            if self.ctg_evaluator is None:
+                self.ctg_evaluator = ctgmodel.ContingencyEvaluator(self.problem, self.config)
+            self.ctg_evaluator.eval(self)
         end_time = time.time()
         self.time_post_contingency = end_time - start_time
 
@@ -1432,15 +1515,14 @@ class SolutionEvaluator(object):
         '''
 
         # evaluate sd_t_z_p and store in sd_t_float
-        # maybe passing in work arrays could make it more efficient,
-        # but probably not. really need cython on this if it becomes a problem
-        for i in range(self.problem.num_sd):
-            for j in range(self.problem.num_t):
-                self.sd_t_float[i,j] = utils.eval_convex_cost_function(
-                    self.problem.sd_t_num_block[i,j],
-                    self.problem.sd_t_block_p_max_list[i][j],
-                    self.problem.sd_t_block_c_list[i][j],
-                    self.sd_t_p[i,j])
+        # vectorized over all devices and intervals, with the same results as looping over them
+        # with utils.eval_convex_cost_function
+        utils.eval_convex_cost_function_arrays(
+            self.problem.sd_t_block_ptr,
+            self.problem.sd_block_p_max,
+            self.problem.sd_block_c,
+            self.sd_t_p,
+            out=self.sd_t_float)
         numpy.multiply(
             numpy.reshape(self.problem.t_d, newshape=(1, self.problem.num_t)), self.sd_t_float, out=self.sd_t_float)
 
@@ -1580,78 +1662,37 @@ class SolutionEvaluator(object):
     def eval_sd_t_su_sd_trajectories(self):
         '''
         set u_on_su_sd, p_su, p_sd
-        loop over u_su nonzeros and u_sd nonzeros
+        from the startup and shutdown trajectories precomputed in the problem,
+        see arraydata.InputData.set_sd_t_su_sd_trajectories(),
+        gathering the trajectories of the u_su nonzeros and u_sd nonzeros and scattering them into p_su, p_sd.
+        where trajectories overlap, the later startup or shutdown sets p, as in the sequential loop
         '''
 
-        #todo - for now set to 0 - add su/sd curve
-        # todo performance - eliminate a loop with numpy operations
-        # todo definitely check for bugs
         # todo need to ensure p > 0 is not ambiguous,
         # i.e. abs(p) > epsilon for some reasonably large epsilon, e.g. 1e-6,
         # or else just require q = 0 when in su/sd trajectory - i.e. u_on==0 but p_su > 0 or p_sd > 0
         self.sd_t_u_on_su_sd[:] = self.sd_t_u_on
         self.sd_t_p_su = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=float)
         self.sd_t_p_sd = numpy.zeros(shape=(self.problem.num_sd, self.problem.num_t), dtype=float)
+        self.scatter_sd_t_trajectories(
+            self.sd_t_u_su, self.problem.sd_t_su_traj_ptr, self.problem.sd_su_traj_t, self.problem.sd_su_traj_p,
+            self.sd_t_p_su)
+        self.scatter_sd_t_trajectories(
+            self.sd_t_u_sd, self.problem.sd_t_sd_traj_ptr, self.problem.sd_sd_traj_t, self.problem.sd_sd_traj_p,
+            self.sd_t_p_sd)
 
-        # su
-        indices = numpy.nonzero(self.sd_t_u_su)
-        num_indices = indices[0].size
-        for i in range(num_indices):
-            sd = indices[0][i]
-            t_1 = indices[1][i]
-            if t_1 == 0:
-                continue
-            p_1 = self.problem.sd_t_p_min[sd, t_1]
-            pr = self.problem.sd_p_startup_ramp_up_max[sd]
-            t = int(t_1) - 1
-            done = False
-            while not done:
-                # debugging
-                # if t == -43:
-                #     print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t))
-                p = p_1 - pr * (self.problem.t_a_end[t_1] - self.problem.t_a_end[t])
-                # debugging
-                # if i == 67:
-                #     print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}, p: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t, p))
-                if p > 0.0:
-                    self.sd_t_u_on_su_sd[sd, t] = 1
-                    self.sd_t_p_su[sd, t] = p
-                    # debugging
-                    # print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}, p: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t, p))
-                else:
-                    done = True
-                if t == 0:
-                    done = True
-                if not done:
-                    t -= 1
-                # debugging
-                # else:
-                #     print('i: {}, sd: {}, sd_uid: {}, t_1: {}, p_1: {}, pr: {}, t: {}, p: {}'.format(i, sd, self.problem.sd_uid[sd], t_1, p_1, pr, t, p))
-
-        # sd
-        indices = numpy.nonzero(self.sd_t_u_sd)
-        num_indices = indices[0].size
-        for i in range(num_indices):
-            sd = indices[0][i]
-            t_1 = indices[1][i]
-            if t_1 == 0:
-                p_1 = self.problem.sd_p_0[sd]
-            else:
-                p_1 = self.problem.sd_t_p_min[sd, t_1 - 1]
-            pr = self.problem.sd_p_shutdown_ramp_dn_max[sd]
-            t = int(t_1)
-            done = False
-            while not done:
-                p = p_1 - pr * (self.problem.t_a_end[t] - self.problem.t_a_start[t_1])
-                if p > 0.0:
-                    self.sd_t_u_on_su_sd[sd, t] = 1
-                    self.sd_t_p_sd[sd, t] = p
-                else:
-                    done = True
-                if t == self.problem.num_t - 1:
-                    done = True
-                if not done:
-                    t += 1
+    def scatter_sd_t_trajectories(self, sd_t_u, traj_ptr, traj_t, traj_p, sd_t_p):
+        '''
+        set u_on_su_sd = 1 and sd_t_p = p on the trajectories of the nonzeros of sd_t_u
+        '''
+
+        entries, rows = utils.get_ragged_rows(traj_ptr, numpy.flatnonzero(sd_t_u))
+        idx = rows - rows % self.problem.num_t + traj_t[entries]
+        # last entry at each index, as rows are in increasing order of t_1 within each device
+        idx_rev_unique, last = numpy.unique(idx[::-1], return_index=True)
+        last = idx.size - 1 - last
+        numpy.reshape(self.sd_t_u_on_su_sd, newshape=(-1, ))[idx_rev_unique] = 1
+        numpy.reshape(sd_t_p, newshape=(-1, ))[idx_rev_unique] = traj_p[entries[last]]
 
     def eval_sd_t_p_rgu_nonneg(self):
         '''
@@ -2151,93 +2192,51 @@ class SolutionEvaluator(object):
         numpy.maximum(0.0, self.sd_t_float_1, out=self.sd_t_float_1)
         self.viol_sd_t_p_ramp_dn_max = utils.get_max(self.sd_t_float_1, idx_lists=[self.problem.sd_uid, self.problem.t_num])
 
-    # todo this looks inefficient, but so far it is not a problem
     @utils.timeit
     def eval_sd_max_energy(self):
         '''
+        one mat-vec over all devices and windows, see arraydata.InputData.set_sd_window_mats()
         '''
 
-        max_viol = 0.0
-        max_i = 0
-        max_j = 0
-        self.sd_z_max_energy = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sum_viol = 0.0
-        for i in range(self.problem.num_sd):
-            sum_viol = 0.0
-            for j in range(self.problem.sd_num_max_energy_constr[i]):
-                a_start = self.problem.sd_max_energy_constr_a_start_list[i][j]
-                a_end = self.problem.sd_max_energy_constr_a_end_list[i][j]
-                numpy.less(a_start + self.config['time_eq_tol'], self.problem.t_a_mid, out=self.t_int_1) # todo - check if this is right
-                numpy.less_equal(self.problem.t_a_mid, a_end + self.config['time_eq_tol'], out=self.t_int_2)
-                numpy.multiply(self.t_int_1, self.t_int_2, out=self.t_int)
-                #print('t_a_start: {}'.format(self.problem.t_a_start))
-                #print('t_a_end: {}'.format(self.problem.t_a_end))
-                #print('t_int_1: {}'.format(self.t_int_1))
-                #print('t_int_2: {}'.format(self.t_int_2))
-                #print('t_int: {}'.format(self.t_int))
-                numpy.multiply(self.t_int, self.problem.t_d, out=self.t_float)
-                numpy.multiply(self.t_float, self.sd_t_p[i, :], out=self.t_float)
-                #print('t_d: {}'.format(self.problem.t_d))
-                #print('sd_t_u_p: {}'.format(self.sd_t_p[i, :]))
-                #print('t_float: {}'.format(self.t_float))
-                energy = numpy.sum(self.t_float)
-                viol = max(0, energy - self.problem.sd_max_energy_constr_max_energy_list[i][j])
-                #print('i: {}, j: {}, sd: {}, t: {}, a_start: {}, a_end: {}, max_energy: {}, energy: {}, viol: {}'.format(
-                #    i, j, self.problem.sd_uid[i], self.problem.t_num[j], a_start, a_end, self.problem.sd_max_energy_constr_max_energy_list[i][j], energy, viol))
-                sum_viol += viol
-                if viol > max_viol:
-                    max_viol = viol
-                    max_i = i
-                    max_j = j
-            self.sd_z_max_energy[i] = self.problem.c_e * sum_viol
-        self.viol_sd_max_energy_constr = {
-            'val': max_viol,
-            #'abs': abs(max_viol),
-            'idx': {0:self.problem.sd_uid[max_i], 1:self.problem.t_num[max_j]},
-            #'idx_lin': None,
-            #'idx_int': (max_i, max_j),
-        }
+        energy = self.problem.sd_max_energy_constr_mat.dot(numpy.reshape(self.sd_t_p, newshape=(-1, )))
+        viol = energy - self.problem.sd_max_energy_constr_max_energy
+        viol = numpy.where(viol > 0.0, viol, 0.0)
+        self.sd_z_max_energy = self.problem.c_e * numpy.bincount(
+            self.problem.sd_max_energy_constr_sd, weights=viol, minlength=self.problem.num_sd)
+        self.viol_sd_max_energy_constr = self.get_sd_window_viol(
+            viol, self.problem.sd_max_energy_constr_sd, self.problem.sd_max_energy_constr_idx)
 
-    # todo this looks inefficient, but so far it is not a problem
     @utils.timeit
     def eval_sd_min_energy(self):
         '''
+        one mat-vec over all devices and windows, see arraydata.InputData.set_sd_window_mats()
+        '''
+
+        energy = self.problem.sd_min_energy_constr_mat.dot(numpy.reshape(self.sd_t_p, newshape=(-1, )))
+        viol = self.problem.sd_min_energy_constr_min_energy - energy
+        viol = numpy.where(viol > 0.0, viol, 0.0)
+        self.sd_z_min_energy = self.problem.c_e * numpy.bincount(
+            self.problem.sd_min_energy_constr_sd, weights=viol, minlength=self.problem.num_sd)
+        self.viol_sd_min_energy_constr = self.get_sd_window_viol(
+            viol, self.problem.sd_min_energy_constr_sd, self.problem.sd_min_energy_constr_idx)
+
+    def get_sd_window_viol(self, viol, window_sd, window_idx):
+        '''
+        max violation over the windows of a device constraint family,
+        the first window with the max violation, or device 0 and window 0 if there is no violation.
+        the window index within the device is reported in place of t
         '''
 
-        max_viol = 0.0
+        max_viol = viol.dtype.type(0).item()
         max_i = 0
         max_j = 0
-        self.sd_z_min_energy = numpy.zeros(shape=(self.problem.num_sd, ), dtype=float)
-        sum_viol = 0.0
-        for i in range(self.problem.num_sd):
-            sum_viol = 0.0
-            for j in range(self.problem.sd_num_min_energy_constr[i]):
-                a_start = self.problem.sd_min_energy_constr_a_start_list[i][j]
-                a_end = self.problem.sd_min_energy_constr_a_end_list[i][j]
-                numpy.less(a_start + self.config['time_eq_tol'], self.problem.t_a_mid, out=self.t_int_1) # todo - check if this is right
-                numpy.less_equal(self.problem.t_a_mid, a_end + self.config['time_eq_tol'], out=self.t_int_2)
-                numpy.multiply(self.t_int_1, self.t_int_2, out=self.t_int)
-                #print('t_a_start: {}'.format(self.problem.t_a_start))
-                #print('t_a_end: {}'.format(self.problem.t_a_end))
-                #print('t_int_1: {}'.format(self.t_int_1))
-                #print('t_int_2: {}'.format(self.t_int_2))
-                #print('t_int: {}'.format(self.t_int))
-                numpy.multiply(self.t_int, self.problem.t_d, out=self.t_float)
-                numpy.multiply(self.t_float, self.sd_t_p[i, :], out=self.t_float)
-                #print('t_d: {}'.format(self.problem.t_d))
-                #print('sd_t_u_p: {}'.format(self.sd_t_p[i, :]))
-                #print('t_float: {}'.format(self.t_float))
-                energy = numpy.sum(self.t_float)
-                viol = max(0, self.problem.sd_min_energy_constr_min_energy_list[i][j] - energy)
-                #print('i: {}, j: {}, sd: {}, t: {}, a_start: {}, a_end: {}, min_energy: {}, energy: {}, viol: {}'.format(
-                #    i, j, self.problem.sd_uid[i], self.problem.t_num[j], a_start, a_end, self.problem.sd_min_energy_constr_min_energy_list[i][j], energy, viol))
-                sum_viol += viol
-                if viol > max_viol:
-                    max_viol = viol
-                    max_i = i
-                    max_j = j
-            self.sd_z_min_energy[i] = self.problem.c_e * sum_viol
-        self.viol_sd_min_energy_constr = {
+        if viol.size > 0:
+            k = numpy.argmax(viol)
+            if viol[k] > 0:
+                max_viol = viol[k].item()
+                max_i = window_sd[k]
+                max_j = window_idx[k]
+        return {
             'val': max_viol,
             #'abs': abs(max_viol),
             'idx': {0:self.problem.sd_uid[max_i], 1:self.problem.t_num[max_j]},
@@ -2644,62 +2643,40 @@ class SolutionEvaluator(object):
         self.sum_sd_t_z_sd = numpy.sum(self.sd_t_float)
         self.t_sum_sd_t_z_sd = numpy.sum(self.sd_t_float, axis=0)
 
-    # todo this looks inefficient, but so far it is not a problem
     @utils.timeit
     def eval_sd_max_startup(self):
+        '''
+        one mat-vec over all devices and windows, see arraydata.InputData.set_sd_window_mats()
+        '''
 
-        max_viol = 0
-        max_i = 0
-        max_j = 0
-        for i in range(self.problem.num_sd):
-            for j in range(self.problem.sd_num_max_startup_constr[i]):
-                #viol = 0
-                #self.sd_max_startup_constr_over[i][j] = ??
-                #self.t_int[:] = 1
-                a_start = self.problem.sd_max_startup_constr_a_start_list[i][j]
-                a_end = self.problem.sd_max_startup_constr_a_end_list[i][j]
-                numpy.less_equal(a_start - self.config['time_eq_tol'], self.problem.t_a_start, out=self.t_int_1)
-                numpy.less(self.problem.t_a_start, a_end - self.config['time_eq_tol'], out=self.t_int_2)
-                numpy.multiply(self.t_int_1, self.t_int_2, out=self.t_int)
-                #print('t_a_start: {}'.format(self.problem.t_a_start))
-                #print('t_a_end: {}'.format(self.problem.t_a_end))
-                #print('t_int_1: {}'.format(self.t_int_1))
-                #print('t_int_2: {}'.format(self.t_int_2))
-                #print('t_int: {}'.format(self.t_int))
-                numpy.multiply(self.sd_t_u_su[i, :], self.t_int, out=self.t_int)
-                #print('sd_t_u_su: {}'.format(self.sd_t_u_su[i, :]))
-                #print('t_int: {}'.format(self.t_int))
-                startups = numpy.sum(self.t_int)
-                viol = max(0, startups - self.problem.sd_max_startup_constr_max_startup_list[i][j])
-                #print('i: {}, j: {}, sd: {}, t: {}, a_start: {}, a_end: {}, max_startups: {}, startups: {}, viol: {}'.format(
-                #    i, j, self.problem.sd_uid[i], self.problem.t_num[j], a_start, a_end, self.problem.sd_max_startup_constr_max_startup_list[i][j], startups, viol))
-                if viol > max_viol:
-                    max_viol = viol
-                    max_i = i
-                    max_j = j
-        self.viol_sd_max_startup_constr = {
-            'val': max_viol,
-            #'abs': abs(max_viol),
-            'idx': {0:self.problem.sd_uid[max_i], 1:self.problem.t_num[max_j]},
-            #'idx_lin': None,
-            #'idx_int': (max_i, max_j),
-        }
+        startups = self.problem.sd_max_startup_constr_mat.dot(numpy.reshape(self.sd_t_u_su, newshape=(-1, )))
+        viol = startups - self.problem.sd_max_startup_constr_max_startup
+        viol = numpy.where(viol > 0, viol, 0)
+        self.viol_sd_max_startup_constr = self.get_sd_window_viol(
+            viol, self.problem.sd_max_startup_constr_sd, self.problem.sd_max_startup_constr_idx)
 
     @utils.timeit
     def eval_sd_t_z_sus(self):
-        
-        for i in range(self.problem.num_sd):
-            self.t_float[:] = 0.0 # selecting no startup state, with no startup state cost adjustment, is allowed
-            for j in range(self.problem.sd_num_startup_state[i]):
-                # qualify for this startup state if self.sd_t_d_dn_start[i, :] <= max_prior_d_dn + tol
-                max_downtime = self.problem.sd_startup_state_d_max_list[i][j]
-                numpy.less_equal(self.sd_t_d_dn_start[i, :], max_downtime + self.config['time_eq_tol'], out=self.t_int)
-                # if qualify for this state what is cost?
-                cost = self.problem.sd_startup_state_c_list[i][j]
-                numpy.multiply(cost, self.t_int, out=self.t_float_1)
-                # take the better of qualified cost for this state and prior best cost
-                numpy.minimum(self.t_float, self.t_float_1, out=self.t_float)
-            self.sd_t_float[i, :] = self.t_float
+        '''
+        best qualified startup state cost adjustment for all sd, t at once,
+        from the padded sd,state arrays of startup state d_max and c in the problem
+        '''
+
+        # qualify for a startup state if self.sd_t_d_dn_start[i, t] <= max_prior_d_dn + tol
+        sd_t_state_qualify = numpy.less_equal(
+            numpy.reshape(self.sd_t_d_dn_start, newshape=(self.problem.num_sd, self.problem.num_t, 1)),
+            numpy.reshape(
+                self.problem.sd_startup_state_d_max + self.config['time_eq_tol'],
+                newshape=(self.problem.num_sd, 1, self.problem.sd_max_num_startup_state)))
+        # take the best qualified cost.
+        # selecting no startup state, with no startup state cost adjustment, is allowed
+        numpy.amin(
+            numpy.broadcast_to(
+                numpy.reshape(
+                    self.problem.sd_startup_state_c,
+                    newshape=(self.problem.num_sd, 1, self.problem.sd_max_num_startup_state)),
+                sd_t_state_qualify.shape),
+            axis=2, out=self.sd_t_float, where=sd_t_state_qualify, initial=0.0)
         # cost adjustment applies only when starting up
         numpy.multiply(self.sd_t_u_su, self.sd_t_float, out=self.sd_t_float)
         #
@@ -4,6 +4,7 @@ try:
 except:
     print('cannot load matplotlib')
 import numpy as np
+from datautilities import arraydata
 
 def get_sd_uid(data):
 
@@ -20,153 +21,83 @@ def get_sd_cs(data):
         for i in data.network.simple_dispatchable_device}
     return sd_cs
 
-def get_sd_t_blocks(data):
-
-    num_t = get_num_t(data)
-    sd_cs = get_sd_cs(data)
-    sd_t_p_max = get_sd_t_p_max(data)
-    sd_t_blocks = {
-        i.uid: [
-            [{'sd': i.uid,
-              'sd_cs': sd_cs[i.uid],
-              't': t,
-              'sd_t_p_max': sd_t_p_max[i.uid][t],
-              'p_max': b[1],
-              'c': b[0]}
-             for b in i.cost[t]]
-            for t in range(num_t)]
-        for i in data.time_series_input.simple_dispatchable_device}
-    return sd_t_blocks
-
 def get_sd_t_p_max(data):
 
-    num_t = get_num_t(data)
-    sd_t_pmax = {
-        i.uid: i.p_ub
-        for i in data.time_series_input.simple_dispatchable_device}
-    return sd_t_pmax
-
-# def convert_sd_t_blocks_pr_to_cs(data, sd_t_blocks):
-
-#     # just repeat cs-to-pr conversion
-#     convert_sd_t_blocks_cs_to_pr(data, sd_t_blocks)
-
-# def convert_sd_t_blocks_cs_to_pr(data, sd_t_blocks):
-
-#     sd_uid = get_sd_uid(data)
-#     num_t = get_num_t(data)
-#     for j in sd_uid:
-#         for t in range(num_t):
-#             for b in sd_t_blocks[j][t]:
-#                 if b['sd_cs']:
-#                     b['c'] *= -1.0
-
-def check_sd_t_blocks(sd_t_blocks):
+    sd_uid = get_sd_uid(data)
+    data_map = {i.uid:i for i in data.time_series_input.simple_dispatchable_device}
+    sd_t_p_max = np.array([data_map[i].p_ub for i in sd_uid], dtype=float)
+    return sd_t_p_max
 
-    pass # todo check nonnegative p_max - ok as we do this elsewhere
+def filter_blocks_by_sd_t_p_max(sd_t_block_ptr, block_p_max, sd_t_p_max):
+    '''
+    keep the blocks of each device and interval, in order, up to and including the first block
+    where the cumulative p_max exceeds the device p_max, and reduce the p_max of that block
+    so that the cumulative p_max is equal to the device p_max.
+    returns a mask of the blocks to keep and the reduced p_max of the blocks
+    '''
 
-def sort_sd_t_blocks_by_decreasing_margin(data, sd_t_blocks):
+    block_p_max = np.array(block_p_max, dtype=float)
+    keep = np.zeros(shape=block_p_max.shape, dtype=bool)
+    p_max = np.reshape(sd_t_p_max, newshape=(-1, ))
+    p_max_cumul = np.zeros(shape=p_max.shape, dtype=float)
+    start = sd_t_block_ptr[0:-1]
+    num_block = np.diff(sd_t_block_ptr)
+    idx = np.flatnonzero(num_block > 0)
+    i = 0
+    while idx.size > 0:
+        b = start[idx] + i
+        keep[b] = True
+        p_max_cumul[idx] += block_p_max[b]
+        over = np.greater(p_max_cumul[idx], p_max[idx])
+        b_over = b[over]
+        idx_over = idx[over]
+        block_p_max[b_over] -= (p_max_cumul[idx_over] - p_max[idx_over])
+        block_p_max[b_over] = np.maximum(0.0, block_p_max[b_over])
+        idx = idx[np.logical_not(over)]
+        i += 1
+        idx = idx[num_block[idx] > i]
+    return keep, block_p_max
+
+def get_t_blocks(data):
     '''
-    i.e. pr blocks by increasing c, cs blocks by decreasing cu
+    producer and consumer blocks in each interval, from the flat ragged cost blocks
+    of arraydata.get_sd_t_cost_blocks(), i.e. sorted by decreasing margin within each device,
+    filtered by the device p_max.
+    returns a list over t of (pr_block_p_max, pr_block_c, cs_block_p_max, cs_block_c),
+    with the blocks in order of device, then of decreasing margin
     '''
 
-    sd_uid = get_sd_uid(data)
     num_t = get_num_t(data)
+    sd_uid = get_sd_uid(data)
     sd_cs = get_sd_cs(data)
-    for j in sd_uid:
-        if sd_cs[j]:
-            for t in range(num_t):
-                sd_t_blocks[j][t] = sorted(sd_t_blocks[j][t], key=(lambda x: -x['c']))
-        else:
-            for t in range(num_t):
-                sd_t_blocks[j][t] = sorted(sd_t_blocks[j][t], key=(lambda x: x['c']))
-
-def sort_t_blocks_by_increasing_c(data, t_blocks):
-
-    num_t = get_num_t(data)
-    for t in range(num_t):
-        t_blocks[t] = sorted(t_blocks[t], key=(lambda x: x['c']))
-
-def sort_t_blocks_by_decreasing_c(data, t_blocks):
-
-    num_t = get_num_t(data)
+    sd_is_cs = np.array([sd_cs[i] for i in sd_uid], dtype=bool)
+    sd_t_block_ptr, block_c, block_p_max = arraydata.get_sd_t_cost_blocks(data, sd_uid, sd_is_cs)
+    keep, block_p_max = filter_blocks_by_sd_t_p_max(sd_t_block_ptr, block_p_max, get_sd_t_p_max(data))
+    num_block = np.diff(sd_t_block_ptr)
+    block_sd_t = np.repeat(np.arange(num_block.size), num_block)
+    block_t = block_sd_t % num_t
+    block_cs = sd_is_cs[block_sd_t // num_t]
+    block_c = np.where(block_cs, -block_c, block_c) # cs blocks back to positive benefit
+    t_blocks = []
     for t in range(num_t):
-        t_blocks[t] = sorted(t_blocks[t], key=(lambda x: -x['c']))
-
-def add_p_max_cumul_to_sd_t_blocks(data, sd_t_blocks):
-
-    sd_uid = get_sd_uid(data)
-    num_t = get_num_t(data)
-    for j in sd_uid:
-        for t in range(num_t):
-            p_max = 0.0
-            for b in sd_t_blocks[j][t]:
-                p_max += b['p_max']
-                b['p_max_cumul'] = p_max
-
-def filter_sd_t_blocks_by_sd_t_pmax(data, sd_t_blocks):
-
-    sd_uid = get_sd_uid(data)
-    num_t = get_num_t(data)
-    for j in sd_uid:
-        for t in range(num_t):
-            blocks = []
-            for b in sd_t_blocks[j][t]:
-                blocks.append(b)
-                if b['p_max_cumul'] > b['sd_t_p_max']:
-                    b['p_max'] -= (b['p_max_cumul'] - b['sd_t_p_max'])
-                    b['p_max'] = max(0.0, b['p_max'])
-                    b['p_max_cumul'] = b['sd_t_p_max']
-                    break
-            sd_t_blocks[j][t] = blocks
-
-def flatten_sd_t_blocks_to_t_blocks(data, sd_t_blocks):
-    
-    sd_uid = get_sd_uid(data)
-    num_t = get_num_t(data)
-    t_blocks = [
-        [b for j in sd_uid for b in sd_t_blocks[j][t]]
-        for t in range(num_t)]
+        t_keep = np.logical_and(keep, block_t == t)
+        t_pr = np.flatnonzero(np.logical_and(t_keep, np.logical_not(block_cs)))
+        t_cs = np.flatnonzero(np.logical_and(t_keep, block_cs))
+        t_blocks.append((block_p_max[t_pr], block_c[t_pr], block_p_max[t_cs], block_c[t_cs]))
     return t_blocks
 
-def get_t_blocks_pr(data, t_blocks):
-
-    num_t = get_num_t(data)
-    t_blocks_pr = [
-        [b for b in t_blocks[t] if not b['sd_cs']]
-        for t in range(num_t)]
-    return t_blocks_pr
-
-def get_t_blocks_cs(data, t_blocks):
-
-    num_t = get_num_t(data)
-    t_blocks_cs = [
-        [b for b in t_blocks[t] if b['sd_cs']]
-        for t in range(num_t)]
-    return t_blocks_cs
-
-def add_p_max_cumul_to_t_blocks(data, t_blocks):
-
-    num_t = get_num_t(data)
-    for t in range(num_t):
-        p_max_cumul = np.cumsum([b['p_max'] for b in t_blocks[t]])
-        for i in range(len(t_blocks[t])):
-            t_blocks[t][i]['p_max_cumul'] = p_max_cumul[i]
-        #p_max = 0.0
-        #for b in t_blocks[t]:
-        #    p_max += b['p_max']
-        #    b['p_max_cumul'] = p_max
-
-def plot_blocks_pr_cs_one_t(blocks_pr, blocks_cs, equilibrium, problem_file_name, t, file_name):
+def plot_blocks_pr_cs_one_t(pr_block_p_max, pr_block_c, cs_block_p_max, cs_block_c, equilibrium, problem_file_name, t, file_name):
 
-    x_pr = [b['p_max_cumul'] for b in blocks_pr for i in range(2)]
+    pr_order = np.argsort(pr_block_c, kind='stable')
+    cs_order = np.argsort(-cs_block_c, kind='stable')
+    x_pr = np.repeat(np.cumsum(pr_block_p_max[pr_order]), 2).tolist()
     x_pr = x_pr[0:-1]
     x_pr = [0.0] + x_pr
-    y_pr = [b['c'] for b in blocks_pr for i in range(2)]
-    x_cs = [b['p_max_cumul'] for b in blocks_cs for i in range(2)]
+    y_pr = np.repeat(pr_block_c[pr_order], 2).tolist()
+    x_cs = np.repeat(np.cumsum(cs_block_p_max[cs_order]), 2).tolist()
     x_cs = x_cs[0:-1]
     x_cs = [0.0] + x_cs
-    y_cs = [b['c'] for b in blocks_cs for i in range(2)]
+    y_cs = np.repeat(cs_block_c[cs_order], 2).tolist()
 
     info_str_format = '\n'.join(
         [
@@ -514,37 +445,18 @@ def compute_equilibrium_flexible_demand(pr_block_max_p, pr_block_c, cs_block_max
 def analyze_supply_demand(data, do_plots=False, problem_file_name=None):
 
     num_t = get_num_t(data)
-    sd_t_blocks = get_sd_t_blocks(data)
-    check_sd_t_blocks(sd_t_blocks)
-    #print('sd_t_blocks: {}'.format(sd_t_blocks))
-    #convert_sd_t_blocks_cs_to_pr(data, sd_t_blocks)
-    #print('sd_t_blocks: {}'.format(sd_t_blocks))
-    sort_sd_t_blocks_by_decreasing_margin(data, sd_t_blocks)
-    #print('sd_t_blocks: {}'.format(sd_t_blocks))
-    add_p_max_cumul_to_sd_t_blocks(data, sd_t_blocks)
-    #print('sd_t_blocks: {}'.format(sd_t_blocks))
-    filter_sd_t_blocks_by_sd_t_pmax(data, sd_t_blocks)
-    #print('sd_t_blocks: {}'.format(sd_t_blocks))
-    #convert_sd_t_blocks_pr_to_cs(data, sd_t_blocks)
-    #print('sd_t_blocks: {}'.format(sd_t_blocks))
-    t_blocks = flatten_sd_t_blocks_to_t_blocks(data, sd_t_blocks)
-    t_blocks_pr = get_t_blocks_pr(data, t_blocks)
-    t_blocks_cs = get_t_blocks_cs(data, t_blocks)
+    t_blocks = get_t_blocks(data)
     t_equilibrium = [
         compute_equilibrium_flexible_demand(
-            pr_block_max_p=[b['p_max'] for b in t_blocks_pr[t]],
-            pr_block_c=[b['c'] for b in t_blocks_pr[t]],
-            cs_block_max_p=[b['p_max'] for b in t_blocks_cs[t]],
-            cs_block_c=[b['c'] for b in t_blocks_cs[t]],
+            pr_block_max_p=t_blocks[t][0].tolist(),
+            pr_block_c=t_blocks[t][1].tolist(),
+            cs_block_max_p=t_blocks[t][2].tolist(),
+            cs_block_c=t_blocks[t][3].tolist(),
             fixed_demand=0.0)
         for t in range(num_t)]
     for t in range(num_t):
         print('t: {}'.format(t))
         print('equilibrium: {}'.format(t_equilibrium[t]))
-    sort_t_blocks_by_increasing_c(data, t_blocks_pr)
-    sort_t_blocks_by_decreasing_c(data, t_blocks_cs)
-    add_p_max_cumul_to_t_blocks(data, t_blocks_pr)
-    add_p_max_cumul_to_t_blocks(data, t_blocks_cs)
     #do_plots = True
     if do_plots:
         if plt is None:
@@ -552,8 +464,7 @@ def analyze_supply_demand(data, do_plots=False, problem_file_name=None):
         else:
             for t in range(num_t):
                 plot_blocks_pr_cs_one_t(
-                    t_blocks_pr[t],
-                    t_blocks_cs[t],
+                    *t_blocks[t],
                     t_equilibrium[t],
                     problem_file_name=problem_file_name,
                     t=t,
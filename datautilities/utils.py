@@ -513,3 +513,66 @@ def eval_convex_cost_function(num_block, p_max, c, p):
             z_so_far += c[i] * p_remaining
             break
     return z_so_far
+
+def eval_convex_cost_function_arrays(block_ptr, p_max, c, p, out=None):
+    '''
+    eval_convex_cost_function on arrays, e.g. over all devices and intervals at once.
+    the blocks are in flat arrays p_max and c, with the blocks for the i-th entry of p, in row major order,
+    at block_ptr[i] to block_ptr[i + 1] - 1, see arraydata.get_sd_t_cost_blocks().
+
+    there is one pass over each block position, applying the block wherever the loop would reach it,
+    with the same floating point operations in the same order, so the results are identical to the loop
+    '''
+
+    if out is None:
+        out = numpy.zeros(shape=p.shape, dtype=float)
+    else:
+        out[:] = 0.0
+    z = numpy.reshape(out, newshape=(-1, ))
+    p_remaining = numpy.array(numpy.reshape(p, newshape=(-1, )), dtype=float)
+    start = block_ptr[0:-1]
+    num_block = numpy.diff(block_ptr)
+    idx = numpy.flatnonzero(num_block > 0) # entries the loop reaches block i in
+    i = 0
+    while idx.size > 0:
+        b = start[idx] + i
+        p_max_i = p_max[b]
+        c_i = c[b]
+        over = numpy.greater(p_remaining[idx], p_max_i)
+        last = numpy.logical_not(over)
+        idx_last = idx[last]
+        z[idx_last] += c_i[last] * p_remaining[idx_last]
+        idx = idx[over]
+        z[idx] += c_i[over] * p_max_i[over]
+        p_remaining[idx] -= p_max_i[over]
+        i += 1
+        idx = idx[num_block[idx] > i]
+    return out
+
+def make_ragged(num_row, row, *cols):
+    '''
+    flat ragged arrays, like the rows of a CSR matrix, from entries given as a row index
+    and any number of column arrays of values, e.g. built up in several passes.
+    returns ptr, with the entries of row i at ptr[i] to ptr[i + 1] - 1, followed by the column arrays,
+    grouped by row, keeping the given order of the entries within each row
+    '''
+
+    row = numpy.asarray(row, dtype=int)
+    ptr = numpy.zeros(shape=(num_row + 1, ), dtype=int)
+    numpy.cumsum(numpy.bincount(row, minlength=num_row), out=ptr[1:])
+    order = numpy.argsort(row, kind='stable')
+    return (ptr,) + tuple(numpy.asarray(c)[order] for c in cols)
+
+def get_ragged_rows(ptr, rows):
+    '''
+    indices of the entries of the given rows of flat ragged arrays, see make_ragged(),
+    in order of the given rows, and the row of each entry
+    '''
+
+    rows = numpy.asarray(rows, dtype=int)
+    num = ptr[rows + 1] - ptr[rows]
+    entry_row = numpy.repeat(rows, num)
+    offset = numpy.zeros(shape=(rows.size, ), dtype=int)
+    numpy.cumsum(num[0:-1], out=offset[1:])
+    entries = numpy.arange(entry_row.size) + numpy.repeat(ptr[rows] - offset, num)
+    return entries, entry_row
@@ -1173,7 +1173,7 @@ def check_data(problem_file, solution_file, default_config_file, config_file, pa
         start_time = time.time()
         try:
             problem_data_array = arraydata.InputData()
-            problem_data_array.set_from_data_model(data_model)
+            problem_data_array.set_from_data_model(data_model, config)
         except Exception as e:
             err_msg = 'evaluation error in converting problem data model to numpy arrays - unexpected'
             summary['evaluation']['pass'] = 0
@@ -1283,6 +1283,10 @@ def write_summary_csv(summary, summary_csv_file, config):
     max_field_len = config['summary_field_str_len_max']
     summary_for_csv = copy.deepcopy(summary)
     summary_for_csv['evaluation']['infeas_diagnostics'] = json.dumps(summary_for_csv['evaluation']['infeas_diagnostics'], cls=utils.NpEncoder)
+    if 'ctg_profile' in summary_for_csv['evaluation']:
+        summary_for_csv['evaluation']['ctg_profile'] = json.dumps(summary_for_csv['evaluation']['ctg_profile'], cls=utils.NpEncoder)
+    if 'ctg_top_viol' in summary_for_csv['evaluation']:
+        summary_for_csv['evaluation']['ctg_top_viol'] = json.dumps(summary_for_csv['evaluation']['ctg_top_viol'], cls=utils.NpEncoder)
     summary_for_csv['problem']['error_diagnostics'] = summary_for_csv['problem']['error_diagnostics'][:max_field_len]
     summary_for_csv['solution']['error_diagnostics'] = summary_for_csv['solution']['error_diagnostics'][:max_field_len]
     summary_for_csv['evaluation']['error_diagnostics'] = summary_for_csv['evaluation']['error_diagnostics'][:max_field_len]